@@ -0,0 +1,92 @@
+"""Compares signing/verifying per second and scalar multiplication of the old affine
+double-and-add with the Jacobian wNAF multiplication of `Point` and the fixed-base
+table of G (built in memory and loaded from the disk cache). The verifying is
+compared with the former two separate multiplications u1*G + u2*Q.
+
+usage (from the root of repository): python -m benchmarks.bench_address [NUMBER_SIGNS]
+"""
+import os
+import sys
+import tempfile
+from hashlib import sha256
+from time import perf_counter
+
+from pbcoin.utils import address as addr
+from pbcoin.utils.address import Address, Point
+
+
+def legacy_mul(n: int, point: Point) -> Point:
+    """the recursive affine double-and-add of the former `Point.__rmul__`"""
+    if n == 1:
+        return point
+    if n % 2 == 1:
+        return point + legacy_mul(n - 1, point)
+    return legacy_mul(n // 2, point._double())
+
+
+def bench_mul(name: str, mul, scalars: list[int], point: Point) -> float:
+    start = perf_counter()
+    for n in scalars:
+        mul(n, point)
+    elapsed = perf_counter() - start
+    print(f"{name:<8} mul: {len(scalars) / elapsed:10.1f} ops/s")
+    return elapsed
+
+
+def separate_verify(message: str, sig: tuple[int, int], public_key: str) -> bool:
+    """`Address.verify` with two separate multiplications instead of Shamir's trick"""
+    r, s = sig
+    N = Address.SECP256K1.N
+    inv = pow(s, -1, N)
+    public = Point.from_str(public_key, curve=Address.SECP256K1)
+    v = ((int(message, 16) * inv) % N) * Address.G + ((r * inv) % N) * public
+    return v[0] % N == r
+
+
+def bench_g_table():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "g_table.json")
+        start = perf_counter()
+        table = addr._build_g_table(Address.G.jacobian, Address.SECP256K1)
+        print(f"G table build: {(perf_counter() - start) * 1000:8.2f}ms")
+        addr._save_g_table(path, table)
+        start = perf_counter()
+        assert addr._load_g_table(path, Address.G.jacobian) == table
+        print(f"G table load:  {(perf_counter() - start) * 1000:8.2f}ms "
+              f"({os.path.getsize(path) / 1024:.0f}KiB)")
+
+
+def main():
+    n_signs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    messages = [sha256(str(i).encode()).hexdigest() for i in range(n_signs)]
+    scalars = [int(message, 16) % Address.SECP256K1.N for message in messages]
+    for n in scalars[:10]:
+        assert legacy_mul(n, Address.G) == n * Address.G
+    point = 7 * Address.G  # not the generator
+    legacy = bench_mul("legacy", legacy_mul, scalars, point)
+    wnaf = bench_mul("wnaf", lambda n, point: n * point, scalars, point)
+    print(f"speedup: {legacy / wnaf:.2f}x")
+    bench_g_table()
+    bench_mul("G table", lambda n, point: n * point, scalars, Address.G)
+
+    address = Address()
+    address.gen_secret()
+    address.gen_public()
+    start = perf_counter()
+    signs = [address.sign(message) for message in messages]
+    elapsed = perf_counter() - start
+    print(f"sign:   {n_signs / elapsed:10.1f} ops/s")
+    start = perf_counter()
+    for message, sign in zip(messages, signs):
+        assert separate_verify(message, sign, address.public_key)
+    separate = perf_counter() - start
+    print(f"verify (separate): {n_signs / separate:10.1f} ops/s")
+    start = perf_counter()
+    for message, sign in zip(messages, signs):
+        assert Address.verify(message, sign, address.public_key, from_b64=False)
+    joint = perf_counter() - start
+    print(f"verify (joint):    {n_signs / joint:10.1f} ops/s  speedup: {separate / joint:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compares the mining hashrate of hashing the whole block header as a string for
+each nonce (the old way) with hashing its prefix once and copying the sha256
+midstate for each nonce.
+
+usage (from the root of repository): python -m benchmarks.bench_hashrate [NUMBER_NONCES]
+"""
+import sys
+from hashlib import sha256
+from time import perf_counter
+
+from pbcoin.block import Block, difficulty_to_target, search_nonce
+from pbcoin.trx import Trx
+
+
+def legacy_search_nonce(block: Block, difficulty: int, start: int, end: int):
+    """The old mining loop: builds the header string, hashes it from scratch and
+    parses the hex digest for each nonce"""
+    merkle_root = block.merkle_tree.hash
+    for nonce in range(start, end):
+        data = merkle_root + str(nonce) + block.previous_hash + str(block.time)
+        if int(sha256(data.encode()).hexdigest(), 16) <= difficulty:
+            return nonce
+    return None
+
+
+def bench(name: str, func, n_nonces: int) -> float:
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+    rate = n_nonces / elapsed
+    print(f"{name:<10} {n_nonces} nonces in {elapsed:.3f}s -> {rate:,.0f} H/s")
+    return rate
+
+
+def main():
+    n_nonces = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    block = Block("0" * 64, 1, Trx(1, "miner"))
+    block.build_merkle_tree()
+    difficulty = 0  # never found, so all nonces are tried
+    legacy = bench("legacy",
+                   lambda: legacy_search_nonce(block, difficulty, 0, n_nonces),
+                   n_nonces)
+    midstate = bench("midstate",
+                     lambda: search_nonce(block.header_prefix(),
+                                          difficulty_to_target(difficulty),
+                                          0, n_nonces),
+                     n_nonces)
+    print(f"speedup: {midstate / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
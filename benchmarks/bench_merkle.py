@@ -0,0 +1,44 @@
+"""Compares the memory usage and build time of the node object Merkle tree
+(MerkleTreeNode) with the flat array Merkle tree (ArrayMerkleTree).
+
+usage (from the root of repository): python -m benchmarks.bench_merkle [NUMBER_LEAVES]
+"""
+import gc
+import sys
+import tracemalloc
+from hashlib import sha256
+from time import perf_counter
+
+from pbcoin.merkle_tree import ArrayMerkleTree, MerkleTreeNode
+
+
+def bench(name: str, build, values: list[str]) -> None:
+    gc.collect()
+    start = perf_counter()
+    tree = build(values)
+    elapsed = perf_counter() - start
+    del tree
+    gc.collect()
+    tracemalloc.start()
+    tree = build(values)
+    kept, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = perf_counter()
+    for i in range(0, len(values), max(1, len(values) // 100)):
+        tree.get_proof(values[i])
+    proof_time = perf_counter() - start
+    print(f"{name:<6} build: {elapsed * 1000:8.2f}ms  memory: {kept / 1024:8.1f}KiB "
+          f"(peak {peak / 1024:8.1f}KiB)  100 proofs: {proof_time * 1000:8.2f}ms")
+
+
+def main():
+    n_leaves = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    values = [sha256(str(i).encode()).hexdigest() for i in range(n_leaves)]
+    assert ArrayMerkleTree(values).hash == MerkleTreeNode.build_merkle_tree(values).hash
+    print(f"{n_leaves} leaves")
+    bench("node", MerkleTreeNode.build_merkle_tree, values)
+    bench("array", ArrayMerkleTree, values)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Measures the throughput of `SignatureVerifier` with different number of worker
+processes and how long the event loop is blocked while verifying.
+
+usage (from the root of repository): python -m benchmarks.bench_verifier [NUMBER_SIGNS]
+"""
+import asyncio
+import os
+import sys
+from time import perf_counter
+
+from benchmarks.bench_verify_batch import make_items
+from pbcoin.sigcache import signature_cache
+from pbcoin.utils.address import Address
+from pbcoin.verifier import SignatureVerifier
+
+
+async def bench(n_workers: int, items: list) -> None:
+    verifier = SignatureVerifier(n_workers=n_workers)
+    verifier.start()
+    max_gap = 0.0
+
+    async def ticker():
+        nonlocal max_gap
+        last = perf_counter()
+        while True:
+            await asyncio.sleep(0.001)
+            now = perf_counter()
+            max_gap = max(max_gap, now - last)
+            last = now
+
+    try:
+        # warm up the workers
+        await verifier.invalid_signatures(items[:max(1, n_workers)])
+        signature_cache.clear()
+        ticker_task = asyncio.create_task(ticker())
+        start = perf_counter()
+        # like a burst of new transactions that each one is verified separately
+        results = await asyncio.gather(*[verifier.verify(*item) for item in items])
+        elapsed = perf_counter() - start
+        ticker_task.cancel()
+        assert all(results)
+    finally:
+        verifier.stop()
+    print(f"{n_workers:>2} workers: {len(items) / elapsed:8.1f} signs/s  "
+          f"max loop gap: {max_gap * 1000:7.2f}ms")
+
+
+def main():
+    n_signs = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    addresses = []
+    for _ in range(10):
+        address = Address()
+        address.gen_secret()
+        address.gen_public()
+        addresses.append(address)
+    items = make_items(n_signs, addresses)
+    for n_workers in sorted({0, 1, 2, 4, os.cpu_count() or 1}):
+        asyncio.run(bench(n_workers, items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compares verifying signatures one by one (`Address.verify`) with verifying them
+in a batch (`Address.verify_batch`) and finding the invalid ones
+(`Address.invalid_signatures`). Also compares verifying with a cold and a warm
+cache of parsed public keys.
+
+usage (from the root of repository):
+    python -m benchmarks.bench_verify_batch [NUMBER_SIGNS,...] [NUMBER_KEYS]
+"""
+import base64
+import sys
+from hashlib import sha256
+from time import perf_counter
+
+from pbcoin.utils.address import Address, public_key_cache
+
+
+def make_items(n_signs: int, addresses: list[Address]) -> list[tuple[str, tuple[int, int], str]]:
+    public_keys = [base64.b64encode(address.public_key.encode()).decode()
+                   for address in addresses]
+    items = []
+    for i in range(n_signs):
+        message = sha256(str(i).encode()).hexdigest()
+        address = addresses[i % len(addresses)]
+        items.append((message, address.sign(message), public_keys[i % len(addresses)]))
+    return items
+
+
+def bench(n_signs: int, addresses: list[Address]) -> None:
+    items = make_items(n_signs, addresses)
+    public_key_cache.clear()
+    start = perf_counter()
+    assert all(Address.verify(*item) for item in items)
+    one_by_one = perf_counter() - start
+    public_key_cache.clear()
+    start = perf_counter()
+    assert Address.verify_batch(items)
+    batch = perf_counter() - start
+    # one bad signature in the middle
+    items[n_signs // 2] = (items[0][0], items[1][1], items[0][2])
+    start = perf_counter()
+    assert Address.invalid_signatures(items) == [n_signs // 2]
+    pinpoint = perf_counter() - start
+    print(f"{n_signs:>6} signs  one by one: {n_signs / one_by_one:8.1f}/s  "
+          f"batch: {n_signs / batch:8.1f}/s ({one_by_one / batch:.2f}x)  "
+          f"find invalid: {n_signs / pinpoint:8.1f}/s")
+
+
+def bench_public_key_cache(addresses: list[Address], n_signs: int = 200) -> None:
+    items = make_items(n_signs, addresses[:1])
+    start = perf_counter()
+    for item in items:
+        public_key_cache.clear()
+        assert Address.verify(*item)
+    cold = perf_counter() - start
+    start = perf_counter()
+    for item in items:
+        assert Address.verify(*item)
+    warm = perf_counter() - start
+    print(f"same sender  cold key cache: {n_signs / cold:8.1f}/s  "
+          f"warm key cache: {n_signs / warm:8.1f}/s ({cold / warm:.2f}x)")
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1_000, 10_000]
+    n_keys = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    addresses = []
+    for _ in range(n_keys):
+        address = Address()
+        address.gen_secret()
+        address.gen_public()
+        addresses.append(address)
+    print(f"{n_keys} public keys")
+    for n_signs in sizes:
+        bench(n_signs, addresses)
+    bench_public_key_cache(addresses)
+
+
+if __name__ == "__main__":
+    main()
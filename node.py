@@ -18,6 +18,13 @@ def usage():
     print("  --socket-path <PATH>       the node UNIX/pipe(for windows) socket path which is used for cli to connect to")
     print("  --logging-filename <PATH>  logging in this filename")
     print("  --no-logging               no capture any logging")
+    print("  --mining-workers <NUMBER>  number of processes that search nonces for mining")
+    print("  --g-table-path <PATH>      cache the precomputed table of signing in this file")
+    print("  --sig-cache-size <NUMBER>  number of verified signatures that are kept")
+    print("  --verify-workers <NUMBER>  number of processes that verify signatures (0 is a thread)")
+    print("  --mempool-size <NUMBER>    max memory of mempool transactions (number is in mb)")
+    print("  --mempool-expiry <NUMBER>  hours that a transaction is kept in mempool")
+    print("  --mempool-path <PATH>      save mempool in this file and load it at start up")
 
 
 def parse_argv(argv: list[str]):
@@ -51,6 +58,27 @@ def parse_argv(argv: list[str]):
             option["logging_filename"] = argv[i]
         elif argv[i] == '--no-logging':
             option["logging"] = False
+        elif argv[i] == '--mining-workers':
+            i += 1
+            option["mining_workers"] = int(argv[i])
+        elif argv[i] == '--g-table-path':
+            i += 1
+            option["g_table_path"] = argv[i]
+        elif argv[i] == '--sig-cache-size':
+            i += 1
+            option["signature_cache_size"] = int(argv[i])
+        elif argv[i] == '--verify-workers':
+            i += 1
+            option["verify_workers"] = int(argv[i])
+        elif argv[i] == '--mempool-size':
+            i += 1
+            option["mempool_max_size"] = int(argv[i]) * 1_000_000
+        elif argv[i] == '--mempool-expiry':
+            i += 1
+            option["mempool_expiry"] = int(argv[i]) * 60 * 60
+        elif argv[i] == '--mempool-path':
+            i += 1
+            option["mempool_path"] = argv[i]
         elif argv[i] == '--difficulty':  # For testcase
             i += 1
             option["difficulty"] = int(argv[i])
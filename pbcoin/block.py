@@ -1,17 +1,104 @@
 from __future__ import annotations
 
-from copy import deepcopy
 from datetime import datetime
 from functools import reduce
 from enum import Flag, auto
 from operator import or_ as _or_
 from hashlib import sha256
+from struct import Struct
 from sys import getsizeof
 from typing import Any, List, Optional
 
 import pbcoin.config as conf
-from pbcoin.merkle_tree import MerkleTreeNode
-from pbcoin.trx import ALL_COINS_TYPE, Coin, Trx
+from pbcoin.constants import BLOCK_VERSION
+from pbcoin.merkle_tree import IncrementalMerkleTree, MerkleTreeNode
+from pbcoin.trx import Coin, Trx
+from pbcoin.sigcache import signature_cache
+from pbcoin.utxo import BlockUndo, CoinsView
+
+
+# The binary block header (little endian) with fixed offsets:
+#   version (uint32) | previous hash (32 bytes) | merkle root (32 bytes) |
+#   time (double) | difficulty bits (uint32) | nonce (uint64)
+HEADER_STRUCT = Struct("<I32s32sdIQ")
+HEADER_SIZE = HEADER_STRUCT.size
+# The nonce is the last field, so everything before it can be hashed once for mining
+NONCE_STRUCT = Struct("<Q")
+NONCE_OFFSET = HEADER_SIZE - NONCE_STRUCT.size
+
+_EMPTY_HASH = bytes(32)
+
+
+def hash_to_bytes(hash_hex: str) -> bytes:
+    """Converts a hex hash to 32 bytes for the binary header. An empty hash (like the
+    previous hash of the first block) is converted to 32 zero bytes."""
+    if not hash_hex:
+        return _EMPTY_HASH
+    return bytes.fromhex(hash_hex)
+
+
+def hash_from_bytes(hash_bytes: bytes) -> str:
+    """The reverse of `hash_to_bytes()`"""
+    if hash_bytes == _EMPTY_HASH:
+        return ""
+    return hash_bytes.hex()
+
+
+def difficulty_to_bits(difficulty: int) -> int:
+    """Encodes the difficulty in the compact 32 bit format (1 byte size and 3 bytes
+    mantissa). The precision of the difficulty is truncated, so the decoded value is
+    never more than the difficulty.
+
+    See Also
+    --------
+    `bits_to_difficulty()`
+    """
+    size = (difficulty.bit_length() + 7) // 8
+    if size <= 3:
+        mantissa = difficulty << (8 * (3 - size))
+    else:
+        mantissa = difficulty >> (8 * (size - 3))
+    # keep the highest bit of mantissa clear like the bitcoin compact format
+    if mantissa & 0x800000:
+        mantissa >>= 8
+        size += 1
+    return (size << 24) | mantissa
+
+
+def bits_to_difficulty(bits: int) -> int:
+    """Decodes the compact difficulty bits"""
+    size = bits >> 24
+    mantissa = bits & 0x7fffff
+    if size <= 3:
+        return mantissa >> (8 * (3 - size))
+    return mantissa << (8 * (size - 3))
+
+
+def difficulty_to_target(difficulty: int) -> bytes:
+    """Converts the difficulty to 32 bytes in big endian so that it can be compared
+    with a raw sha256 digest of a block header directly.
+    """
+    return difficulty.to_bytes(32, "big")
+
+
+def search_nonce(header_prefix: bytes, target: bytes, start: int, end: int) -> Optional[int]:
+    """Searches nonces in range [start, end) to find one that the header hash is less
+    (equal) than target. The header prefix is hashed just once and its sha256 state
+    (midstate) is copied for each nonce, so each nonce costs one small digest.
+
+    See Also
+    --------
+    `difficulty_to_target()`
+    `Block.header_prefix()`
+    """
+    midstate = sha256(header_prefix)
+    pack_nonce = NONCE_STRUCT.pack
+    for nonce in range(start, end):
+        header_hash = midstate.copy()
+        header_hash.update(pack_nonce(nonce))
+        if header_hash.digest() <= target:
+            return nonce
+    return None
 
 
 class BlockValidationLevel(Flag):
@@ -49,6 +136,8 @@ class Block:
     ----------
         - Block Header
 
+        version: int
+            The version of the block header format.
         previous_hash: str
             Hash of previous block in blockchain.
         nonce: int
@@ -57,14 +146,17 @@ class Block:
             Hash string of this block (in hex).
         time: float
             Time that this block mined in POSIX timestamp format.
+        bits: int
+            The difficulty of the block in the compact format.
         is_mined: bool = False
             If it is True, it means block is mined.
         block_height: int
             Determines this block is the nth block that has been mined.
         trx_hashes: list[str]
             List of all trx hash
-        merkle_tree: MerkleTree = None
-            A object of MerkleTree class of root from list of trx hashes.
+        merkle_tree: IncrementalMerkleTree | MerkleTreeNode = None
+            A Merkle tree of the list of trx hashes to get its root. The blocks which
+            are made from their header data just have a root node.
 
         - Addition in Full Block
 
@@ -74,14 +166,16 @@ class Block:
 
     def __init__(self, previous_hash: str, block_height: int, subsidy: Optional[Trx] = None):
         """initialize previous_hash, block_height and subsidy(optional)"""
+        self.version = BLOCK_VERSION
         self.previous_hash = previous_hash
         self.block_height = block_height
         self.nonce = 0
         self.time = datetime.utcnow().timestamp()  # TODO: get from args
+        self.bits = difficulty_to_bits(conf.settings.glob.difficulty)
         # make subsidy trx (a trx that give itself reward for mine block)
         if subsidy is not None:
             self.transactions = [subsidy]
-            self.merkle_tree = self.build_merkle_tree()
+            self.build_merkle_tree()
             self.has_subsidy = True
         else:
             self.transactions = []
@@ -91,17 +185,17 @@ class Block:
     def add_trx(self, trx: Trx) -> None:
         """Adds new trx without checking it. Also sets the trx hashes coin object."""
         self.transactions.append(trx)
-        # TODO: implement add function in merkle tree
-        # recalculate merkle tree root hash and trx hash
-        self.build_merkle_tree()
+        # update merkle tree root hash and trx hash
+        if (isinstance(self.merkle_tree, IncrementalMerkleTree)
+                and self.merkle_tree.size == len(self.transactions) - 1):
+            self.merkle_tree.append(trx.__hash__)
+        else:
+            self.build_merkle_tree()
         self.calculate_hash()
-        # Sets input to spent coin
-        for i, coin in enumerate(trx.inputs or []):
-            coin.spend(trx.__hash__, i)
-        # Set created_trx_hash of output coins.
-        for i, coin in enumerate(trx.outputs or []):
-            coin.created_trx_hash = trx.__hash__
-            coin.out_index = i
+        # Sets input to spent coin and created_trx_hash of output coins. The coins of a
+        # frozen trx (like from mempool) have been set before
+        if not trx.is_frozen:
+            trx.set_hash_coins()
 
     def get_list_hashes_trx(self) -> list[str]:
         """Gets the list of all transactions hash"""
@@ -109,82 +203,127 @@ class Block:
 
     def build_merkle_tree(self) -> None:
         """Sets and builds merkle tree from list of block trx"""
-        self.merkle_tree = MerkleTreeNode.build_merkle_tree(
-            self.get_list_hashes_trx())
+        self.merkle_tree = IncrementalMerkleTree(self.get_list_hashes_trx())
 
     def set_mined(self) -> None:
         """Sets this block has been mined and sets block time now"""
         self.time = datetime.utcnow().timestamp()
         self.is_mined = True
 
-    def check_trx(self, unspent_coins: ALL_COINS_TYPE) -> bool:
-        """Checks the all block transactions.
+    def check_trx(self, unspent_coins: CoinsView) -> bool:
+        """Checks the all block transactions in order and verifies the signatures of them
+        (except the generic one) together in a batch. Every transaction that is not generic
+        should be signed by the owner of its input coins. The signatures that have been
+        verified before (like in the mempool) are not verified again.
 
         See Also
         -------
         `trx.check()`
+        `SignatureCache.verify_batch()`
         """
         # TODO: return validation
+        # the transactions are checked in order in a view, so a transaction could spend
+        # the outputs of a previous one in the block but not a coin that is spent before
+        view = unspent_coins.view()
+        signed = []
         for trx in self.transactions:
-            if not trx.check(unspent_coins):
+            if not trx.check(view):
                 return False
-        return True
+            if not trx.is_generic:
+                if trx.signature is None or not trx.is_owned_by(trx.public_key):
+                    return False
+                signed.append((trx.__hash__, trx.signature, trx.public_key))
+            for coin in trx.inputs or []:
+                if view.spend(coin.created_trx_hash, coin.out_index) is None:
+                    return False
+            for coin in trx.outputs or []:
+                view.add_coin(coin)
+        return signature_cache.verify_batch(signed)
+
+    def update_outputs(self, unspent_coins: CoinsView) -> BlockUndo:
+        """Spends the input coins and adds the output coins of block transactions
+        to the unspent coins (inplace)
 
-    def update_outputs(self, unspent_coins: ALL_COINS_TYPE) -> None:
-        """update "database"(TODO) of output coins that are unspent"""
-        # TODO: Not do operation inplace
+        Return
+        ------
+        BlockUndo
+            The changes of unspent coins to disconnect this block by `revert_outputs`
+        """
+        undo = BlockUndo()
         for trx in self.transactions:
-            in_coins = trx.inputs or []
-            out_coins = trx.outputs or []
-            for coin in in_coins:
-                # check input coin and if is valid, delete from unspent coins
-                if coin.check_input_coin(unspent_coins):
-                    my_unspent: List[Coin | None] = unspent_coins[coin.created_trx_hash]
-                    my_unspent[coin.out_index] = None  # TODO: Fix typing
-                    if not any(my_unspent):
-                        # delete input coin from unspent_coins coins
-                        unspent_coins.pop(coin.created_trx_hash)
-                else:
-                    pass  # TODO
-
-            # add output coins to unspent coins
-            for coin in out_coins:
-                trx_hash = coin.created_trx_hash
-                unspent_coins[trx_hash] = deepcopy(out_coins)
-
-    def revert_outputs(self, unspent_coins: ALL_COINS_TYPE):
-        """Gets the unspent coins and reverse it inplace by this block transaction"""
+            for coin in trx.inputs or []:
+                # TODO: handle the input coins that are not unspent
+                unspent_coins.spend(coin.created_trx_hash, coin.out_index, undo)
+            for coin in trx.outputs or []:
+                unspent_coins.add_coin(coin, undo)
+        return undo
+
+    def revert_outputs(self, unspent_coins: CoinsView, undo: Optional[BlockUndo] = None):
+        """Gets the unspent coins and reverse it inplace by this block transaction
+
+        Parameters
+        ----------
+        unspent_coins: CoinsView
+            The unspent coins after this block
+        undo: Optional[BlockUndo] = None
+            The returned undo of `update_outputs` for this block. If it's passed None,
+            the input coins of transactions are added again that is not exact for the
+            coins that have been replaced.
+        """
         # TODO: Relocated this method. here is a bad place for it.
-        for trx in self.transactions:
-            in_coins = trx.inputs or []
-            out_coins = trx.outputs or []
-            # add input coins to unspent coins
-            for coin in out_coins:
-                trx_hash = coin.created_trx_hash
-                unspent_coins[trx_hash] = deepcopy(out_coins)
-
-            for coin in in_coins:
-                my_unspent = unspent_coins[coin.created_trx_hash]
-                my_unspent[coin.out_index] = None
-                if not any(my_unspent):
-                    # delete output coin from unspent_coins coins
-                    unspent_coins.pop(coin.created_trx_hash)
+        if undo is not None:
+            unspent_coins.disconnect(undo)
+            return
+        for trx in reversed(self.transactions):
+            # remove output coins from unspent coins
+            for coin in trx.outputs or []:
+                unspent_coins.spend(coin.created_trx_hash, coin.out_index)
+            # add input coins to unspent coins again
+            for coin in trx.inputs or []:
+                unspent_coins.add_coin(coin)
 
     def set_nonce(self, nonce: int):
         self.nonce = nonce
 
-    def calculate_hash(self) -> str:
+    def set_difficulty(self, difficulty: int):
+        """Sets the difficulty bits of the block header"""
+        self.bits = difficulty_to_bits(difficulty)
+
+    @property
+    def difficulty(self) -> int:
+        """The difficulty that is decoded from the bits of block header"""
+        return bits_to_difficulty(self.bits)
+
+    def serialize_header(self) -> bytes:
+        """Serializes the block header in its fixed width binary format. It is used for
+        hashing, storing and sending the header.
+
+        See Also
+        --------
+        `HEADER_STRUCT`
+        """
         if self.merkle_tree is None:
             self.build_merkle_tree()
         assert self.merkle_tree
-        data = self.merkle_tree.hash + str(self.nonce) + self.previous_hash + str(self.time)
-        calculated_hash = sha256((data).encode()).hexdigest()
+        return HEADER_STRUCT.pack(self.version,
+                                  hash_to_bytes(self.previous_hash),
+                                  hash_to_bytes(self.merkle_tree.hash),
+                                  self.time,
+                                  self.bits,
+                                  self.nonce)
+
+    def header_prefix(self) -> bytes:
+        """Gets the fixed part of the block header that is hashed before the nonce"""
+        return self.serialize_header()[:NONCE_OFFSET]
+
+    def calculate_hash(self) -> str:
+        calculated_hash = sha256(self.serialize_header()).hexdigest()
         self.block_hash = calculated_hash
         return calculated_hash
 
     def is_valid_block(
         self,
-        unspent_coins: Optional[ALL_COINS_TYPE] = None,
+        unspent_coins: Optional[CoinsView] = None,
         pre_hash: str = "",
         difficulty: Optional[int] = None  # almost for unittest
     ) -> BlockValidationLevel:
@@ -192,7 +331,7 @@ class Block:
 
         Parameters
         ---------
-        unspent_coins: Optional[Dict[str, List[Coin]]] = None
+        unspent_coins: Optional[CoinsView] = None
             The coins that have not been spent yet. It's used to check the validation
             block (transactions).
         pre_hash: str = ""
@@ -220,15 +359,6 @@ class Block:
             valid = valid | BlockValidationLevel.PREVIOUS_HASH
         return valid
 
-    def search(self, key_hash) -> Optional[int]:
-        """Searches from last block to first for finding the block which
-        its hash is key_hash
-        """
-        for i in range(len(self.blocks)-1, -1, -1):
-            if self.blocks[i].__hash__ == key_hash:
-                return i
-        return None
-
     def get_data(self, is_full_block=True, is_POSIX_timestamp=True) -> dict[str, Any]:
         """gets data of this block that has:
 
@@ -241,6 +371,9 @@ class Block:
             - trx_hashes: List[str]
             - previous_hash: str
             - time: int | str
+            - version: int
+            - bits: int
+            - raw_header: str
 
             other:
             - trx: List[Dict[str, any]]
@@ -266,7 +399,11 @@ class Block:
             "merkle_root": self.merkle_tree.hash if self.merkle_tree else None,
             "trx_hashes": self.get_list_hashes_trx(),
             "previous_hash": self.previous_hash,
-            "time": self.time if is_POSIX_timestamp else datetime.fromtimestamp(self.time).__str__()
+            "time": (self.time if is_POSIX_timestamp
+                     else datetime.fromtimestamp(self.time).__str__()),
+            "version": self.version,
+            "bits": self.bits,
+            "raw_header": self.serialize_header().hex()
         }
         data = block_header
         if is_full_block:
@@ -283,6 +420,25 @@ class Block:
             data['size'] = getsizeof(data)
         return data
 
+    @staticmethod
+    def from_header_bytes(data: bytes, block_height: int) -> Block:
+        """Makes a Block object (without transactions) from a binary block header.
+        The height is not a part of the header so it should be passed.
+
+        See Also
+        --------
+        `Block.serialize_header()`
+        """
+        version, previous_hash, merkle_root, time, bits, nonce = HEADER_STRUCT.unpack(data)
+        new_block = Block(hash_from_bytes(previous_hash), block_height)
+        new_block.version = version
+        new_block.merkle_tree = MerkleTreeNode(hash_from_bytes(merkle_root))
+        new_block.time = time
+        new_block.bits = bits
+        new_block.nonce = nonce
+        new_block.block_hash = sha256(data).hexdigest()
+        return new_block
+
     @staticmethod
     def from_json_data_header(data: dict[str, Any], is_POSIX_timestamp=True) -> Block:
         """gets a block data header like `get_block` function and then
@@ -292,6 +448,9 @@ class Block:
         --------
         `Block.get_date()`: The function create data like inputs.
         """
+        raw_header = data.get('raw_header', None)
+        if raw_header is not None:
+            return Block.from_header_bytes(bytes.fromhex(raw_header), data['height'])
         new_block = Block(data['previous_hash'], data['height'])
         new_block.block_hash = data['hash']
         new_block.nonce = data['nonce']
@@ -322,11 +481,11 @@ class Block:
                 # TODO: It should be in Coin class
                 inputs.append(
                     Coin(in_coin['owner'],
-                         in_coin['in_index'],
+                         in_coin['out_index'],
                          in_coin['created_trx_hash'],
                          in_coin['value'],
                          in_coin['trx_hash'],
-                         in_coin['out_index']))
+                         in_coin['in_index']))
             outputs = []
             for coin_idx, out_coin in enumerate(each_trx['outputs']):
                 outputs.append(
@@ -334,7 +493,10 @@ class Block:
                          coin_idx,
                          out_coin['created_trx_hash'],
                          out_coin['value']))
-            trxList_.append(Trx(new_block.block_height, "", inputs, outputs, each_trx['time']))
+            trxList_.append(Trx(new_block.block_height,
+                                each_trx.get('public_key', ""),
+                                inputs, outputs, each_trx['time'],
+                                Trx.signature_from_data(each_trx)))
         new_block.transactions = trxList_
         return new_block
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from copy import copy, deepcopy
+from copy import deepcopy
 from sys import getsizeof
 from typing import (
     Any,
@@ -11,26 +11,39 @@ from typing import (
 )
 
 import pbcoin.config as conf
-import pbcoin.core as core
 from pbcoin.block import Block, BlockValidationLevel
+from pbcoin.constants import MAX_BLOCK_SIZE
 from pbcoin.db import DB
 from pbcoin.mempool import Mempool
-from pbcoin.trx import ALL_COINS_TYPE, Coin, Trx
+from pbcoin.trx import Trx
+from pbcoin.utxo import BlockUndo, CoinsView
 
 
 class BlockChain:
     """An in-memory blocks data"""
-    def __init__(self, blocks: List[Block] = [], full_node: bool = True):
+    def __init__(self, blocks: Optional[List[Block]] = None, full_node: bool = True):
         """
         Parameters
         ----------
-        blocks: List[Block] = []
+        blocks: Optional[List[Block]] = None
             The list of block if exist
         full_node: bool = True
             If this is True keep all the blocks in memory or database.
             Otherwise delete further blocks.
         """
-        self.blocks = blocks
+        self.blocks: List[Block] = []
+        # the index of blocks hash to their position from the first block that has been
+        # in the blockchain (even the pruned blocks)
+        self._index: Dict[str, int] = dict()
+        # the number of blocks which have been pruned from the first of blockchain
+        self._n_pruned = 0
+        # the index of transactions hash to the hash of their block (just the blocks that
+        # are kept, so it's bounded like the blocks)
+        self._trx_index: Dict[str, str] = dict()
+        for block in blocks or []:
+            self._append_block(block)
+        # the undo data of connected blocks to disconnect them
+        self.undo_data: Dict[str, BlockUndo] = dict()
         self.is_full_node = full_node
         if not self.is_full_node:
             # how much keep blocks data in memory for non full nodes. its value is in kb.
@@ -38,24 +51,27 @@ class BlockChain:
 
     def setup_new_block(self, subsidy: Trx, mempool: Mempool):
         """Setup a new block in chain for mine.
-        Adds subsidy and transactions from mempool to the block.
+        Adds subsidy and the best transactions (by fee rate) from mempool up to
+        MAX_BLOCK_SIZE bytes to the block.
         """
         # TODO: checking from other nodes if this node is not a full node
         previous_hash = self.last_block_hash
         height = self.height + 1
         block = Block(previous_hash, height, subsidy=subsidy)
-        # add remain transactions in mempool to next block
-        for trx in mempool:
+        # add the best transactions in mempool to next block
+        for trx in mempool.select_transactions(max_bytes=MAX_BLOCK_SIZE - subsidy.size,
+                                               max_count=mempool.max_limit_trx):
             block.add_trx(trx)
         return block
 
     def add_new_block(
         self,
         block: Block,
-        unspent_coins: Optional[ALL_COINS_TYPE]=None,
+        unspent_coins: Optional[CoinsView] = None,
         ignore_validation=False,
         difficulty: Optional[int] = None,  # almost just for unittest
-        db: Optional[DB] = None
+        db: Optional[DB] = None,
+        mempool: Optional[Mempool] = None
     ) -> BlockValidationLevel:
         """ Add a block to the blockchain.
 
@@ -63,7 +79,7 @@ class BlockChain:
         ----------
         block: Block
             The block that you want to be added.
-        unspent_coins: Optional[Dict[str, Coin]] = None
+        unspent_coins: Optional[CoinsView] = None
             The coins that have not been spent yet. It's used to check the validation
             block (transactions) and update that. If it's passed None, it gets that from
             `core.py` file.
@@ -79,6 +95,9 @@ class BlockChain:
             The database object is to update that and add the new block into it.
             If it's passed None, it gets that from `core.py` file.
             And if fetch_db is passed False, it would not matters db.
+        mempool: Optional[Mempool] = None
+            If it's passed, the transactions of the added block and their conflicts are
+            removed from it.
 
         Return
         ------
@@ -95,33 +114,94 @@ class BlockChain:
         else:
             validation = BlockValidationLevel.ALL()
         if validation == BlockValidationLevel.ALL():
-            self.blocks.append(deepcopy(block))
-            if self.last_block and unspent_coins is not None:
-                self.last_block.update_outputs(unspent_coins)
+            self.connect_block(deepcopy(block), unspent_coins)
+            if mempool is not None:
+                mempool.block_connected(block, unspent_coins)
             if db:
                 self.fetch_db(db)
         # check that blockchain in memory is less than cache size
         if (not self.is_full_node) and (self.__sizeof__() >= self.cache):
-            self.blocks.pop(0)
+            self._prune_first_block()
         return validation
 
+    def _append_block(self, block: Block) -> None:
+        self._index[block.__hash__] = self._n_pruned + len(self.blocks)
+        self.blocks.append(block)
+        for trx in block.transactions:
+            self._trx_index[trx.__hash__] = block.__hash__
+
+    def _pop_block(self) -> Block:
+        block = self.blocks.pop()
+        self._index.pop(block.__hash__, None)
+        self.undo_data.pop(block.__hash__, None)
+        for trx in block.transactions:
+            if self._trx_index.get(trx.__hash__) == block.__hash__:
+                self._trx_index.pop(trx.__hash__)
+        return block
+
+    def _prune_first_block(self) -> None:
+        block = self.blocks.pop(0)
+        self._index.pop(block.__hash__, None)
+        self.undo_data.pop(block.__hash__, None)
+        for trx in block.transactions:
+            if self._trx_index.get(trx.__hash__) == block.__hash__:
+                self._trx_index.pop(trx.__hash__)
+        self._n_pruned += 1
+
+    def connect_block(self, block: Block, unspent_coins: Optional[CoinsView] = None) -> None:
+        """Appends the block to the end of blockchain without checking it and updates
+        the unspent coins and keeps its undo data if unspent_coins is passed."""
+        if unspent_coins is not None:
+            # the block is connected in a view, so the unspent coins are changed at once
+            view = unspent_coins.view()
+            undo = block.update_outputs(view)
+            view.flush()
+            self.undo_data[block.__hash__] = undo
+        self._append_block(block)
+
+    def disconnect_block(self, unspent_coins: CoinsView) -> Block:
+        """Removes the last block of blockchain and reverts its changes in the
+        unspent coins by its undo data.
+
+        Return
+        ------
+        Block
+            The removed block
+        """
+        undo = self.undo_data.get(self.blocks[-1].__hash__)
+        block = self._pop_block()
+        view = unspent_coins.view()
+        block.revert_outputs(view, undo)
+        view.flush()
+        return block
+
     def resolve(
         self,
         new_blocks: List[Block],
-        unspent_coins: ALL_COINS_TYPE,
-        difficulty: Optional[int] = None  # almost for unittest
+        unspent_coins: CoinsView,
+        difficulty: Optional[int] = None,  # almost for unittest
+        mempool: Optional[Mempool] = None
     ) -> Tuple[bool, Optional[int], BlockValidationLevel]:
         """Resolves this blockchain with the new blocks.
 
+        The blocks of this blockchain after the fork point are disconnected and the new
+        blocks are checked and connected in a view on the unspent coins. The view is
+        flushed to unspent coins if all new blocks are valid. Otherwise, it is thrown
+        away and nothing is changed.
+
         Parameters
         ----------
         new_blocks: List[Blocks]
             List of the new blocks to resolve and for adding to this blockchain
-        unspent_coins: Dict[str, List[Coin]]
+        unspent_coins: CoinsView
             The coins that have not been spent yet for update after resolve.
         difficulty: Optional[int] = None
             The block difficulty that should be for checking block validation.
             If it's passed None, it gets that from configs.
+        mempool: Optional[Mempool] = None
+            If it's passed, the transactions of the connected blocks and their conflicts
+            are removed from it and then the transactions of the disconnected blocks are
+            added back to it.
 
         Returns
         -------
@@ -131,25 +211,35 @@ class BlockChain:
         """
         if difficulty is None:
             difficulty = conf.settings.glob.difficulty
-        copy_unspent_coins = copy(unspent_coins)
-        result = BlockChain.check_blockchain(
-            new_blocks, copy_unspent_coins, difficulty)
-        # if there is no bad  block validation
-        if not result[0]:
-            return result
         self_blockchain_index, new_blockchain_index = self.find_different(new_blocks)
-        for i in range(self_blockchain_index):
-            self.blocks[-i].revert_outputs(copy_unspent_coins)
-            self.blocks.pop()
-        for trx_hash in copy_unspent_coins:
-            unspent_coins[trx_hash] = copy_unspent_coins[trx_hash]
-        for i in range(new_blockchain_index, 0, -1):
-            new_blocks[len(new_blocks) - i].update_outputs(unspent_coins)
-            self.blocks.append(new_blocks[len(new_blocks) - i])
+        # just the blocks after the fork point are disconnected and connected
+        fork_index = len(new_blocks) - new_blockchain_index
+        pre_hash = new_blocks[fork_index - 1].__hash__ if fork_index > 0 else ""
+        with unspent_coins.lock:
+            view = unspent_coins.view()
+            old_blocks = self.blocks[len(self.blocks) - self_blockchain_index:]
+            for block in reversed(old_blocks):
+                block.revert_outputs(view, self.undo_data.get(block.__hash__))
+            result, undo_list = BlockChain._connect_blocks(
+                new_blocks[fork_index:], view, difficulty, pre_hash)
+            # if there is no bad  block validation
+            if not result[0]:
+                return False, fork_index + result[1], result[2]
+            view.flush()
+        for _ in range(self_blockchain_index):
+            self._pop_block()
+        for block, undo in zip(new_blocks[fork_index:], undo_list):
+            self._append_block(block)
+            self.undo_data[block.__hash__] = undo
+        if mempool is not None:
+            for block in new_blocks[fork_index:]:
+                mempool.block_connected(block, unspent_coins)
+            for block in old_blocks:
+                mempool.block_disconnected(block, unspent_coins)
         # TODO: add fetch db here too
         # check that blockchain in memory is less than cache size
         while (not self.is_full_node) and (self.__sizeof__() >= self.cache):
-            self.blocks.pop(0)
+            self._prune_first_block()
         return (True, None, BlockValidationLevel.ALL())
 
     def find_different(self, new_blocks: List[Block]) -> Tuple[int, int]:
@@ -167,11 +257,10 @@ class BlockChain:
             begins difference. And second int is the first index of the new blocks from
             the last its blocks where begins difference.
         """
-        # TODO: work with block height
-        for index1, block in enumerate(reversed(self.blocks)):
-            for index2, new_block in enumerate(reversed(new_blocks)):
-                if block.__hash__ == new_block.__hash__:
-                    return index1, index2
+        for index2, new_block in enumerate(reversed(new_blocks)):
+            index1 = self.search(new_block.__hash__)
+            if index1 is not None:
+                return len(self.blocks) - 1 - index1, index2
         return len(self.blocks), len(new_blocks)
 
     def get_last_blocks(self, number=1) -> Optional[List[Block]]:
@@ -182,14 +271,68 @@ class BlockChain:
         return self.blocks[-number:]
 
     def search(self, key_hash: str) -> Optional[int]:
-        """search from last block to first to find block with this key_hash
-        and return its index (height)
+        """finds the block with this key_hash by the blocks hash index and return its
+        index in self.blocks or None if does not exist
         """
-        for i in range(len(self.blocks)-1, -1, -1):
-            if self.blocks[i].__hash__ == key_hash:
-                return i
+        position = self._index.get(key_hash)
+        if position is None:
+            return None
+        index = position - self._n_pruned
+        # the blocks could have been changed from outside
+        if 0 <= index < len(self.blocks) and self.blocks[index].__hash__ == key_hash:
+            return index
         return None
 
+    def has_trx(self, trx_hash: str) -> bool:
+        """Checks the transaction has been confirmed in a block of the blockchain or not.
+        The transactions of pruned blocks are not known."""
+        return trx_hash in self._trx_index
+
+    def has_block(self, key_hash: str) -> bool:
+        """Checks the block with this key_hash is in the blockchain or not"""
+        return self.search(key_hash) is not None
+
+    def get_locator(self) -> List[str]:
+        """Returns a block locator that is a list of blocks hash from the last block to
+        the first one. The first 10 hashes are the last blocks and then the steps
+        between them are doubled, so it has O(log n) hashes.
+
+        See Also
+        --------
+        `BlockChain.find_fork()`
+        """
+        locator = []
+        step = 1
+        index = len(self.blocks) - 1
+        while index > 0:
+            locator.append(self.blocks[index].__hash__)
+            if len(locator) >= 10:
+                step *= 2
+            index -= step
+        if len(self.blocks) != 0:
+            locator.append(self.blocks[0].__hash__)
+        return locator
+
+    def find_fork(self, locator: List[str]) -> int:
+        """Finds the last common block with a blockchain from its locator.
+
+        Parameters
+        ----------
+        locator: List[str]
+            The block locator of the other blockchain. (`BlockChain.get_locator()`)
+
+        Return
+        ------
+        int
+            The index of the common block in self.blocks or -1 if there is not any
+            common block.
+        """
+        for key_hash in locator:
+            index = self.search(key_hash)
+            if index is not None:
+                return index
+        return -1
+
     def get_data(self, first_index=0, last_index: Optional[int] = None) -> List[Dict[str, Any]]:
         """get block data from first_index to last_index.
         (last_index = None means to end of blockchain)"""
@@ -242,20 +385,26 @@ class BlockChain:
     @staticmethod
     def check_blockchain(
         blocks: List[Block],
-        unspent_coins: ALL_COINS_TYPE,
-        difficulty: Optional[int] = None  # almost just for unittest
+        unspent_coins: CoinsView,
+        difficulty: Optional[int] = None,  # almost just for unittest
+        pre_hash: str = ""
     ) -> Tuple[bool, Optional[int], BlockValidationLevel]:
         """Check the validation of blocks.
 
+        Each block is checked with the coins of the previous blocks in a view on the
+        unspent coins that is thrown away, so the unspent coins do not change.
+
         Parameters
         ----------
         blocks: List[Blocks]
             List of the blocks want to be checked.
-        unspent_coins: Dict[str, List[Coin]]
+        unspent_coins: CoinsView
             The coins that have not been spent yet for checking blocks transactions.
         difficulty: Optional[int] = None
             The block difficulty that should be for checking block validation.
             If it's passed None, it gets that from configs.
+        pre_hash: str = ""
+            The hash of the block before the first block.
 
         Returns
         -------
@@ -267,16 +416,30 @@ class BlockChain:
         """
         if difficulty is None:
             difficulty = conf.settings.glob.difficulty
+        result, _ = BlockChain._connect_blocks(
+            blocks, unspent_coins.view(), difficulty, pre_hash)
+        return result
+
+    @staticmethod
+    def _connect_blocks(
+        blocks: List[Block],
+        view: CoinsView,
+        difficulty: int,
+        pre_hash: str = ""
+    ) -> Tuple[Tuple[bool, Optional[int], BlockValidationLevel], List[BlockUndo]]:
+        """Checks and connects blocks one by one in the view until a bad block and
+        returns the result like `check_blockchain` and undo data of connected blocks"""
+        undo_list = []
         for index, block in enumerate(blocks):
-            pre_hash = ""
             if index != 0:
                 pre_hash = blocks[index - 1].__hash__
-            validation = block.is_valid_block(unspent_coins,
+            validation = block.is_valid_block(view,
                                               pre_hash=pre_hash,
                                               difficulty=difficulty)
             if validation != BlockValidationLevel.ALL():
-                return False, index, validation
-        return True, None, BlockValidationLevel.ALL()
+                return (False, index, validation), undo_list
+            undo_list.append(block.update_outputs(view))
+        return (True, None, BlockValidationLevel.ALL()), undo_list
 
     @staticmethod
     def json_to_blockchain(blockchain_data: List[Dict[str, Any]]) -> BlockChain:
@@ -284,10 +447,10 @@ class BlockChain:
         blockchain = [Block.from_json_data_full(block) for block in blockchain_data]
         return BlockChain(blockchain)
 
-    def update_coins_outputs(self, all_output: ALL_COINS_TYPE):
+    def update_coins_outputs(self, all_output: CoinsView):
         # TODO: THIS IS NOT EFFICIENT WAY
         for block in self.blocks:
-            block.update_outputs(all_output)
+            self.undo_data[block.__hash__] = block.update_outputs(all_output)
 
 
     @property
@@ -143,9 +143,9 @@ class CliServer():
                         errors |= CliErrorCode.NOT_FOUND
                 else:
                     index_block = self.pbcoin.blockchain.search(args[0])
-                    if index_block:
+                    if index_block is not None:
                         b = self.pbcoin.blockchain.blocks[index_block]
-                        block_data = b.getData(is_POSIX_timestamp=False)
+                        block_data = b.get_data(is_POSIX_timestamp=False)
                         result += json.dumps(block_data)
                     else:
                         errors |= CliErrorCode.NOT_FOUND
@@ -153,7 +153,11 @@ class CliServer():
                 errors |= CliErrorCode.BAD_USAGE
                 traceback.print_exc()
         elif command == CliCommandCode.MEMPOOL:
-            result += str(self.pbcoin.miner.mempool if self.pbcoin.miner else None)
+            if self.pbcoin.miner:
+                mempool = self.pbcoin.miner.mempool
+                result += json.dumps(mempool.stats) + "\n" + str(mempool)
+            else:
+                result += str(None)
         elif command == CliCommandCode.NEIGHBORS:
             result += str(self.pbcoin.network.neighbors.values())
         elif command == CliCommandCode.MINING:
@@ -6,6 +6,7 @@ from typing import (
     Any,
     Dict,
     List,
+    Optional,
     Union
 )
 
@@ -20,6 +21,18 @@ class GlobalCfg:
     full_node: bool = False  # Set full node or not
     difficulty: int = DIFFICULTY
     network: bool = True  # networks(socket+cli) api is run or not
+    mining_workers: int = MINING_WORKERS  # number of processes for searching nonces
+    g_table_path: Optional[str] = G_TABLE_PATH  # disk cache of the table of G
+    signature_cache_size: int = SIGNATURE_CACHE_SIZE  # number of cached verified signatures
+    public_key_cache_size: int = PUBLIC_KEY_CACHE_SIZE  # number of cached parsed public keys
+    verify_workers: int = VERIFY_WORKERS  # number of processes for verifying signatures
+    verify_queue_size: int = VERIFY_QUEUE_SIZE  # max number of running verifications
+    mempool_max_size: int = MEMPOOL_MAX_SIZE  # max memory of mempool in bytes
+    mempool_max_transactions: int = MEMPOOL_MAX_TRANSACTIONS  # max number of mempool trx
+    mempool_expiry: int = MEMPOOL_EXPIRY  # seconds that a trx is kept in mempool
+    mempool_max_orphans: int = MEMPOOL_MAX_ORPHANS  # max number of orphan trx
+    mempool_path: Optional[str] = MEMPOOL_PATH  # file that mempool is saved in
+    mempool_save_interval: int = MEMPOOL_SAVE_INTERVAL  # seconds between saving mempool
 
     @classmethod
     def update(cls, option: Dict[str, Union[bool, int]]):
@@ -29,6 +42,19 @@ class GlobalCfg:
         cls.mining = option.get("mining", True)
         cls.network = option.get("network", True)
         cls.difficulty = option.get("difficulty", DIFFICULTY)
+        cls.mining_workers = option.get("mining_workers", MINING_WORKERS)
+        cls.g_table_path = option.get("g_table_path", G_TABLE_PATH)
+        cls.signature_cache_size = option.get("signature_cache_size", SIGNATURE_CACHE_SIZE)
+        cls.public_key_cache_size = option.get("public_key_cache_size", PUBLIC_KEY_CACHE_SIZE)
+        cls.verify_workers = option.get("verify_workers", VERIFY_WORKERS)
+        cls.verify_queue_size = option.get("verify_queue_size", VERIFY_QUEUE_SIZE)
+        cls.mempool_max_size = option.get("mempool_max_size", MEMPOOL_MAX_SIZE)
+        cls.mempool_max_transactions = option.get("mempool_max_transactions",
+                                                  MEMPOOL_MAX_TRANSACTIONS)
+        cls.mempool_expiry = option.get("mempool_expiry", MEMPOOL_EXPIRY)
+        cls.mempool_max_orphans = option.get("mempool_max_orphans", MEMPOOL_MAX_ORPHANS)
+        cls.mempool_path = option.get("mempool_path", MEMPOOL_PATH)
+        cls.mempool_save_interval = option.get("mempool_save_interval", MEMPOOL_SAVE_INTERVAL)
         if cls.network:
             NetworkCfg.update(option)
         LoggerCfg.update(option)
@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import (
     Final,
     List,
+    Optional,
 )
 import warnings
 
@@ -46,10 +47,65 @@ FULL_NODE: bool = False
 #                     -----------------------------------
 DIFFICULTY: int = (2 ** 256 - 1) >> (21)
 
+# Version of the block header format
+BLOCK_VERSION: int = 1
+
 # TODO: could be better it isn't constant
 # the amount of miner prize for mine a block
 SUBSIDY = 50
 
+# The maximum size of transactions data of a block in bytes
+MAX_BLOCK_SIZE: int = 1_000_000
+
+# The maximum number of transactions that are picked from mempool for a block
+MAX_BLOCK_TRANSACTIONS: int = 1000
+
+# The maximum memory of mempool transactions in bytes. The transactions with the
+# lowest fee rate are evicted when it is full
+MEMPOOL_MAX_SIZE: int = 300_000_000
+
+# The maximum number of mempool transactions
+MEMPOOL_MAX_TRANSACTIONS: int = 100_000
+
+# The maximum number of the transactions that wait for their parents to be received
+MEMPOOL_MAX_ORPHANS: int = 100
+
+# How many seconds a transaction is kept in mempool before it expires (two weeks)
+MEMPOOL_EXPIRY: int = 14 * 24 * 60 * 60
+
+# The file that mempool is saved in to be loaded at the next start up. If it is
+# None, mempool is not saved
+MEMPOOL_PATH: Optional[str] = None
+
+# How many seconds between each saving of mempool (it is saved on shut down too)
+MEMPOOL_SAVE_INTERVAL: int = 10 * 60
+
+# How many processes search nonces in parallel. 1 means mining in the
+# mining thread itself without any worker process
+MINING_WORKERS: int = 1
+
+# How many nonces each mining worker tries in one round before the miner
+# checks for a new block or new transactions
+NONCE_RANGE_SIZE: int = 2 ** 16
+
+# The file that the precomputed table of the generator point G is cached in. If it
+# is None, the table is built in memory at the first signing on each start up
+G_TABLE_PATH: Optional[str] = None
+
+# How many verified signatures are kept to not be verified again when their
+# transactions arrive in blocks
+SIGNATURE_CACHE_SIZE: int = 50_000
+
+# How many processes verify the signatures of new transactions. 0 means verifying
+# in a thread of the network event loop without any worker process (it holds the GIL)
+VERIFY_WORKERS: int = 1
+
+# How many verification jobs could run at the same time. The others wait for them
+VERIFY_QUEUE_SIZE: int = 64
+
+# How many parsed public keys of senders (with their tables) are kept for verifying
+PUBLIC_KEY_CACHE_SIZE: int = 4096
+
 
 ############Network###############
 # networks(socket with other node + cli) api is run or not
@@ -11,13 +11,14 @@ from pbcoin.block import Block
 from pbcoin.db import DB
 from pbcoin.mempool import Mempool
 from pbcoin.cli_handler import CliServer
-from pbcoin.trx import ALL_COINS_TYPE
 from pbcoin.utils.netbase import Addr
+from pbcoin.utxo import UTXOSet
 from pbcoin.network import Node
 from pbcoin.process_handler import ProcessingHandler
 from pbcoin.wallet import Wallet
 from pbcoin.blockchain import BlockChain
 from pbcoin.mine import Mine
+from pbcoin.verifier import SignatureVerifier
 from pbcoin.logger import getLogger
 
 
@@ -35,15 +36,17 @@ class Pbcoin:
         network: Optional[Node] = None,
         mempool: Optional[Mempool] = None,
         database: Optional[DB] = None,
-        all_outputs: Optional[ALL_COINS_TYPE] = None
+        all_outputs: Optional[UTXOSet] = None,
+        verifier: Optional[SignatureVerifier] = None
     ) -> None:
         self.blockchain = blockchain
         self.miner = miner
         self.wallet = wallet
-        self.all_outputs = all_outputs if all_outputs is not None else ALL_COINS_TYPE(dict())
+        self.all_outputs = all_outputs if all_outputs is not None else UTXOSet()
         self.network = network
         self.mempool = mempool
         self.database = database
+        self.verifier = verifier if verifier is not None else SignatureVerifier()
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
@@ -53,10 +56,10 @@ class Pbcoin:
     @classmethod
     def initialize(cls) -> "Pbcoin":
         """Create the core objects"""
-        all_outputs: ALL_COINS_TYPE = ALL_COINS_TYPE(dict())
+        all_outputs = UTXOSet()
         wallet = Wallet(unspent_coins=all_outputs)
         blockchain = BlockChain([])
-        mempool = Mempool()
+        mempool = Mempool(blockchain=blockchain)
         miner = Mine(blockchain, wallet, mempool)
         # database = DB()
         # database.init()
@@ -94,35 +97,70 @@ class Pbcoin:
             self.blockchain.cache = conf.settings.glob.cache * 1000  # to bytes
             assert self.all_outputs is not None
             assert self.wallet
-            if how_many is None:
-                while True:
-                    try:
-                        await self.miner.mine(
-                            public_key=self.wallet.public_key,
-                            unspent_coins=self.all_outputs,
-                            node=self.network
-                        )
-                        # Block.update_outputs(deepcopy(self.miner.setup_block), self.all_outputs)
-                    except Exception as e:
-                        logging.critical("Error in mining", exc_info=e)
-            else:
-                for _ in range(how_many):
-                    await self.miner.mine(public_key=self.wallet.public_key, unspent_coins=self.all_outputs, node=self.network)
-                    # self.miner.setup_block.update_outputs(self.all_outputs)
-
+            self.miner.start_workers(conf.settings.glob.mining_workers)
+            try:
+                if how_many is None:
+                    while True:
+                        try:
+                            await self.miner.mine(
+                                public_key=self.wallet.public_key,
+                                unspent_coins=self.all_outputs,
+                                node=self.network
+                            )
+                            # Block.update_outputs(deepcopy(self.miner.setup_block), self.all_outputs)
+                        except Exception as e:
+                            logging.critical("Error in mining", exc_info=e)
+                else:
+                    for _ in range(how_many):
+                        await self.miner.mine(public_key=self.wallet.public_key, unspent_coins=self.all_outputs, node=self.network)
+                        # self.miner.setup_block.update_outputs(self.all_outputs)
+            finally:
+                self.miner.stop_workers()
+
+
+    def load_mempool(self) -> None:
+        """Loads the saved mempool (if `mempool_path` is set) against the current
+        unspent coins"""
+        path = conf.settings.glob.mempool_path
+        if path and self.mempool is not None:
+            n_trx = self.mempool.load(path, self.all_outputs)
+            logging.info(f"{n_trx} transactions were loaded in mempool from {path}")
+
+    def save_mempool(self) -> None:
+        """Saves the mempool (if `mempool_path` is set)"""
+        path = conf.settings.glob.mempool_path
+        if path and self.mempool is not None:
+            n_trx = self.mempool.dump(path)
+            logging.debug(f"{n_trx} transactions of mempool were saved in {path}")
+
+    async def save_mempool_periodically(self) -> None:
+        """(async) Saves the mempool every `mempool_save_interval` seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(conf.settings.glob.mempool_save_interval)
+            await loop.run_in_executor(None, self.save_mempool)
 
     async def setup_network(self, has_cli, has_socket_network):
         """Set up network for connect other nodes and cli"""
         if self.wallet:
             logging.info(f"your public key is generated: {self.wallet.public_key}")
         handlers = []
-        if has_socket_network and self.network:
-            await self.network.start_up(conf.settings.network.seeds, all_output=self.all_outputs)
-            handlers.append(self.network.listen())
-        if has_cli:
-            cli_server = CliServer(conf.settings.network.socket_path, self)
-            handlers.append(cli_server.start())
-        await asyncio.gather(*handlers)
+        self.verifier.start()
+        try:
+            if has_socket_network and self.network:
+                await self.network.start_up(conf.settings.network.seeds, all_output=self.all_outputs)
+                handlers.append(self.network.listen())
+            # the mempool is loaded after getting the blockchain from other nodes
+            self.load_mempool()
+            if conf.settings.glob.mempool_path:
+                handlers.append(self.save_mempool_periodically())
+            if has_cli:
+                cli_server = CliServer(conf.settings.network.socket_path, self)
+                handlers.append(cli_server.start())
+            await asyncio.gather(*handlers)
+        finally:
+            self.save_mempool()
+            self.verifier.stop()
 
 
     def run(self, raise_runtime_error=True, how_many_mine: Optional[int] = None, reset=True) -> None:
@@ -14,6 +14,10 @@ class DB:
     
     It uses to insert and query objects like ```Block```, ```Trx``` and ```Coin```.
     """
+    # the columns that have been added to the blocks table after its first version, so
+    # they're added to the old database files
+    BLOCKS_NEW_COLUMNS = {"version": "INTEGER", "bits": "BIGINT", "raw_header": "VARCHAR(176)"}
+
     def __init__(self,
                  db_path: Optional[str] = None,
                  blocks_table_name: Optional[str] = None,
@@ -31,6 +35,17 @@ class DB:
         if coins_table_name is None:
             coins_table_name = conf.settings.database.coins_table
         self.coins_table_name = coins_table_name
+        self.migrate()
+
+    def migrate(self):
+        """Adds the new columns to the tables of an old database file. The old blocks
+        have NULL for them."""
+        columns = self.db.columns(self.blocks_table_name)
+        if not columns:
+            return  # it has not been initialized yet
+        for name, type_ in self.BLOCKS_NEW_COLUMNS.items():
+            if name not in columns:
+                self.db.add_column(self.blocks_table_name, name, type_)
 
     def init(self, init_filename: Optional[str] = None):
         if init_filename is None:
@@ -90,7 +105,10 @@ class DB:
             "number_trx": int(q[3]),
             "merkle_root": q[4],
             "previous_hash": q[5],
-            "time": q[6]
+            "time": q[6],
+            "version": q[7],
+            "bits": q[8],
+            "raw_header": q[9]
         }
         # TODO: get by order index
         list_trx, hash_list_trx = self.get_trx(block_hash = hash_str)
@@ -114,7 +132,10 @@ class DB:
             "number_trx": int(q[3]),
             "merkle_root": q[4],
             "previous_hash": q[5],
-            "time": q[6]
+            "time": q[6],
+            "version": q[7],
+            "bits": q[8],
+            "raw_header": q[9]
         }
         return block_header
 
@@ -8,7 +8,10 @@ CREATE TABLE IF NOT EXISTS Blocks (
     number_trx BIGINT,
     merkle_root VARCHAR(64),
     previous_hash VARCHAR(64),
-    time DATETIME
+    time DATETIME,
+    version INTEGER,
+    bits BIGINT,
+    raw_header VARCHAR(176)
 );
 CREATE TABLE IF NOT EXISTS Trx (
     hash VARCHAR(64) NOT NULL PRIMARY KEY,
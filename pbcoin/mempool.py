@@ -1,51 +1,349 @@
 from __future__ import annotations
 
-from copy import deepcopy
-from typing import Dict, List, Optional, Tuple
+import heapq
+import json
+import sys
+import time
+from functools import wraps
+from itertools import count
+from os import replace
+from threading import RLock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
 
-from pbcoin.utils.address import Address
-from pbcoin.trx import Coin, Trx
+import pbcoin.config as conf
+from pbcoin.constants import MAX_BLOCK_SIZE, MAX_BLOCK_TRANSACTIONS
+from pbcoin.logger import getLogger
+from pbcoin.sigcache import signature_cache
+from pbcoin.trx import Trx
+from pbcoin.utxo import BlockUndo, CoinsView, OutPoint, UTXOEntry, UTXOSet
+if TYPE_CHECKING:
+    from pbcoin.block import Block
+    from pbcoin.blockchain import BlockChain
+
+
+logging = getLogger(__name__)
+
+# The version of the format of the saved mempool file
+MEMPOOL_FILE_VERSION = 1
+
+
+def _locked(method: Callable) -> Callable:
+    """Runs the method of mempool holding its lock"""
+    @wraps(method)
+    def wrapper(self: Mempool, *args: Any, **kwargs: Any) -> Any:
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _memory_usage(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Estimates the memory of an object and the objects in it in bytes"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_memory_usage(key, seen) + _memory_usage(value, seen)
+                    for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_memory_usage(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _memory_usage(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_memory_usage(getattr(obj, name, None), seen)
+                    for name in obj.__slots__)
+    return size
+
+
+class MempoolEntry:
+    """The data that mempool keeps with a transaction for its priority
+
+    Attributes
+    ----------
+    trx: Trx
+        The transaction.
+    fee: int
+        The input value minus the output value of the transaction.
+    size: int
+        The size of the transaction in bytes.
+    memory: int
+        The estimated memory that the transaction and this entry use in bytes.
+    time: float
+        The time that the transaction has been added to mempool.
+    """
+    __slots__ = ("trx", "fee", "size", "memory", "time")
+
+    def __init__(self, trx: Trx, time_: Optional[float] = None):
+        self.trx = trx
+        self.fee = trx.fee
+        self.size = trx.size
+        self.memory = _memory_usage(trx) + sys.getsizeof(self)
+        self.time = time.time() if time_ is None else time_
+
+    @property
+    def fee_rate(self) -> float:
+        """fee per byte"""
+        return self.fee / self.size
+
+
+class MempoolCoinsView(CoinsView):
+    """A read only view of the unspent coins and the output coins of the mempool
+    transactions, so a transaction could spend the outputs of an unconfirmed one.
+
+    The coins that are spent by the mempool transactions are not removed from it and
+    they are found by `Mempool.conflicts()`.
+    """
+    def __init__(self, mempool: Mempool, base: CoinsView):
+        self.mempool = mempool
+        self.base = base
+        self.lock = base.lock
+
+    def get(self, trx_hash: str, out_index: int) -> Optional[UTXOEntry]:
+        entry = self.base.get(trx_hash, out_index)
+        if entry is not None:
+            return entry
+        trx = self.mempool.transactions.get(trx_hash)
+        if trx is None or not 0 <= out_index < len(trx.outputs):
+            return None
+        coin = trx.outputs[out_index]
+        return UTXOEntry(coin.owner, coin.value)
+
+    def add(self,
+            trx_hash: str,
+            out_index: int,
+            owner: str,
+            value: int,
+            undo: Optional[BlockUndo] = None
+    ) -> None:
+        raise TypeError("the mempool coins view is read only")
+
+    def spend(self,
+              trx_hash: str,
+              out_index: int,
+              undo: Optional[BlockUndo] = None
+    ) -> Optional[UTXOEntry]:
+        raise TypeError("the mempool coins view is read only")
+
+    def has_outputs_of(self, trx_hash: str) -> bool:
+        return trx_hash in self.mempool.transactions or self.base.has_outputs_of(trx_hash)
 
 
 class Mempool:
     """ A mempool class to save and handle new transactions for mining in blocks.
 
+    The transactions are indexed by their fee rate (fee per byte) in a heap, so the
+    best transactions for a block are picked in O(k log n).
+
     Attributes
     ----------
     transactions: Dict[str, Trx]
         All transactions should be mined. The dict key is the transaction hash and the
         value is the transaction.
+    entries: Dict[str, MempoolEntry]
+        The fee and size of the transactions by their hash.
+    spent_outpoints: Dict[OutPoint, str]
+        The outpoints (created_trx_hash, out_index) of the coins that are spent by the
+        mempool transactions and the hash of the transaction that spends each one. Two
+        transactions that spend the same coin are not accepted.
+    orphans: Dict[str, Tuple[Trx, Tuple[int, int], str]]
+        The transactions (with their signatures and public keys) that spend the outputs
+        of transactions that have not been received yet. They are added to mempool
+        when their parents are added.
     in_mining_transactions: List[str]
         Those priority transactions that for putting in a mining block.
     max_limit_trx: int
         The capacity of in_mining_transactions. The number of transactions will be able to be
         provided and mined in a new block.
+    usage: int
+        The estimated memory of all transactions in bytes.
+    max_usage: int
+        The highest usage that mempool has reached.
+    evicted: int
+        The number of transactions that have been removed since mempool was full.
+    expired: int
+        The number of transactions that have been removed since they were too old.
+    blockchain: Optional[BlockChain]
+        The blockchain that is used to know the parents of a transaction have been
+        confirmed or not. If it's None, all parents that are not found are missing.
+    lock: RLock
+        The lock that the public methods hold for changing and selecting transactions,
+        because the mining thread and the network thread both use mempool.
     """
-    def __init__(self, max_limit_trx: Optional[int] = None):
+    def __init__(self,
+                 max_limit_trx: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 max_transactions: Optional[int] = None,
+                 expiry: Optional[float] = None,
+                 max_orphans: Optional[int] = None,
+                 blockchain: Optional[BlockChain] = None):
+        """
+        Parameters
+        ----------
+        max_limit_trx: Optional[int] = None
+            The capacity of in_mining_transactions. If it's None, MAX_BLOCK_TRANSACTIONS
+            is used.
+        max_size: Optional[int] = None
+            The maximum memory of the transactions in bytes. If it's None, it is read from
+            `mempool_max_size` of configs.
+        max_transactions: Optional[int] = None
+            The maximum number of the transactions. If it's None, it is read from
+            `mempool_max_transactions` of configs.
+        expiry: Optional[float] = None
+            The seconds that a transaction is kept in mempool. If it's None, it is read
+            from `mempool_expiry` of configs.
+        max_orphans: Optional[int] = None
+            The maximum number of the orphan transactions. If it's None, it is read from
+            `mempool_max_orphans` of configs.
+        blockchain: Optional[BlockChain] = None
+            The blockchain to know the confirmed transactions.
+        """
         if max_limit_trx is None:
-            self.max_limit_trx = 10  #TODO
+            self.max_limit_trx = MAX_BLOCK_TRANSACTIONS
         else:
             self.max_limit_trx = max_limit_trx
+        self._max_size = max_size
+        self._max_transactions = max_transactions
+        self._expiry = expiry
+        self._max_orphans = max_orphans
+        self.blockchain = blockchain
+        self.lock = RLock()
+        self.usage = 0
+        self.max_usage = 0
+        self.evicted = 0
+        self.expired = 0
         # all transactions that is exist in mempool (even in block that is mining)
         self.transactions: Dict[str, Trx] = dict()
+        self.entries: Dict[str, MempoolEntry] = dict()
+        self.spent_outpoints: Dict[OutPoint, str] = dict()
+        self.orphans: Dict[str, Tuple[Trx, Tuple[int, int], str]] = dict()
+        # the hash of missing parents to the hash of their orphans
+        self._orphans_by_parent: Dict[str, Set[str]] = dict()
         self.in_mining_transactions: List[str] = []
+        # max heap of (-fee rate, insertion order, trx hash). The removed transactions
+        # are not removed from it until they reach the top
+        self._heap: List[Tuple[float, int, str]] = []
+        # min heap of (fee rate, insertion order, trx hash) for eviction
+        self._evict_heap: List[Tuple[float, int, str]] = []
+        # min heap of (adding time, insertion order, trx hash) for expiry. An item whose
+        # time is not the time of its entry is an old one and it is skipped
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        self._counter = count()
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is None:
+            return conf.settings.glob.mempool_max_size
+        return self._max_size
+
+    @property
+    def max_transactions(self) -> int:
+        if self._max_transactions is None:
+            return conf.settings.glob.mempool_max_transactions
+        return self._max_transactions
+
+    @property
+    def expiry(self) -> float:
+        if self._expiry is None:
+            return conf.settings.glob.mempool_expiry
+        return self._expiry
+
+    @property
+    def max_orphans(self) -> int:
+        if self._max_orphans is None:
+            return conf.settings.glob.mempool_max_orphans
+        return self._max_orphans
+
+    @property
+    def size(self) -> int:
+        """The size of all transactions in bytes"""
+        return sum(entry.size for entry in self.entries.values())
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "transactions": len(self.transactions),
+            "size": self.size,
+            "usage": self.usage,
+            "max_usage": self.max_usage,
+            "max_size": self.max_size,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "orphans": len(self.orphans),
+        }
 
+    @_locked
     def add_in_mining(self):
-        """Pics some transactions up to max_limit_trx as priority transactions to be mined"""
-        if len(self.in_mining_transactions) >= self.max_limit_trx:
-            return
-        # TODO: add prior for transactions for add to queue
-        for trx in self.transactions:
-            if trx not in self.in_mining_transactions:
-                self.in_mining_transactions.append(trx)
+        """Pics the best transactions up to max_limit_trx as priority transactions to be mined"""
+        self.in_mining_transactions = [
+            trx.__hash__ for trx in self.select_transactions(max_count=self.max_limit_trx)
+        ]
+
+    @_locked
+    def select_transactions(self,
+                            max_bytes: int = MAX_BLOCK_SIZE,
+                            max_count: Optional[int] = None) -> List[Trx]:
+        """Returns the transactions with the highest fee rate that their total size is
+        not more than max_bytes (and their number is not more than max_count). The
+        transactions that do not fit in the remaining bytes are skipped.
+
+        A transaction that spends the outputs of other mempool transactions comes after
+        them. It waits for them to be picked and it's skipped if they are skipped.
+
+        It takes O(k log n) for k picked transactions from n transactions.
 
+        Parameters
+        ----------
+        max_bytes: int = MAX_BLOCK_SIZE
+            The maximum total size of transactions in bytes.
+        max_count: Optional[int] = None
+            The maximum number of transactions. If it's None, there is no limit.
+        """
+        if max_count is None:
+            max_count = len(self.entries)
+        selected: List[Trx] = []
+        selected_hashes: Set[str] = set()
+        popped: List[Tuple[float, int, str]] = []
+        # the children that wait for a parent by its hash and then are ready
+        waiting: Dict[str, List[Tuple[float, int, str]]] = dict()
+        ready: List[Tuple[float, int, str]] = []
+        remain = max_bytes
+        while len(selected) < max_count:
+            if ready and (not self._heap or ready[0] < self._heap[0]):
+                item = heapq.heappop(ready)
+            elif self._heap:
+                item = heapq.heappop(self._heap)
+                if item[2] not in self.entries:
+                    continue  # removed transaction
+                popped.append(item)
+            else:
+                break
+            entry = self.entries[item[2]]
+            missing = [parent for parent in self.parents(entry.trx)
+                       if parent not in selected_hashes]
+            if missing:
+                waiting.setdefault(missing[0], []).append(item)
+            elif entry.size <= remain:
+                selected.append(entry.trx)
+                selected_hashes.add(item[2])
+                remain -= entry.size
+                for child_item in waiting.pop(item[2], []):
+                    heapq.heappush(ready, child_item)
+        for item in popped:
+            heapq.heappush(self._heap, item)
+        return selected
+
+    @_locked
     def add_new_transaction(self, trx: Trx,
                             sig: Tuple[int, int],
                             public_key: str,
-                            unspent_coins: Dict[str, Coin]) -> bool:
+                            unspent_coins: UTXOSet) -> bool:
         """Adds a new transaction to the transaction queue to will be mined later in a
         block. First, it checks the transaction and signature then adds the transaction
         to mempool and then will update in_mining_transactions if it's necessary.
+        The verified signature is kept in `signature_cache` for when the transaction
+        arrives in a block.
 
         Args
         ----
@@ -55,7 +353,7 @@ class Mempool:
             Parameters of signature (r, s) from the transaction.
         pub_key: str
             Sender public key address in hex.
-        unspent_coins: Dict[str, Coin]
+        unspent_coins: UTXOSet
             The coins that have not been spent yet. It's used to check the validation
             transaction.
 
@@ -68,40 +366,489 @@ class Mempool:
         # checking it is not repetitious transaction
         if trx.__hash__ in self.transactions:
             return False
-        # checking its sign to be verified
-        if not Address.verify(trx.__hash__, sig, public_key, from_b64=True):
+        # checking it does not spend a coin that another transaction spends
+        if self.conflicts(trx):
             return False
-        # check double spent and other things
-        if not trx.check(unspent_coins):
+        # checking its sign to be verified
+        if not signature_cache.verify(trx.__hash__, sig, public_key):
             return False
-        self.transactions[trx.__hash__] = deepcopy(trx)
+        return self._add_verified_transaction(trx, sig, public_key, unspent_coins)[0]
+
+    @_locked
+    def add_new_transactions(self,
+                             transactions: List[Tuple[Trx, Tuple[int, int], str]],
+                             unspent_coins: UTXOSet) -> List[bool]:
+        """Adds many new transactions (like the relayed transactions from a peer) to the
+        mempool. Their signatures are verified together in a batch and just the
+        transactions with an invalid signature are rejected.
+
+        Args
+        ----
+        transactions: List[Tuple[Trx, Tuple[int, int], str]]
+            The transactions with their signatures (r, s) and sender public keys.
+        unspent_coins: UTXOSet
+            The coins that have not been spent yet.
+
+        Return
+        ------
+        List[bool]
+            The result of adding each transaction like `add_new_transaction`.
+
+        See Also
+        --------
+        `Mempool.add_new_transaction()`
+        `Mempool.accept_transactions()`
+        `SignatureCache.invalid_signatures()`
+        """
+        return self.accept_transactions(transactions, unspent_coins)[0]
+
+    @_locked
+    def accept_transactions(self,
+                            transactions: List[Tuple[Trx, Tuple[int, int], str]],
+                            unspent_coins: CoinsView) -> Tuple[List[bool], List[str]]:
+        """Adds many new transactions like `add_new_transactions()` and also returns the
+        hash of the orphans that have been added because their parents have been added
+        (to be sent to other nodes too).
+
+        Return
+        ------
+        Tuple[List[bool], List[str]]
+            The result of adding each transaction and the hash of added orphans.
+        """
+        results = [trx.__hash__ not in self.transactions and not self.conflicts(trx)
+                   for trx, _, _ in transactions]
+        new_indexes = [i for i, is_new in enumerate(results) if is_new]
+        items = [(transactions[i][0].__hash__, transactions[i][1], transactions[i][2])
+                 for i in new_indexes]
+        for invalid in signature_cache.invalid_signatures(items):
+            results[new_indexes[invalid]] = False
+        promoted: List[str] = []
+        for i in new_indexes:
+            if results[i]:
+                results[i], added_orphans = self._add_verified_transaction(*transactions[i],
+                                                                           unspent_coins)
+                promoted += added_orphans
+        return results, [trx_hash for trx_hash in promoted if trx_hash in self.transactions]
+
+    def _add_verified_transaction(self, trx: Trx,
+                                  sig: Tuple[int, int],
+                                  public_key: str,
+                                  unspent_coins: CoinsView) -> Tuple[bool, List[str]]:
+        """Checks and adds a transaction that its signature has been verified. If
+        mempool is full, the transactions with the lowest fee rate are evicted that
+        could be the new transaction itself. Then the orphans of the added transactions
+        are added too.
+
+        Return
+        ------
+        Tuple[bool, List[str]]
+            The transaction has been added or not and the hash of added orphans.
+        """
+        self.expire()
+        first = self._accept(trx, sig, public_key, unspent_coins)
+        promoted = self._promote_orphans([first], unspent_coins)
         self.add_in_mining()
+        # the trx could have been evicted by its orphans
+        return first is not None and first in self.transactions, promoted
+
+    def _promote_orphans(self, parents: List[Optional[str]],
+                         unspent_coins: CoinsView) -> List[str]:
+        """Adds the orphans of the parents (and the orphans of them and so on) and
+        returns the hash of the added ones"""
+        promoted = []
+        added = list(parents)
+        while added:
+            trx_hash = added.pop()
+            for child_hash in self._orphans_by_parent.pop(trx_hash, ()):
+                orphan = self._remove_orphan(child_hash)
+                if orphan is not None:
+                    child = self._accept(*orphan, unspent_coins)
+                    if child is not None:
+                        promoted.append(child)
+                        added.append(child)
+        return [trx_hash for trx_hash in promoted if trx_hash in self.transactions]
+
+    def _accept(self, trx: Trx,
+                sig: Tuple[int, int],
+                public_key: str,
+                unspent_coins: CoinsView) -> Optional[str]:
+        """Checks and adds a transaction (that its signature has been verified) without
+        its orphans and returns its hash if it's added. If its inputs are not found
+        because of missing parents, it's kept in the orphan pool. But if a parent is
+        known (in mempool or blockchain), its output has been spent and the transaction
+        is rejected."""
+        if trx.__hash__ in self.transactions or self.conflicts(trx):
+            return None
+        if not trx.is_owned_by(public_key):
+            return None
+        # check double spent and other things by the unspent coins and mempool outputs
+        view = MempoolCoinsView(self, unspent_coins)
+        if not trx.check(view):
+            not_found = {coin.created_trx_hash for coin in trx.inputs
+                         if view.get(coin.created_trx_hash, coin.out_index) is None}
+            if not_found and not any(self._is_known(parent, unspent_coins)
+                                     for parent in not_found):
+                self._add_orphan(trx, sig, public_key, not_found)
+            return None
+        # the mempool keeps a frozen trx to be shared safely. The trx of the caller (like
+        # a wallet) is not changed, so a frozen copy of it is made once
+        if not trx.is_frozen:
+            new_trx = trx.frozen_copy(public_key, sig)
+            if new_trx.__hash__ != trx.__hash__:
+                return None  # the hash has been changed from its data
+        elif trx.public_key == public_key and trx.signature == sig:
+            new_trx = trx
+        else:
+            return None
+        entry = MempoolEntry(new_trx)
+        self.transactions[new_trx.__hash__] = new_trx
+        self.entries[new_trx.__hash__] = entry
+        for outpoint in self._outpoints(new_trx):
+            self.spent_outpoints[outpoint] = new_trx.__hash__
+        order = next(self._counter)
+        heapq.heappush(self._heap, (-entry.fee_rate, order, new_trx.__hash__))
+        heapq.heappush(self._evict_heap, (entry.fee_rate, order, new_trx.__hash__))
+        heapq.heappush(self._expiry_heap, (entry.time, order, new_trx.__hash__))
+        self.usage += entry.memory
+        self.max_usage = max(self.max_usage, self.usage)
+        self.evicted += len(self.trim())
+        return new_trx.__hash__ if new_trx.__hash__ in self.transactions else None
+
+    def _add_orphan(self, trx: Trx,
+                    sig: Tuple[int, int],
+                    public_key: str,
+                    missing_parents: Set[str]) -> None:
+        """Keeps a transaction until its missing parents are added. If the orphan pool
+        is full, the oldest orphan is dropped."""
+        if trx.__hash__ in self.orphans or self.max_orphans <= 0:
+            return
+        while len(self.orphans) >= self.max_orphans:
+            self._remove_orphan(next(iter(self.orphans)))
+        self.orphans[trx.__hash__] = (trx, sig, public_key)
+        for parent in missing_parents:
+            self._orphans_by_parent.setdefault(parent, set()).add(trx.__hash__)
+
+    def _remove_orphan(self, trx_hash: str) -> Optional[Tuple[Trx, Tuple[int, int], str]]:
+        """Removes an orphan from the orphan pool and returns it"""
+        orphan = self.orphans.pop(trx_hash, None)
+        if orphan is None:
+            return None
+        for coin in orphan[0].inputs:
+            children = self._orphans_by_parent.get(coin.created_trx_hash)
+            if children is not None:
+                children.discard(trx_hash)
+                if not children:
+                    self._orphans_by_parent.pop(coin.created_trx_hash)
+        return orphan
+
+    def _is_known(self, trx_hash: str, unspent_coins: CoinsView) -> bool:
+        """Checks the transaction is in mempool or has been confirmed. The confirmed
+        transactions are found by the blockchain (for the blocks that are kept) or by
+        their unspent outputs (for the pruned blocks too). A transaction of a pruned
+        block whose outputs all have been spent is not known."""
+        return (trx_hash in self.transactions
+                or unspent_coins.has_outputs_of(trx_hash)
+                or (self.blockchain is not None and self.blockchain.has_trx(trx_hash)))
+
+    def is_orphan(self, trx_hash: str) -> bool:
+        """Checks a transaction is in the orphan pool or not"""
+        return trx_hash in self.orphans
+
+    def parents(self, trx: Trx) -> Set[str]:
+        """Returns the hash of mempool transactions that trx spends their outputs"""
+        return {coin.created_trx_hash for coin in trx.inputs
+                if coin.created_trx_hash in self.transactions}
+
+    @_locked
+    def trim(self) -> List[str]:
+        """Evicts the transactions with the lowest fee rate (and the transactions that
+        spend their outputs) until mempool is not more than max_size and
+        max_transactions.
+
+        Return
+        ------
+        List[str]
+            The hash of evicted transactions.
+        """
+        evicted = []
+        while self._evict_heap and (self.usage > self.max_size
+                                    or len(self.transactions) > self.max_transactions):
+            _, _, trx_hash = heapq.heappop(self._evict_heap)
+            evicted += self.remove_with_descendants(trx_hash)
+        return evicted
+
+    @_locked
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Removes the transactions (and the transactions that spend their outputs)
+        that have been in mempool for more than expiry seconds.
+
+        Return
+        ------
+        List[str]
+            The hash of expired transactions.
+        """
+        if now is None:
+            now = time.time()
+        deadline = now - self.expiry
+        old = []
+        while self._expiry_heap and self._expiry_heap[0][0] <= deadline:
+            added_time, _, trx_hash = heapq.heappop(self._expiry_heap)
+            entry = self.entries.get(trx_hash)
+            if entry is not None and entry.time == added_time:
+                old.append(trx_hash)
+        expired = []
+        for trx_hash in old:
+            expired += self.remove_with_descendants(trx_hash)
+        self.expired += len(expired)
+        if expired:
+            self.add_in_mining()
+        return expired
+
+    @_locked
+    def set_time(self, trx_hash: str, time_: float) -> bool:
+        """Changes the adding time of a mempool transaction (like a loaded one that has
+        been added before), so it is expired by its own time.
+
+        Return
+        ------
+        bool
+            False if the transaction is not in mempool.
+        """
+        entry = self.entries.get(trx_hash)
+        if entry is None:
+            return False
+        entry.time = time_
+        heapq.heappush(self._expiry_heap, (time_, next(self._counter), trx_hash))
         return True
 
+    def descendants(self, trx_hash: str) -> List[str]:
+        """Returns the hash of mempool transactions that spend the outputs of the
+        transaction, and the outputs of them and so on."""
+        result = []
+        stack = [trx_hash]
+        seen = {trx_hash}
+        while stack:
+            trx = self.transactions.get(stack.pop())
+            if trx is None:
+                continue
+            for out_index in range(len(trx.outputs)):
+                spender = self.spent_outpoints.get((trx.__hash__, out_index))
+                if spender is not None and spender not in seen:
+                    seen.add(spender)
+                    result.append(spender)
+                    stack.append(spender)
+        return result
+
+    @_locked
+    def remove_with_descendants(self, trx_hash: str) -> List[str]:
+        """Removes a transaction and its descendants and returns the removed hashes"""
+        removed = []
+        for remove_hash in [trx_hash] + self.descendants(trx_hash):
+            if self._remove(remove_hash):
+                removed.append(remove_hash)
+        return removed
+
+    @_locked
     def remove_transaction(self, trx_hash: str) -> bool:
         """Remove a transaction from mempool and return True if exists, otherwise return
         False
         """
+        if not self._remove(trx_hash):
+            return False
+        if trx_hash in self.in_mining_transactions:
+            self.in_mining_transactions.remove(trx_hash)
+        return True
+
+    def _remove(self, trx_hash: str) -> bool:
+        """Removes a transaction from the indexes except in_mining_transactions that
+        should be updated by `add_in_mining()` after removing"""
         res = self.transactions.get(trx_hash)
         if res is None:
             return False
         else:
             self.transactions.pop(trx_hash)
-            self.in_mining_transactions.remove(trx_hash)
+            self.usage -= self.entries.pop(trx_hash).memory
+            for outpoint in self._outpoints(res):
+                if self.spent_outpoints.get(outpoint) == trx_hash:
+                    self.spent_outpoints.pop(outpoint)
+            # rebuild the heaps if most of them are removed transactions
+            if len(self._heap) > 2 * len(self.entries) + 64:
+                self._heap = [item for item in self._heap if item[2] in self.entries]
+                heapq.heapify(self._heap)
+            if len(self._evict_heap) > 2 * len(self.entries) + 64:
+                self._evict_heap = [item for item in self._evict_heap
+                                    if item[2] in self.entries]
+                heapq.heapify(self._evict_heap)
+            if len(self._expiry_heap) > 2 * len(self.entries) + 64:
+                self._expiry_heap = [item for item in self._expiry_heap
+                                     if item[2] in self.entries
+                                     and self.entries[item[2]].time == item[0]]
+                heapq.heapify(self._expiry_heap)
             return True
 
+    @_locked
     def remove_transactions(self, list_trx: List[str]):
-        """Removes a list of transaction from mempool and return True if they exist,
-        otherwise return False
+        """Removes a list of transaction from mempool if they exist"""
+        for trx_hash in list_trx:
+            self._remove(trx_hash)
+        self.add_in_mining()
+
+    def conflicts(self, trx: Trx) -> Set[str]:
+        """Returns the hash of mempool transactions that spend any input coin of trx
+        (except trx itself). It takes O(1) for each input."""
+        conflicts = set()
+        for outpoint in self._outpoints(trx):
+            spender = self.spent_outpoints.get(outpoint)
+            if spender is not None and spender != trx.__hash__:
+                conflicts.add(spender)
+        return conflicts
+
+    @_locked
+    def remove_conflicts(self, transactions: Iterable[Trx]) -> Set[str]:
+        """Removes the mempool transactions that spend the same coins as transactions
+        (like the transactions of a new confirmed block) with their descendants. The
+        transactions themselves are removed too if they are in the mempool.
+
+        Return
+        ------
+        Set[str]
+            The hash of removed transactions.
+        """
+        removed = set()
+        for trx in transactions:
+            if self._remove(trx.__hash__):
+                removed.add(trx.__hash__)
+            for trx_hash in self.conflicts(trx):
+                removed.update(self.remove_with_descendants(trx_hash))
+        if removed:
+            self.add_in_mining()
+        return removed
+
+    @_locked
+    def block_connected(self, block: Block,
+                        unspent_coins: Optional[CoinsView] = None
+    ) -> Tuple[Set[str], List[str]]:
+        """Removes the transactions of a block that has been connected to the blockchain
+        and the mempool transactions that conflict with them. It takes O(size of block)
+        and in_mining_transactions is updated once.
+
+        If unspent_coins (after connecting the block) is passed, the orphans that spend
+        the outputs of the block are added to mempool.
+
+        Return
+        ------
+        Tuple[Set[str], List[str]]
+            The hash of removed transactions and the hash of added orphans.
+
+        See Also
+        --------
+        `Mempool.remove_conflicts()`
         """
-        for trx_hash in self.in_mining_transactions:
-            if trx_hash in list_trx:
-                self.remove_transaction(trx_hash)
+        removed = self.remove_conflicts(block.transactions)
+        promoted = []
+        if unspent_coins is not None:
+            promoted = self._promote_orphans(block.hash_list_trx, unspent_coins)
+            if promoted:
+                self.add_in_mining()
+        return removed, promoted
+
+    @_locked
+    def block_disconnected(self, block: Block, unspent_coins: CoinsView) -> List[bool]:
+        """Adds back the transactions of a block that has been disconnected from the
+        blockchain (in a reorganization), so they could be mined in the new blocks.
+        The generic transaction is dropped.
+
+        Args
+        ----
+        block: Block
+            The disconnected block.
+        unspent_coins: CoinsView
+            The coins after disconnecting the block (and connecting the new blocks).
+
+        Return
+        ------
+        List[bool]
+            The result of adding each signed transaction of the block.
+        """
+        items = [(trx, trx.signature, trx.public_key) for trx in block.transactions
+                 if not trx.is_generic and trx.signature is not None]
+        return self.add_new_transactions(items, unspent_coins)
+
+    @_locked
+    def dump(self, path: str) -> int:
+        """Saves the transactions with their adding time in a file to be loaded at the
+        next start up. The file is written in a temporary file and then replaced, so a
+        crash does not leave a broken file.
+
+        Return
+        ------
+        int
+            The number of saved transactions or -1 if it could not be saved.
+        """
+        # the entries could be changed by other threads while dumping
+        entries = list(self.entries.values())
+        data = {
+            "version": MEMPOOL_FILE_VERSION,
+            "transactions": [[entry.time, entry.trx.get_data()] for entry in entries]
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                json.dump(data, file, separators=(",", ":"))
+            replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"could not save mempool in {path}: {e}")
+            return -1
+        return len(entries)
+
+    @_locked
+    def load(self, path: str, unspent_coins: UTXOSet) -> int:
+        """Loads the transactions that have been saved by `dump()`. They are checked
+        again with the current unspent coins and their signatures are verified in a
+        batch (or found in the signature cache). The expired transactions are dropped.
+
+        Return
+        ------
+        int
+            The number of added transactions.
+
+        See Also
+        --------
+        `Mempool.add_new_transactions()`
+        """
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+            if data["version"] != MEMPOOL_FILE_VERSION:
+                logging.warning(f"the mempool file {path} has an unknown version")
+                return 0
+            deadline = time.time() - self.expiry
+            saved = [(added_time, Trx.from_data(trx_data))
+                     for added_time, trx_data in data["transactions"]
+                     if added_time > deadline]
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            logging.warning(f"could not load mempool from {path}: {e}")
+            return 0
+        saved = [(added_time, trx) for added_time, trx in saved if trx.signature is not None]
+        items = [(trx, trx.signature, trx.public_key) for _, trx in saved]
+        results = self.add_new_transactions(items, unspent_coins)
+        for (added_time, trx), result in zip(saved, results):
+            if result:
+                self.set_time(trx.__hash__, added_time)
+        return sum(results)
+
+    @staticmethod
+    def _outpoints(trx: Trx) -> List[OutPoint]:
+        """The outpoints of the coins that trx spends"""
+        return [(coin.created_trx_hash, coin.out_index) for coin in trx.inputs]
 
     def is_exist(self, trx_hash: str):
         """Checks a transaction is in mempool or not"""
         return trx_hash in self.transactions
 
+    @_locked
     def get_mine_transactions(self, n_trx: Optional[int] = None) -> List[Trx]:
         """Pics just n transaction from in_mining_transactions and put it again in
         in_mining_transactions (inplace). n_trx is should be less than max_limit_trx
@@ -121,7 +868,7 @@ class Mempool:
 
     def __getattr__(self, item: str):
         assert isinstance(item, str)
-        return deepcopy(self.transactions[item])
+        return self.transactions[item]
 
     def __iter__(self):
         for trx in self.in_mining_transactions:
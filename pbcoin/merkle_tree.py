@@ -3,6 +3,12 @@ from __future__ import annotations
 import math
 import queue
 from hashlib import sha256
+from typing import List, Optional
+
+
+def hash_children(left: str, right: str) -> str:
+    """Calculates the hash of a parent node from its children hashes"""
+    return sha256((left + right).encode()).hexdigest()
 
 
 class MerkleTreeNode:
@@ -37,8 +43,7 @@ class MerkleTreeNode:
         """calculate parents hash"""
         if self.left is None:  # if left is none so right is none too
             return self.hash
-        child_hash = self.left.compute_hash() + self.right.compute_hash()
-        self.hash = sha256(child_hash.encode()).hexdigest()
+        self.hash = hash_children(self.left.compute_hash(), self.right.compute_hash())
         return self.hash
 
     def find_leaves(self):
@@ -184,3 +189,168 @@ class MerkleTreeNode:
             raise Exception
         root.compute_hash()
         return root.hash == merkle_tree_root_hash, root
+
+
+class IncrementalMerkleTree:
+    """
+    A Merkle tree that supports appending new leaves in O(log n) and just keeps the
+    right edge of the tree.
+
+    The tree is kept as the roots of its complete subtrees (peaks) that their sizes
+    are the binary representation of the number of leaves. The root is made by
+    hashing the peaks from the smallest to the biggest, so it is the same as the
+    root of `MerkleTreeNode.build_merkle_tree()` for the same leaves.
+
+    Attributes
+    ----------
+        peaks: List[Optional[str]]
+            peaks[i] is the hash of a complete subtree of 2^i leaves or None if there
+            is not such subtree.
+        size: int
+            The number of leaves
+    """
+    def __init__(self, values: Optional[List[str]] = None):
+        self.peaks: List[Optional[str]] = []
+        self.size = 0
+        self._root: Optional[str] = ''
+        for value in values or []:
+            self.append(value)
+
+    def append(self, value: str) -> None:
+        """Adds a new leaf hash to the right of the tree"""
+        node = value
+        height = 0
+        # merge the complete subtrees with the same size like a binary addition
+        while height < len(self.peaks) and self.peaks[height] is not None:
+            node = hash_children(self.peaks[height], node)
+            self.peaks[height] = None
+            height += 1
+        if height == len(self.peaks):
+            self.peaks.append(node)
+        else:
+            self.peaks[height] = node
+        self.size += 1
+        self._root = None
+
+    @property
+    def hash(self) -> str:
+        """The root hash of tree"""
+        if self._root is None:
+            root = None
+            for peak in self.peaks:
+                if peak is None:
+                    continue
+                root = peak if root is None else hash_children(peak, root)
+            self._root = root or ''
+        return self._root
+
+
+# size of a sha256 digest in bytes
+DIGEST_SIZE = 32
+
+
+class ArrayMerkleTree:
+    """
+    A Merkle tree that keeps each level as a flat bytes of 32-byte digests instead of
+    a node object for each node
+
+    The parents are hashed like `MerkleTreeNode` (sha256 of the hex of children) and
+    the last node of an odd level goes up without hashing, so both of them have the
+    same root and the same proofs for the same leaves.
+
+    Attributes
+    ----------
+        levels: List[bytes]
+            levels[0] is leaves and the last one is the root. The digest of the node i
+            of a level is level[32*i: 32*(i+1)]
+
+    See Also
+    --------
+        `MerkleTreeNode`: the node object representation of Merkle tree
+    """
+    def __init__(self, values: Optional[List[str]] = None):
+        leaves = b''.join(bytes.fromhex(value) for value in values or [])
+        self.levels: List[bytes] = [leaves]
+        while len(self.levels[-1]) > DIGEST_SIZE:
+            self.levels.append(self._build_level(self.levels[-1]))
+
+    @staticmethod
+    def _build_level(level: bytes) -> bytes:
+        """hashes the nodes of level two by two and returns the level of their parents"""
+        view = memoryview(level)
+        end = len(level) - len(level) % (2 * DIGEST_SIZE)
+        parents = bytearray()
+        for i in range(0, end, 2 * DIGEST_SIZE):
+            parents += sha256(view[i: i + 2*DIGEST_SIZE].hex().encode()).digest()
+        if end != len(level):
+            # odd level so the last one is added without hashing
+            parents += view[end:]
+        return bytes(parents)
+
+    @property
+    def size(self) -> int:
+        """The number of leaves"""
+        return len(self.levels[0]) // DIGEST_SIZE
+
+    @property
+    def hash(self) -> str:
+        """The root hash of tree"""
+        return self.levels[-1].hex()
+
+    def _node(self, depth: int, index: int) -> str:
+        return self.levels[depth][index*DIGEST_SIZE: (index+1)*DIGEST_SIZE].hex()
+
+    def find_leaf(self, key_hash: str) -> Optional[int]:
+        """returns the index of the first leaf with key_hash or None if not exists"""
+        key = bytes.fromhex(key_hash)
+        pos = self.levels[0].find(key)
+        while pos != -1:
+            if pos % DIGEST_SIZE == 0:
+                return pos // DIGEST_SIZE
+            pos = self.levels[0].find(key, pos + 1)
+        return None
+
+    def get_proof(self, key_hash=None, index=None):
+        """
+            finds needed hashes and correct path in the pre-order walk for finding key_hash
+
+            Args
+            ----
+                key_hash: str
+                    hash of key that you want proof
+                index: int
+                    if it is not None means that don't need find the leaf and
+                    uses the index for find the leaf
+
+            return
+            ------
+            list[str]:
+                hashes of nodes that are not in the path so we need their hashes to prove
+            list[int]:
+                bits that show that we are on the correct path or not
+
+            See Also
+            --------
+                `MerkleTreeNode.get_proof()` and `MerkleTreeNode.proof_of_exist()`
+        """
+        if index is None:
+            index = self.find_leaf(key_hash)
+            if index is None:
+                return None
+        hashes = [self._node(0, index)]
+        bits = []
+        for depth in range(len(self.levels) - 1):
+            level_size = len(self.levels[depth]) // DIGEST_SIZE
+            if index % 2 == 0:
+                # the last node of an odd level has no sibling and goes up itself
+                if index + 1 < level_size:
+                    hashes.append(self._node(depth, index + 1))
+                    bits.append(1)
+                    bits.insert(0, 0)
+            else:
+                hashes.insert(0, self._node(depth, index - 1))
+                bits.append(1)
+                bits.append(0)
+            index //= 2
+        bits.append(1)
+        return hashes, bits
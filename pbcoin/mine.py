@@ -1,22 +1,70 @@
-from copy import deepcopy
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from functools import wraps
-from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
 
 import pbcoin.config as conf
+from pbcoin.block import Block, difficulty_to_target, search_nonce
 from pbcoin.blockchain import BlockChain
+from pbcoin.constants import NONCE_RANGE_SIZE
 from pbcoin.logger import getLogger
 from pbcoin.mempool import Mempool
-from pbcoin.trx import ALL_COINS_TYPE, Trx
+from pbcoin.trx import Trx
+from pbcoin.utxo import UTXOSet
 
 if TYPE_CHECKING:
-    from pbcoin.block import Block
     from pbcoin.db import DB
     from pbcoin.network import Node
-    from pbcoin.trx import Coin
     from pbcoin.wallet import Wallet
 
 logging = getLogger(__name__)
 
+# How many nonces are tried between two checks of the mining flags (or the found
+# event in the worker processes)
+_NONCE_CHUNK_SIZE = 1024
+
+# How often (in seconds) the miner checks the mining flags and a new block while
+# the worker processes are searching
+_INTERRUPT_CHECK_INTERVAL = 0.05
+
+# The event that is shared between the worker processes and it is set when one of
+# them finds a nonce. It's set in each worker process by `_init_worker()`.
+_found_event = None
+
+
+def _init_worker(found_event) -> None:
+    """Initializes a mining worker process"""
+    global _found_event
+    _found_event = found_event
+
+
+def _search_nonce_range(
+    header_prefix: bytes,
+    target: bytes,
+    start: int,
+    end: int
+) -> Optional[int]:
+    """Searches nonces in range [start, end) to find a block hash that is less (equal)
+    than target. It runs in the mining worker processes and stops soon after
+    another worker finds a nonce.
+
+    Return
+    ------
+    Optional[int]
+        The found nonce or None if there is not any in this range.
+    """
+    for chunk_start in range(start, end, _NONCE_CHUNK_SIZE):
+        if _found_event is not None and _found_event.is_set():
+            return None
+        chunk_end = min(chunk_start + _NONCE_CHUNK_SIZE, end)
+        nonce = search_nonce(header_prefix, target, chunk_start, chunk_end)
+        if nonce is not None:
+            if _found_event is not None:
+                _found_event.set()
+            return nonce
+    return None
+
 
 class Mine:
     """ The class to mine blocks
@@ -41,6 +89,9 @@ class Mine:
             A Mempool object that is a list of transactions should has been mined
         node: Optional[Node]
             A Node object for declare other nodes
+        n_workers: int
+            The number of worker processes that search nonces. If it's 1 or less then
+            mining runs in the mining thread itself.
     """
 
     stop_mining: bool = False
@@ -55,8 +106,123 @@ class Mine:
         self.blockchain = blockchain
         self.mempool = mempool
         self.wallet = wallet
+        self.n_workers = 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._found_event = None
         self.reset()
 
+    def start_workers(self, n_workers: Optional[int] = None) -> None:
+        """Starts the pool of worker processes that split the nonce space between them.
+        If n_workers (or `mining_workers` from configs) is 1 or less, it does nothing
+        and mining stays in the mining thread.
+        """
+        if n_workers is None:
+            n_workers = conf.settings.glob.mining_workers
+        if self._pool is not None or n_workers <= 1:
+            return
+        self.n_workers = n_workers
+        self._found_event = multiprocessing.Event()
+        self._pool = ProcessPoolExecutor(max_workers=n_workers,
+                                         initializer=_init_worker,
+                                         initargs=(self._found_event,))
+
+    def stop_workers(self) -> None:
+        """Stops all the worker processes if they have been started"""
+        if self._pool is None:
+            return
+        self._found_event.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        self._found_event = None
+        self.n_workers = 1
+
+    async def search_nonce_workers(self, last_n: Optional[int] = None) -> bool:
+        """(async) Searches the next n_workers * NONCE_RANGE_SIZE nonces of the setup
+        block in the worker processes. Each worker gets a separate range and all of
+        them stop as soon as one finds a nonce, or mining is interrupted (see
+        `is_interrupted()`) that the setup block is not needed anymore.
+
+        Parameters
+        ----------
+        last_n: Optional[int] = None
+            The blockchain height that the setup block is mined on. If a new block is
+            added, the workers stop.
+
+        Return
+        ------
+        bool
+            True if a nonce was found and it has been set to the setup block.
+            Otherwise the setup block nonce is moved after the searched ranges (if
+            the search is not interrupted).
+        """
+        assert self._pool is not None, "Mining workers are not started"
+        block = self.setup_block
+        header_prefix = block.header_prefix()
+        target = difficulty_to_target(block.difficulty)
+        self._found_event.clear()
+        loop = asyncio.get_running_loop()
+        start = block.nonce
+        futures = [
+            loop.run_in_executor(self._pool,
+                                 _search_nonce_range,
+                                 header_prefix,
+                                 target,
+                                 start + i * NONCE_RANGE_SIZE,
+                                 start + (i+1) * NONCE_RANGE_SIZE)
+            for i in range(self.n_workers)
+        ]
+        found = None
+        interrupted = False
+        pending = set(futures)
+        while pending:
+            done, pending = await asyncio.wait(pending,
+                                               timeout=_INTERRUPT_CHECK_INTERVAL,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                nonce = future.result()
+                if nonce is not None and found is None:
+                    found = nonce
+                    self._found_event.set()
+            if found is None and not interrupted and self.is_interrupted(last_n):
+                # the workers stop after their current chunk of nonces
+                interrupted = True
+                self._found_event.set()
+        if found is None:
+            if not interrupted:
+                block.set_nonce(start + self.n_workers * NONCE_RANGE_SIZE)
+            return False
+        block.set_nonce(found)
+        block.calculate_hash()
+        return True
+
+    def search_nonce_thread(self) -> bool:
+        """Searches the next chunk of nonces of the setup block in the mining thread.
+
+        Return
+        ------
+        bool
+            True if a nonce was found and it has been set to the setup block.
+            Otherwise the setup block nonce is moved after the searched chunk.
+        """
+        block = self.setup_block
+        start = block.nonce
+        found = search_nonce(block.header_prefix(),
+                             difficulty_to_target(block.difficulty),
+                             start,
+                             start + _NONCE_CHUNK_SIZE)
+        if found is None:
+            block.set_nonce(start + _NONCE_CHUNK_SIZE)
+            return False
+        block.set_nonce(found)
+        block.calculate_hash()
+        return True
+
+    def is_interrupted(self, last_n: Optional[int] = None) -> bool:
+        """Checks mining of the setup block should be stopped: mining has been stopped
+        or started over, or a new block has been added after the height of last_n"""
+        return (self.start_over or self.stop_mining
+                or (last_n is not None and self.check_add_block(last_n)))
+
     def reset(self):
         """Reset mine attributes for start again mining for next block"""
         self.start_over = False
@@ -67,7 +233,7 @@ class Mine:
     async def mine(
         self,
         public_key: str,
-        unspent_coins: ALL_COINS_TYPE,
+        unspent_coins: UTXOSet,
         setup_block: Optional["Block"] = None,
         add_block = True,
         difficulty: Optional[int] = None,  # almost just for unittest
@@ -78,7 +244,9 @@ class Mine:
 
         This method first setup a new block if has not been provided for it
         then start mining until finds a nonce that the block hash is less than difficulty.
-        Even when the blockchain update gets out of the loop.
+        Even when the blockchain update gets out of the loop. If the worker processes
+        have been started by `start_workers()`, the nonces are searched by them in
+        ranges instead of the mining thread itself.
 
         After a block has been mined then added to the blockchain if
         the parameter add_block is True and then send to other nodes from
@@ -89,7 +257,7 @@ class Mine:
         setup_block: Optional[Block] = None
             The specific block to find its nonce less than difficulty.
             If it's passed None, then get from `blockchain.setup_new_block()`
-        unspent_coins: Optional[Dict[str, List[Coin]]] = None
+        unspent_coins: Optional[UTXOSet] = None
             The coins that have not been spent yet. It's used to check
             the validation block (transactions) and update that when
             the block is added to the blockchain..
@@ -119,10 +287,13 @@ class Mine:
                 mempool=self.mempool, subsidy=subsidy)
         else:
             raise Exception("Mine needs to setup block")
+        # the block hash should be less than the difficulty that is in its header
+        self.setup_block.set_difficulty(difficulty)
         # reset mine parameters
         self.reset()
         # get mining transaction to check later for added new transaction
-        transactions_mining = deepcopy(self.setup_block.transactions)
+        # the transactions are frozen, so they are not copied
+        transactions_mining = list(self.setup_block.transactions)
         if self.setup_block.has_subsidy:
             transactions_mining.pop(0)  # pop subsidy
         if isinstance(self.blockchain, List):
@@ -139,20 +310,23 @@ class Mine:
                 continue
             # check for new transaction has been added
             if transactions_mining != self.mempool == 0:
-                for trx in self.mempool:
-                    if trx not in transactions_mining:
-                        self.setup_block.add_trx(trx)
-                transactions_mining = self.setup_block.transactions
+                with self.mempool.lock:
+                    for trx in self.mempool:
+                        if trx not in transactions_mining:
+                            self.setup_block.add_trx(trx)
+                transactions_mining = list(self.setup_block.transactions)
                 transactions_mining.pop(0)  # pop subsidy
             self.setup_block.set_mined()
-            # calculate hash and check difficulty
-            if int(self.setup_block.calculate_hash(), 16) <= difficulty:
+            if self._pool is not None:
+                # search a range of nonces in worker processes
+                found = await self.search_nonce_workers(last_n)
+            else:
+                found = self.search_nonce_thread()
+            if found:
                 if self.start_over:
                     break
                 self.mined_new = True
                 break
-            # set new nonce
-            self.setup_block.set_nonce(self.setup_block.nonce+1)
         if self.mined_new:
             logging.info("A Block was mined")
             logging.debug(f"minded block info: {self.setup_block.get_data(True, False)}")
@@ -174,8 +348,8 @@ class Mine:
                 # send mine block to other node
                 # TODO: Check result
                 await node.send_mined_block(self.setup_block)
-            # remove mined transactions
-            self.mempool.remove_transactions(self.setup_block.hash_list_trx)
+            # remove mined transactions and add the orphans that have waited for them
+            self.mempool.block_connected(self.setup_block, unspent_coins)
             # TODO: returns the result of mining
 
     def check_add_block(self, last_n: int):
@@ -148,17 +148,25 @@ class Message:
                 self.data = {"blocks": kwargs["blocks"]}
             elif self.type_ == ConnectionCode.GET_BLOCKS:
                 hash_block = kwargs.get("hash_block", None)
-                if hash_block is not None:
+                locator = kwargs.get("locator", None)
+                if locator is not None:
+                    self.data = {"locator": locator}
+                elif hash_block is not None:
                     self.data = {"hash_block": hash_block}
                 else:
                     self.data = {"first_index": kwargs["first_index"]}
             elif self.type_ == ConnectionCode.SEND_BLOCKS:
                 self.data = {"blocks": kwargs["blocks"]}
             elif self.type_ == ConnectionCode.ADD_TRX:
-                self.data = {"trx": kwargs["trx"],
-                             "signature": kwargs["signature"],
-                             "public_key": kwargs["public_key"],
-                             "passed_nodes": kwargs["passed_nodes"]}
+                if "transactions" in kwargs:
+                    # many transactions: a list of {"trx", "signature", "public_key"}
+                    self.data = {"transactions": kwargs["transactions"],
+                                 "passed_nodes": kwargs["passed_nodes"]}
+                else:
+                    self.data = {"trx": kwargs["trx"],
+                                 "signature": kwargs["signature"],
+                                 "public_key": kwargs["public_key"],
+                                 "passed_nodes": kwargs["passed_nodes"]}
             elif self.type_ == ConnectionCode.PING_PONG:
                 self.data = None
         except KeyError:
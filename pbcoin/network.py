@@ -20,7 +20,7 @@ from pbcoin.blockchain import BlockChain
 from pbcoin.constants import TOTAL_NUMBER_CONNECTIONS
 from pbcoin.logger import getLogger, log_error_message
 from pbcoin.netmessage import ConnectionCode, Errno, Message
-from pbcoin.trx import ALL_COINS_TYPE
+from pbcoin.utxo import UTXOSet
 from pbcoin.utils.netbase import Addr, Connection, Peer
 if TYPE_CHECKING:
     from pbcoin.block import Block
@@ -171,7 +171,10 @@ class Node(Connection):
         except asyncio.CancelledError:
             pass
 
-    async def start_up(self, seeds: List[str], get_blockchain = True, all_output: Optional[ALL_COINS_TYPE] = None) -> None:
+    async def start_up(self,
+                       seeds: List[str],
+                       get_blockchain = True,
+                       all_output: Optional[UTXOSet] = None) -> None:
         """(async) Begins to find new neighbors and connect to the blockchain network.
 
         Starts from some nodes and requests them to find some new neighbors nodes. After
@@ -231,18 +234,25 @@ class Node(Connection):
                 if get_blockchain:
                     # get block chain from other nodes
                     #TODO: resolve blockchain
+                    own_blockchain = self.proc_handler.pbcoin.blockchain
                     request_blockchain = Message(True, ConnectionCode.GET_BLOCKS, node)
-                    request_blockchain.create_data(first_index=0)
+                    request_blockchain.create_data(locator=own_blockchain.get_locator())
                     rec = await self.connect_and_send(node,
                                                       request_blockchain.create_message(self.addr))
                     rec = Message.from_str(rec.decode())
                     if rec.status:
-                        blockchain = BlockChain.json_to_blockchain(rec.data['blocks'])
-                        if all_output is not None:
-                            blockchain.update_coins_outputs(all_output)
-                        logging.debug(f"Blockchain: {blockchain.blocks}")
-                        if self.proc_handler.pbcoin.blockchain.height < blockchain.height:
-                            self.proc_handler.pbcoin.blockchain = blockchain
+                        blocks = [Block.from_json_data_full(block) for block in rec.data['blocks']]
+                        logging.debug(f"Blockchain: {blocks}")
+                        if len(blocks) != 0 and own_blockchain.height < blocks[-1].block_height:
+                            if own_blockchain.height != 0 and all_output is not None:
+                                own_blockchain.resolve(blocks, all_output)
+                            else:
+                                blockchain = BlockChain(blocks)
+                                if all_output is not None:
+                                    blockchain.update_coins_outputs(all_output)
+                                self.proc_handler.pbcoin.blockchain = blockchain
+                                if self.proc_handler.pbcoin.mempool is not None:
+                                    self.proc_handler.pbcoin.mempool.blockchain = blockchain
                     else:
                         raise NotImplementedError()
             else:
@@ -308,10 +318,11 @@ class Node(Connection):
                         # TODO: Remove that from blockchain
                         break
                 elif response.type_ == Errno.OBSOLETE_BLOCK:
+                    locator = self.proc_handler.pbcoin.blockchain.get_locator()
                     request = Message(status = True,
                                       type_ = ConnectionCode.GET_BLOCKS,
                                       addr = dst_addr,
-                                      ).create_data(first_index = self.proc_handler.pbcoin.blockchain.height - 1)
+                                      ).create_data(locator=locator)
                     res = await self.connect_and_send(message.addr, request.create_message(self.addr))
                     if not res:
                         logging.debug("message cannot send or recieve correctly")
@@ -323,7 +334,9 @@ class Node(Connection):
                             return []  # TODO
                         blocks = res.data['blocks']
                         blocks = [Block.from_json_data_full(block) for block in blocks]
-                        result, block_index, validation = self.proc_handler.pbcoin.blockchain.resolve(blocks, self.proc_handler.pbcoin.all_outputs)
+                        result, block_index, validation = self.proc_handler.pbcoin.blockchain.resolve(
+                            blocks, self.proc_handler.pbcoin.all_outputs,
+                            mempool=self.proc_handler.pbcoin.mempool)
                         if result:
                             logging.debug(f"new block chian: {self.proc_handler.pbcoin.blockchain.get_hashes()}")
                             break
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from copy import copy
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import pbcoin
 from pbcoin.block import Block, BlockValidationLevel
@@ -9,7 +9,8 @@ from pbcoin.constants import TOTAL_NUMBER_CONNECTIONS
 from pbcoin.mine import Mine
 from pbcoin.utils.netbase import Addr, Peer
 from pbcoin.netmessage import ConnectionCode, Errno, Message
-from pbcoin.utils.tuple_util import tuple_from_string
+from pbcoin.sigcache import signature_cache
+from pbcoin.utils.tuple_util import decode_signature, encode_signature
 from pbcoin.logger import getLogger
 from pbcoin.trx import Coin, Trx
 if TYPE_CHECKING:
@@ -26,8 +27,8 @@ class ProcessingHandler:
     ----------
     blockchain: Blockchain
         A Blockchain object
-    unspent_coins: Dict[str, Coin]
-        List of unspent coins
+    unspent_coins: UTXOSet
+        The set of unspent coins
     wallet: Wallet
         A Wallet object
     mempool: Mempool
@@ -229,18 +230,27 @@ class ProcessingHandler:
         sent blocks, it will send an error to the sender and not add to the self
         blockchain.
 
+        - If the block is already in the self blockchain, nothing is needed to do.
+
         - Otherwise, if self blockchain is further than the new block, then it will tell
         the sender to get the new blocks and resolve its blockchain.
         """
         block_data = message.data
         logging.debug(f"Mine block from {message.addr.hostname}: {block_data} to check")
         block = Block.from_json_data_full(block_data['block'])
+        if self.pbcoin.blockchain.has_block(block.__hash__):
+            logging.debug(f"Already have the mined block from {message.addr.hostname}")
+            ok_msg = Message(True, ConnectionCode.OK_MESSAGE, message.addr)
+            await node.write(peer.writer, ok_msg.create_message(node.addr))
+            return
         # checking which blockchain is longer, mine or him?
         if block.block_height > self.pbcoin.blockchain.height:
             number_new_blocks = block.block_height - self.pbcoin.blockchain.height
             if number_new_blocks == 1:
                 # just this block is new
-                done = self.pbcoin.blockchain.add_new_block(block, self.pbcoin.all_outputs, db=self.pbcoin.database)
+                done = self.pbcoin.blockchain.add_new_block(block, self.pbcoin.all_outputs,
+                                                            db=self.pbcoin.database,
+                                                            mempool=self.pbcoin.mempool)
                 if done != BlockValidationLevel.ALL():
                     error = Message(False, Errno.BAD_BLOCK_VALIDATION, peer.addr)
                     error = error.create_data(block_hash=block.__hash__,
@@ -249,10 +259,9 @@ class ProcessingHandler:
                     await node.write(peer.writer, error.create_message(node.addr))
                     logging.debug(f"Bad request mined block from {message.addr.hostname} validation: {done}")
                 else:
-                    last = self.pbcoin.blockchain.last_block
-                    last.update_outputs(self.pbcoin.all_outputs)
                     logging.info(f"New mined block from {message.addr.hostname}")
                     logging.debug(f"info mined block from {message.addr.hostname}: {block.get_data()}")
+                    logging.debug(f"signature cache: {signature_cache.stats}")
                     ok_msg = Message(True, ConnectionCode.OK_MESSAGE, message.addr)
                     logging.debug(f"new block chian: {self.pbcoin.blockchain.get_hashes()}")
                     await node.write(peer.writer, ok_msg.create_message(node.addr))
@@ -261,13 +270,14 @@ class ProcessingHandler:
                 request = Message(status = True,
                                   type_ = ConnectionCode.GET_BLOCKS,
                                   addr = message.addr,
-                                  ).create_data(first_index = self.pbcoin.blockchain.height)
+                                  ).create_data(locator = self.pbcoin.blockchain.get_locator())
                 res = await node.connect_and_send(message.addr, request.create_message(node.addr))
                 res = Message.from_str(res.decode())
                 if res.status:
                     blocks = res.data['blocks']
                     blocks = [Block.from_json_data_full(block) for block in blocks]
-                    result, block_index, validation = self.pbcoin.blockchain.resolve(blocks, self.pbcoin.all_outputs)
+                    result, block_index, validation = self.pbcoin.blockchain.resolve(
+                        blocks, self.pbcoin.all_outputs, mempool=self.pbcoin.mempool)
                     if result:
                         logging.debug(f"new block chian: {self.pbcoin.blockchain.get_hashes()}")
                         ok_msg = Message(True, ConnectionCode.OK_MESSAGE, res.addr)
@@ -295,7 +305,8 @@ class ProcessingHandler:
         """(async) Handles request to resolve self blockchain with new blocks."""
         blocks = message.data['blocks']
         blocks = [Block.from_json_data_full(block) for block in blocks]
-        result, index_block, validation = self.pbcoin.blockchain.resolve(blocks, self.pbcoin.all_outputs)
+        result, index_block, validation = self.pbcoin.blockchain.resolve(
+            blocks, self.pbcoin.all_outputs, mempool=self.pbcoin.mempool)
         if not result:
             pass  # TODO: should tell other nodes that blocks have problem
         else:
@@ -305,11 +316,18 @@ class ProcessingHandler:
     async def handle_get_blocks(self, message: Message, peer: Peer, node: Node):
         """(async) Handles for requesting another node for getting blocks from the first
         index or first block hash until the last block.
+
+        If the request has a block locator, the blocks are sent from the last common
+        block with the requester blockchain (or from the first block if there is not).
         """
         copy_blockchain = copy(self.pbcoin.blockchain)
         first_index: Optional[int] = None
         hash_block = message.data.get('hash_block', None)
-        if hash_block:
+        locator = message.data.get('locator', None)
+        if locator is not None:
+            # the common block is sent too so the requester finds the fork point
+            first_index = max(copy_blockchain.find_fork(locator), 0)
+        elif hash_block:
             first_index = copy_blockchain.search(hash_block)
         else:
             first_index = message.data.pop('first_index', None)
@@ -330,16 +348,50 @@ class ProcessingHandler:
         await node.write(peer.writer, request.create_message(node.addr), False)
 
     async def handle_new_trx(self, message: Message, peer: Peer, node: Node):
-        """(async) Handles to request maker a new transaction.
+        """(async) Handles to request maker a new transaction (or many transactions).
 
-        Gets the data from the message and builds Trx object from it. After that check
-        the validation of the transaction. If the transaction is valid, it will be added
-        to the mempool to mine. Otherwise, will be sent an error message to the sender.
+        Gets the data from the message and builds Trx objects from it. After that check
+        the validation of the transactions (the signatures are verified by
+        `pbcoin.verifier` together out of the event loop). The valid transactions will
+        be added to the mempool to mine in one batch. If any of them is not valid, will
+        be sent an error message to the sender.
         """
         message.data['passed_nodes'].append(node.addr.hostname)
-        public_key = message.data['public_key']
-        sig = tuple_from_string(message.data['signature'], from_b64=True)
-        trx_data = message.data['trx']
+        if 'transactions' in message.data:
+            received = message.data['transactions']
+        else:
+            received = [message.data]
+        new_transactions = []
+        for trx_message in received:
+            public_key = trx_message['public_key']
+            sig = decode_signature(trx_message['signature'])
+            new_trx = self.make_trx(trx_message['trx'], sig, public_key)
+            new_transactions.append((new_trx, sig, public_key))
+        mempool = self.pbcoin.mempool
+        # verify the signatures out of the event loop (then they're in the signature
+        # cache) and add them to mempool together
+        items = [item for item in new_transactions if not mempool.is_exist(item[0].__hash__)]
+        invalid = set(await self.pbcoin.verifier.invalid_signatures(
+            [(trx.__hash__, sig, public_key) for trx, sig, public_key in items]))
+        items = [item for i, item in enumerate(items) if i not in invalid]
+        results, promoted = mempool.accept_transactions(items, self.pbcoin.all_outputs)
+        accepted = [trx.__hash__ for (trx, _, _), result in zip(items, results) if result]
+        # send other nodes with the orphans that have been added. The orphans have not
+        # come from the sender of these transactions
+        await self.relay_transactions(accepted, message.data['passed_nodes'], node)
+        await self.relay_transactions(promoted, [node.addr.hostname], node)
+        # the orphans will be added (and sent to other nodes) when their parents arrive
+        accepted = set(accepted).union(promoted)
+        if all(trx.__hash__ in accepted or mempool.is_orphan(trx.__hash__)
+               for trx, _, _ in new_transactions):
+            ok_message = Message(True, ConnectionCode.OK_MESSAGE, message.addr)
+            await node.write(peer.writer, ok_message.create_message(node.addr), True)
+        else:
+            error = Message(False, Errno.BAD_TRANSACTION, message.addr)
+            await node.write(peer.writer, error.create_message(node.addr), True)
+
+    def make_trx(self, trx_data: Dict[str, Any], sig: Tuple[int, int], public_key: str) -> Trx:
+        """Builds a received transaction from its data"""
         trx_inputs = trx_data['inputs']
         trx_outputs = trx_data['outputs']
         inputs = []
@@ -358,27 +410,30 @@ class ProcessingHandler:
                                 out_coin["created_trx_hash"],
                                 out_coin["value"]))
         time = trx_data['time']
-        new_trx = Trx(self.pbcoin.blockchain.height,
-                      self.pbcoin.wallet.public_key,
-                      inputs, outputs, time)
-        # add to mempool and send other nodes
-        result = self.pbcoin.mempool.add_new_transaction(new_trx,
-                                                  sig,
-                                                  public_key,
-                                                  self.pbcoin.all_outputs)
-        if result:
-            for pub_key in node.neighbors:
-                dst_addr = node.neighbors[pub_key]
-                if dst_addr.hostname not in message.data['passed_nodes']:
-                    copy_msg = message.copy
-                    copy_msg.src_addr = self.pbcoin.network.addr
-                    copy_msg.dst_addr = dst_addr
-                    await self.connect_and_send(dst_addr, copy_msg.create_message(self.pbcoin.network.addr), False)
-            ok_message = Message(True, ConnectionCode.OK_MESSAGE, message.addr)
-            await node.write(peer.writer, ok_message.create_message(node.addr), True)
+        return Trx(self.pbcoin.blockchain.height,
+                   public_key,
+                   inputs, outputs, time, sig)
+
+    async def relay_transactions(self, trx_hashes: List[str], passed_nodes: List[str],
+                                 node: Node) -> None:
+        """(async) Sends the mempool transactions in one message to the neighbors that
+        they have not passed from them."""
+        transactions = [{"trx": trx.get_data(with_hash=True),
+                         "signature": encode_signature(trx.signature),
+                         "public_key": trx.public_key}
+                        for trx in map(self.pbcoin.mempool.transactions.get, trx_hashes)
+                        if trx is not None]
+        if not transactions:
+            return
+        message = Message(True, ConnectionCode.ADD_TRX, node.addr)
+        if len(transactions) == 1:
+            message = message.create_data(**transactions[0], passed_nodes=passed_nodes)
         else:
-            error = Message(False, Errno.BAD_TRANSACTION, message.addr)
-            await node.write(peer.writer, error.create_message(node.addr), True)
+            message = message.create_data(transactions=transactions, passed_nodes=passed_nodes)
+        for dst_addr in list(node.neighbors.values()):
+            if dst_addr.hostname not in passed_nodes:
+                message.addr = dst_addr
+                await node.connect_and_send(dst_addr, message.create_message(node.addr), False)
 
     async def handle_ping(self, message: Message, peer: Peer, node: Node):
         """(async) Handles a ping message to check the connection. Just Pong it!"""
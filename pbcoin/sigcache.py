@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Iterable, List, Optional, Tuple
+
+import pbcoin.config as conf
+from pbcoin.utils.address import Address
+
+# (trx hash, signature (r, s), public key)
+SignatureKey = Tuple[str, Tuple[int, int], str]
+
+
+class SignatureCache:
+    """A bounded LRU cache of the signatures that have been verified successfully.
+
+    A transaction that has been verified when it's added to the mempool is not
+    verified again when it arrives in a mined block.
+
+    Attributes
+    ----------
+    hits: int
+        The number of lookups that have been found in the cache.
+    misses: int
+        The number of lookups that have not been found in the cache.
+    """
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        Parameters
+        ----------
+        max_size: Optional[int] = None
+            The maximum number of kept signatures. If it's None, it is read from
+            `signature_cache_size` of configs.
+        """
+        self._max_size = max_size
+        self._entries: OrderedDict[SignatureKey, None] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is None:
+            return conf.settings.glob.signature_cache_size
+        return self._max_size
+
+    def add(self, trx_hash: str, sig: Tuple[int, int], public_key: str) -> None:
+        """Adds a signature that has been verified"""
+        key = (trx_hash, tuple(sig), public_key)
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def is_verified(self, trx_hash: str, sig: Tuple[int, int], public_key: str) -> bool:
+        """Checks the signature has been verified and counts hits and misses"""
+        key = (trx_hash, tuple(sig), public_key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def verify(self, trx_hash: str, sig: Tuple[int, int], public_key: str) -> bool:
+        """Verifies the signature if it is not in the cache and adds it if it's valid
+
+        See Also
+        --------
+        `Address.verify()`
+        """
+        if self.is_verified(trx_hash, sig, public_key):
+            return True
+        if not Address.verify(trx_hash, sig, public_key, from_b64=True):
+            return False
+        self.add(trx_hash, sig, public_key)
+        return True
+
+    def invalid_signatures(self, items: Iterable[SignatureKey]) -> List[int]:
+        """Verifies the signatures that are not in the cache together in a batch,
+        adds the valid ones to the cache and returns the indexes of invalid items
+
+        See Also
+        --------
+        `Address.invalid_signatures()`
+        """
+        items = list(items)
+        not_cached = [i for i, item in enumerate(items) if not self.is_verified(*item)]
+        invalid = Address.invalid_signatures([items[i] for i in not_cached], from_b64=True)
+        invalid_indexes = [not_cached[i] for i in invalid]
+        invalid_set = set(invalid_indexes)
+        for i in not_cached:
+            if i not in invalid_set:
+                self.add(*items[i])
+        return invalid_indexes
+
+    def verify_batch(self, items: Iterable[SignatureKey]) -> bool:
+        """Returns True if all signatures are valid (by the cache or verifying them)"""
+        return not self.invalid_signatures(items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self) -> dict:
+        """The size of the cache and its hits and misses counters"""
+        return {"size": len(self), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: SignatureKey) -> bool:
+        trx_hash, sig, public_key = key
+        return (trx_hash, tuple(sig), public_key) in self._entries
+
+
+# The cache that is shared by the mempool and the block validation
+signature_cache = SignatureCache()
@@ -1,16 +1,58 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, NewType, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from copy import deepcopy
 from datetime import datetime
+import json
 from hashlib import sha256
 
 from pbcoin.constants import SUBSIDY
+from pbcoin.utils.address import canonical_public_key
+from pbcoin.utils.tuple_util import decode_signature, encode_signature
+if TYPE_CHECKING:
+    from pbcoin.utxo import CoinsView
 
 
-ALL_COINS_TYPE = NewType("ALL_COINS_TYPE", Dict[str, List["Coin"]])
+class Freezable:
+    """A base class for the objects that become immutable after `freeze()`, so they
+    could be shared (like between the mempool and the blocks) without copying.
 
+    Setting an attribute of a frozen object raises AttributeError and its deep copy is
+    itself.
+    """
+    __slots__ = ("_frozen",)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if self.is_frozen:
+            raise AttributeError(f"{type(self).__name__} is frozen, {name} can not be set")
+        object.__setattr__(self, name, value)
+
+    def freeze(self) -> None:
+        object.__setattr__(self, "_frozen", True)
+
+    @property
+    def is_frozen(self) -> bool:
+        return getattr(self, "_frozen", False)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {name: getattr(self, name)
+                for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ())
+                if hasattr(self, name)}
 
-class Coin:
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Freezable:
+        if self.is_frozen:
+            return self
+        new = object.__new__(type(self))
+        memo[id(self)] = new
+        new.__setstate__(deepcopy(self.__getstate__(), memo))
+        return new
+
+
+class Coin(Freezable):
     """
     Attributes
     ----------
@@ -29,6 +71,8 @@ class Coin:
     hash_coin: str
         Hash string of this coin (in hex).
     """
+    __slots__ = ("owner", "value", "created_trx_hash", "out_index", "trx_hash", "in_index",
+                 "hash_coin", "coin_hash")
 
     def __init__(
         self,
@@ -120,19 +164,20 @@ class Coin:
         cal_hash = sha256(
             (f"{self.value}{self.owner}{self.created_trx_hash}{self.in_index}").encode()
         ).hexdigest()
-        self.coin_hash = cal_hash
+        if not self.is_frozen:
+            self.coin_hash = cal_hash
         return cal_hash
 
     @property
     def __hash__(self) -> str:
         return self.calculate_hash() if not self.hash_coin else self.hash_coin
 
-    def check_input_coin(self, unspent_coins: ALL_COINS_TYPE) -> bool:
+    def check_input_coin(self, unspent_coins: CoinsView) -> bool:
         """Check the coin that is able to spent or not.
 
         Parameters
         ----------
-        unspent_coins: Optional[Dict[str, Coin]] = None
+        unspent_coins: CoinsView
             The coins that have not been spent yet. It's used to check
             the this coin is in it or not.
 
@@ -140,16 +185,10 @@ class Coin:
         ------
         True if coin is able to spent other wise return False
         """
-        trx_hash = self.created_trx_hash
-        my_unspent = unspent_coins.get(trx_hash, None)
-        if my_unspent is not None:
-            owner_coin = my_unspent[self.out_index]
-            if owner_coin.owner == self.owner:
-                return True
-            else:
-                return False
-        else:
+        entry = unspent_coins.get(self.created_trx_hash, self.out_index)
+        if entry is None:
             return False
+        return entry.owner == self.owner and entry.value == self.value
 
     def spend(self, trx_hash: str, in_index: int):
         """sets the coin has been spent"""
@@ -161,9 +200,12 @@ class Coin:
         return self.trx_hash is not None
 
 
-class Trx:
+class Trx(Freezable):
     """Transaction class
 
+    A transaction is frozen (with its coins) when it's added to the mempool, so it is
+    shared by the mempool and the blocks and it should not be changed after that.
+
     Attribute
     ---------
         hash_trx: str
@@ -185,7 +227,14 @@ class Trx:
             The amount of coins which have been sent.
         time: float
             Time which trx is made
+        public_key: str
+            The public key of the sender (in base64) that the signature is checked by it.
+        signature: Optional[Tuple[int, int]]
+            The signature (r, s) of the sender on trx hash. It's None for the
+            generic trx and the transactions that have not been signed.
     """
+    __slots__ = ("time", "senders", "recipients", "value", "hash_trx", "outputs", "inputs",
+                 "is_generic", "public_key", "include_block", "signature")
 
     def __init__(
         self,
@@ -194,6 +243,7 @@ class Trx:
         inputs: Optional[List[Coin]] = None,
         outputs: Optional[List[Coin]] = None,
         time: Optional[float] = None,
+        signature: Optional[Tuple[int, int]] = None,
     ) -> None:
         """initializes object attribute based on being necessary"""
         self.time = datetime.utcnow().timestamp() if not time else time
@@ -217,6 +267,7 @@ class Trx:
             self.is_generic = False
         self.public_key = sender_key  # TODO: should be lists
         self.include_block = include_block_
+        self.signature = signature
 
     @staticmethod
     def make_trx(
@@ -246,7 +297,7 @@ class Trx:
         outputs = []
         inputs = []
         for coin in owner_coins:
-            if coin.owner == sender_key:
+            if canonical_public_key(coin.owner) == canonical_public_key(sender_key):
                 inputs.append(coin)
                 coin_output, remain_coin = coin.make_output(recipient_key, remain)
                 if remain_coin <= 0:
@@ -265,7 +316,12 @@ class Trx:
     def set_hash_coins(self):
         """Sets the output coins of trx to hash of this trx"""
         for i, in_coin in enumerate(self.inputs):
-            in_coin.spend(self.hash_trx, i)
+            if in_coin.is_frozen:
+                # a frozen coin (like an output of a mempool trx) is not changed
+                self.inputs[i] = Coin(in_coin.owner, in_coin.out_index,
+                                      in_coin.created_trx_hash, in_coin.value, self.hash_trx, i)
+            else:
+                in_coin.spend(self.hash_trx, i)
         for i, out_coin in enumerate(self.outputs):
             out_coin.created_trx_hash = self.hash_trx
             out_coin.out_index = i
@@ -277,9 +333,36 @@ class Trx:
         cal_hash = sha256(
             (f"{self.senders}{self.recipients}{self.value}{self.time}").encode()
         ).hexdigest()
-        self.hash_trx = cal_hash
+        if not self.is_frozen:
+            self.hash_trx = cal_hash
         return cal_hash
 
+    def freeze(self) -> None:
+        """Makes this transaction and its coins immutable. The lists of coins become
+        tuples."""
+        if self.is_frozen:
+            return
+        self.inputs = tuple(self.inputs)
+        self.outputs = tuple(self.outputs)
+        for coin in self.inputs + self.outputs:
+            coin.freeze()
+        super().freeze()
+
+    def frozen_copy(self, public_key: str, signature: Tuple[int, int]) -> Trx:
+        """Returns a frozen copy of this transaction with the public key and signature.
+        The coins are copied too (as spent inputs and outputs of the copy), so this
+        transaction and its coins are not changed."""
+        trx_hash = self.__hash__
+        inputs = [Coin(coin.owner, coin.out_index, coin.created_trx_hash, coin.value,
+                       trx_hash, index)
+                  for index, coin in enumerate(self.inputs)]
+        outputs = [Coin(coin.owner, index, trx_hash, coin.value)
+                   for index, coin in enumerate(self.outputs)]
+        new_trx = Trx(self.include_block, public_key, inputs, outputs, self.time, signature)
+        new_trx.is_generic = self.is_generic
+        new_trx.freeze()
+        return new_trx
+
     def get_data(self, with_hash=False, is_POSIX_timestamp=True) -> Dict[str, Any]:
         """Returns a dictionary from coin data.
 
@@ -314,20 +397,21 @@ class Trx:
             "include_block": self.include_block,
             "hash": self.__hash__,
         }
+        if self.signature is not None:
+            data["public_key"] = self.public_key
+            data["signature"] = encode_signature(self.signature)
         if with_hash:
             data["hash"] = self.__hash__
         return data
 
-    def check(self, unspent_coins: Dict[str, Any]) -> bool:
+    def check(self, unspent_coins: CoinsView) -> bool:
         """Checks this transaction is valid or not"""
         for index, coin in enumerate(self.inputs):
             # is input coin trx valid
             if coin is not None and not coin.check_input_coin(unspent_coins):
                 return False
-            # check equal input and output value
-            output_value = sum(out_coin.value for out_coin in self.outputs)
-            input_value = sum(in_coin.value for in_coin in self.inputs)
-            if output_value != input_value:
+            # check output value is not more than input value (the rest is the fee)
+            if self.fee < 0:
                 return False
             # check valid time
             if self.time <= datetime(2022, 1, 1).timestamp():
@@ -342,6 +426,48 @@ class Trx:
                 return False
         return True
 
+    def is_owned_by(self, public_key: str) -> bool:
+        """Checks all the input coins are owned by the public key (the signer), in
+        any format of the key (see `canonical_public_key()`)"""
+        owner = canonical_public_key(public_key)
+        return all(canonical_public_key(coin.owner) == owner for coin in self.inputs)
+
+    @property
+    def fee(self) -> int:
+        """The input value that is not spent in outputs (0 for the generic trx)"""
+        if self.is_generic:
+            return 0
+        return (sum(in_coin.value for in_coin in self.inputs)
+                - sum(out_coin.value for out_coin in self.outputs))
+
+    @property
+    def size(self) -> int:
+        """The size of this transaction data (as sent in blocks) in bytes"""
+        return len(json.dumps(self.get_data()).encode())
+
+    @staticmethod
+    def from_data(data: Dict[str, Any]) -> Trx:
+        """Makes a transaction from its data of `get_data()`"""
+        inputs = [
+            Coin(in_coin["owner"], in_coin["out_index"], in_coin["created_trx_hash"],
+                 in_coin["value"], in_coin.get("trx_hash"), in_coin.get("in_index"))
+            for in_coin in data["inputs"]
+        ]
+        outputs = [
+            Coin(out_coin["owner"], index, out_coin["created_trx_hash"], out_coin["value"])
+            for index, out_coin in enumerate(data["outputs"])
+        ]
+        if not inputs:
+            return Trx(data["include_block"], outputs[0].owner, time=data["time"])
+        return Trx(data["include_block"], data.get("public_key", ""), inputs, outputs,
+                   data["time"], Trx.signature_from_data(data))
+
+    @staticmethod
+    def signature_from_data(data: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """Returns the signature of trx data from `get_data()` or None if it's not signed"""
+        signature = data.get("signature")
+        return decode_signature(signature) if signature else None
+
     @property
     def __hash__(self) -> str:
         return self.calculate_hash() if not self.hash_trx else self.hash_trx
@@ -2,15 +2,20 @@
 from __future__ import annotations
 
 import os.path as opt
-from os import mkdir
+from os import mkdir, replace
 
 import base64
+import json
+import logging
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from hashlib import sha256
 from random import randint
-from typing import Optional, Tuple
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from pbcoin.utils.tuple_util import tuple_from_string, tuple_to_string
+import pbcoin.config as conf
 
 @dataclass
 class Curve:
@@ -21,8 +26,342 @@ class Curve:
     N: int
 
 
+# A point in Jacobian coordinates (X, Y, Z) is the affine point (X/Z^2, Y/Z^3) and
+# Z = 0 is the identity (point at infinity)
+JacobianPoint = Tuple[int, int, int]
+_INFINITY: JacobianPoint = (0, 1, 0)
+
+# The window size of wNAF for multiplying a point by a scalar
+WNAF_WINDOW = 5
+
+# The size of SEC encoding of a point in bytes
+POINT_COMPRESSED_SIZE = 33
+POINT_UNCOMPRESSED_SIZE = 65
+
+# The window size in bits of the precomputed table of the generator G
+G_TABLE_WINDOW = 8
+
+# The window size of wNAF of G in multi-scalar multiplication, that its odd multiples
+# up to (2^(w-1) - 1)G are taken from the first row of the table of G
+G_WNAF_WINDOW = G_TABLE_WINDOW + 1
+
+# The window size of wNAF of the public keys in verifying. Their odd multiples are
+# kept in `public_key_cache` so a wider window than WNAF_WINDOW pays off
+PUBLIC_KEY_WINDOW = 7
+
+
+def _jacobian_double(p: JacobianPoint, curve: Curve) -> JacobianPoint:
+    """Doubles a point in Jacobian coordinates without any inversion"""
+    x1, y1, z1 = p
+    if z1 == 0 or y1 == 0:
+        return _INFINITY
+    P = curve.P
+    y1_2 = y1 * y1 % P
+    s = 4 * x1 * y1_2 % P
+    m = 3 * x1 * x1
+    if curve.a:
+        m += curve.a * pow(z1, 4, P)
+    m %= P
+    x3 = (m * m - 2 * s) % P
+    y3 = (m * (s - x3) - 8 * y1_2 * y1_2) % P
+    z3 = 2 * y1 * z1 % P
+    return x3, y3, z3
+
+
+def _jacobian_add(p: JacobianPoint, q: JacobianPoint, curve: Curve) -> JacobianPoint:
+    """Adds two points in Jacobian coordinates without any inversion"""
+    x1, y1, z1 = p
+    x2, y2, z2 = q
+    if z1 == 0:
+        return q
+    if z2 == 0:
+        return p
+    P = curve.P
+    z1_2 = z1 * z1 % P
+    u2 = x2 * z1_2 % P
+    s2 = y2 * z1_2 * z1 % P
+    if z2 == 1:
+        # mixed addition (q in affine) that is the case of precomputed points
+        u1 = x1
+        s1 = y1
+    else:
+        z2_2 = z2 * z2 % P
+        u1 = x1 * z2_2 % P
+        s1 = y1 * z2_2 * z2 % P
+    if u1 == u2:
+        if s1 != s2:
+            return _INFINITY
+        return _jacobian_double(p, curve)
+    h = (u2 - u1) % P
+    r = (s2 - s1) % P
+    h_2 = h * h % P
+    h_3 = h_2 * h % P
+    u1_h_2 = u1 * h_2 % P
+    x3 = (r * r - h_3 - 2 * u1_h_2) % P
+    y3 = (r * (u1_h_2 - x3) - s1 * h_3) % P
+    z3 = h * z1 % P if z2 == 1 else h * z1 * z2 % P
+    return x3, y3, z3
+
+
+def _jacobian_neg(p: JacobianPoint, curve: Curve) -> JacobianPoint:
+    return p[0], (-p[1]) % curve.P, p[2]
+
+
+def _to_affine(p: JacobianPoint, curve: Curve) -> Tuple[Optional[int], Optional[int]]:
+    """Converts a point from Jacobian coordinates to affine by one inversion"""
+    x, y, z = p
+    if z == 0:
+        return None, None
+    P = curve.P
+    z_inv = pow(z, -1, P)
+    z_inv_2 = z_inv * z_inv % P
+    return x * z_inv_2 % P, y * z_inv_2 * z_inv % P
+
+
+def _wnaf(n: int, width: int) -> List[int]:
+    """Returns the width-w non-adjacent form of n from the least significant digit.
+    All non zero digits are odd and less than 2^(w-1) in absolute value."""
+    digits = []
+    window = 1 << width
+    half = window >> 1
+    while n > 0:
+        if n & 1:
+            digit = n & (window - 1)
+            if digit >= half:
+                digit -= window
+            n -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        n >>= 1
+    return digits
+
+
+def _odd_multiples(p: JacobianPoint, width: int, curve: Curve) -> List[JacobianPoint]:
+    """Returns [P, 3P, 5P, ..., (2^(w-1) - 1)P] for wNAF multiplication"""
+    double_p = _jacobian_double(p, curve)
+    multiples = [p]
+    for _ in range((1 << (width - 2)) - 1):
+        multiples.append(_jacobian_add(multiples[-1], double_p, curve))
+    return multiples
+
+
+def _wnaf_mul(n: int,
+              multiples: List[JacobianPoint],
+              width: int,
+              curve: Curve
+) -> JacobianPoint:
+    """Multiplies n by a point from its precomputed odd multiples by wNAF method"""
+    result = _INFINITY
+    for digit in reversed(_wnaf(n, width)):
+        result = _jacobian_double(result, curve)
+        if digit > 0:
+            result = _jacobian_add(result, multiples[digit >> 1], curve)
+        elif digit < 0:
+            result = _jacobian_add(result, _jacobian_neg(multiples[(-digit) >> 1], curve), curve)
+    return result
+
+
+def _batch_to_affine(points: List[JacobianPoint], curve: Curve) -> List[JacobianPoint]:
+    """Normalizes the points (not identity) to Z = 1 by only one inversion
+    (Montgomery's trick)"""
+    P = curve.P
+    # prefix products of Z
+    products = []
+    acc = 1
+    for _, _, z in points:
+        acc = acc * z % P
+        products.append(acc)
+    inv = pow(acc, -1, P)
+    normalized: List[JacobianPoint] = [_INFINITY] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        x, y, z = points[i]
+        z_inv = inv * products[i - 1] % P if i else inv
+        inv = inv * z % P
+        z_inv_2 = z_inv * z_inv % P
+        normalized[i] = (x * z_inv_2 % P, y * z_inv_2 * z_inv % P, 1)
+    return normalized
+
+
+# The table of the generator G that table[i][j] is (j + 1) * 2^(w*i) * G in
+# Jacobian coordinates with Z = 1. It is built (or loaded) on the first use.
+_g_table: Optional[List[List[JacobianPoint]]] = None
+_g_table_lock = Lock()
+
+
+def _build_g_table(g: JacobianPoint, curve: Curve) -> List[List[JacobianPoint]]:
+    n_windows = -(-curve.N.bit_length() // G_TABLE_WINDOW)
+    row_size = (1 << G_TABLE_WINDOW) - 1
+    points = []
+    base = g
+    for _ in range(n_windows):
+        point = base
+        for _ in range(row_size):
+            points.append(point)
+            point = _jacobian_add(point, base, curve)
+        base = point  # 2^w * base
+    points = _batch_to_affine(points, curve)
+    return [points[i:i + row_size] for i in range(0, len(points), row_size)]
+
+
+def _load_g_table(path: str, g: JacobianPoint) -> Optional[List[List[JacobianPoint]]]:
+    """Loads the table of G from the disk cache or returns None if it is not valid"""
+    try:
+        with open(path, "r") as file:
+            data = json.load(file)
+        if data["window"] != G_TABLE_WINDOW:
+            return None
+        table = [[(int(x, 16), int(y, 16), 1) for x, y in row] for row in data["table"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if not table or table[0][0] != g:
+        return None
+    return table
+
+
+def _save_g_table(path: str, table: List[List[JacobianPoint]]) -> None:
+    data = {
+        "window": G_TABLE_WINDOW,
+        "table": [[(hex(x), hex(y)) for x, y, _ in row] for row in table]
+    }
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            json.dump(data, file)
+        replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"could not save the table of G in {path}: {e}")
+
+
+def _get_g_table() -> List[List[JacobianPoint]]:
+    """Returns the table of G. In the first call it is loaded from the path of
+    `g_table_path` config (if it is set) or is built and saved there."""
+    global _g_table
+    if _g_table is None:
+        with _g_table_lock:
+            if _g_table is None:
+                g = Address.G.jacobian
+                path = conf.settings.glob.g_table_path
+                table = _load_g_table(path, g) if path else None
+                if table is None:
+                    table = _build_g_table(g, Address.SECP256K1)
+                    if path:
+                        _save_g_table(path, table)
+                _g_table = table
+    return _g_table
+
+
+def _fixed_base_mul(n: int, curve: Curve) -> JacobianPoint:
+    """Multiplies n (0 <= n < N) by G from its precomputed table without doubling"""
+    table = _get_g_table()
+    mask = (1 << G_TABLE_WINDOW) - 1
+    result = _INFINITY
+    i = 0
+    while n:
+        digit = n & mask
+        if digit:
+            result = _jacobian_add(result, table[i][digit - 1], curve)
+        n >>= G_TABLE_WINDOW
+        i += 1
+    return result
+
+
+def _g_odd_multiples() -> List[JacobianPoint]:
+    """[G, 3G, 5G, ..., (2^(w-1) - 1)G] for wNAF of G from the table of G"""
+    return _get_g_table()[0][:1 << (G_WNAF_WINDOW - 1):2]
+
+
+def _multi_wnaf_mul(terms: List[Tuple[int, List[JacobianPoint], int]],
+                    curve: Curve
+) -> JacobianPoint:
+    """Computes the summation of n_i * P_i by Strauss's method (Shamir's trick): the
+    wNAF of all scalars are interleaved so the doublings are shared among them.
+
+    Parameters
+    ----------
+    terms: List[Tuple[int, List[JacobianPoint], int]]
+        The list of the scalar, the odd multiples of the point and the window size
+        of the odd multiples.
+    """
+    nafs = [(_wnaf(n, width), multiples) for n, multiples, width in terms]
+    result = _INFINITY
+    for i in range(max(len(naf) for naf, _ in nafs) - 1, -1, -1):
+        result = _jacobian_double(result, curve)
+        for naf, multiples in nafs:
+            if i >= len(naf):
+                continue
+            digit = naf[i]
+            if digit > 0:
+                result = _jacobian_add(result, multiples[digit >> 1], curve)
+            elif digit < 0:
+                result = _jacobian_add(result, _jacobian_neg(multiples[(-digit) >> 1], curve),
+                                       curve)
+    return result
+
+
+def _x_matches(p: JacobianPoint, r: int, curve: Curve) -> bool:
+    """Checks x of the point modulo N is r without converting it to affine"""
+    x, _, z = p
+    if z == 0:
+        return False
+    z_2 = z * z % curve.P
+    # x (mod P) could be r or r + N (if it's less than P)
+    while r < curve.P:
+        if x == r * z_2 % curve.P:
+            return True
+        r += curve.N
+    return False
+
+
+def _batch_inverse(values: List[int], modulo: int) -> List[int]:
+    """Inverses all the values (not zero) by only one inversion (Montgomery's trick)"""
+    products = []
+    acc = 1
+    for value in values:
+        acc = acc * value % modulo
+        products.append(acc)
+    inv = pow(acc, -1, modulo) if values else 1
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = inv * products[i - 1] % modulo
+        inv = inv * values[i] % modulo
+    if values:
+        inverses[0] = inv
+    return inverses
+
+
+def multi_mul(terms: List[Tuple[int, Point]]) -> Point:
+    """Computes the summation of n_i * P_i (for example u1*G + u2*Q of verifying)
+    faster than multiplying each point and adding them.
+
+    See Also
+    --------
+    `_multi_wnaf_mul()`
+    """
+    curve = terms[0][1]._curve
+    wnaf_terms = []
+    for n, point in terms:
+        assert point._curve == curve
+        if curve.N:
+            n %= curve.N
+        if n == 0 or point.is_identity():
+            continue
+        if curve == Address.SECP256K1 and point == Address.G:
+            wnaf_terms.append((n, _g_odd_multiples(), G_WNAF_WINDOW))
+        else:
+            wnaf_terms.append((n, _odd_multiples(point.jacobian, WNAF_WINDOW, curve), WNAF_WINDOW))
+    if not wnaf_terms:
+        return Point(None, None, curve)
+    return Point(*_to_affine(_multi_wnaf_mul(wnaf_terms, curve), curve), curve)
+
+
 class Point:
-    """This class is simple represent of a point in elliptic curve"""
+    """This class is simple represent of a point in elliptic curve
+
+    The arithmetic of scalar multiplication is done in Jacobian coordinates by wNAF
+    method and the result is converted to affine coordinates at the end. The
+    multiplications of the generator `Address.G` use its precomputed table.
+    """
     def __init__(self, x, y, curve: Curve):
         self._x = x
         self._y = y
@@ -31,7 +370,7 @@ class Point:
     def __add__(self, __o):
         assert __o._curve == self._curve
         if self.is_identity():
-            return Point(__o._x, __o._y, __o._p, __o._a)
+            return Point(__o._x, __o._y, __o._curve)
         elif __o.is_identity():
             return Point(self._x, self._y, self._curve)
         if self == __o:
@@ -45,6 +384,8 @@ class Point:
         return Point(x3, y3, self._curve)
 
     def _double(self):
+        if self.is_identity() or self._y == 0:
+            return Point(None, None, self._curve)
         s = ((3 * (self._x * self._x) + self._curve.a)
              * pow((2 * self._y), -1, self._curve.P))
         x3 = ((s * s) - (2 * self._x)) % self._curve.P
@@ -52,14 +393,25 @@ class Point:
         return Point(x3, y3, self._curve)
 
     def __rmul__(self, n):
-        if n == 0:
-            return Point(None, None, None, None)
-        elif n == 1:
+        if self._curve.N:
+            n %= self._curve.N
+        if n == 0 or self.is_identity():
+            return Point(None, None, self._curve)
+        if n == 1:
             return Point(self._x, self._y, self._curve)
-        if n % 2 == 0:
-            return (self + ((n-1) * self))
+        if self._curve == Address.SECP256K1 and self == Address.G:
+            result = _fixed_base_mul(n, self._curve)
         else:
-            return (self + ((n//2) * (self + self)))
+            multiples = _odd_multiples(self.jacobian, WNAF_WINDOW, self._curve)
+            result = _wnaf_mul(n, multiples, WNAF_WINDOW, self._curve)
+        return Point(*_to_affine(result, self._curve), self._curve)
+
+    @property
+    def jacobian(self) -> JacobianPoint:
+        """This point in Jacobian coordinates"""
+        if self.is_identity():
+            return _INFINITY
+        return self._x, self._y, 1
 
     def is_identity(self):
         return self._x is None
@@ -80,26 +432,140 @@ class Point:
         elif isinstance(i, str):
             if i.lower() == "x":
                 return self._x
-            elif i.lower() == "x":
+            elif i.lower() == "y":
                 return self._y
         raise ValueError()
 
     @staticmethod
     def from_str(string: str, curve: Optional[Curve] = None, from_b64=False):
+        """Makes a point from a string that is one of these formats (or base64 of them
+        if from_b64 is True):
+        - compressed point: 33 bytes (or 66 hex) 0x02/0x03 || x
+        - uncompressed point: 65 bytes (or 130 hex) 0x04 || x || y
+        - legacy: hex of x and y with the same length (`tuple_to_string()`)
+        """
         if from_b64:
-            string = base64.b64decode(string).decode()
+            raw = base64.b64decode(string)
+            if (len(raw) == POINT_COMPRESSED_SIZE and raw[0] in (2, 3)
+                    or len(raw) == POINT_UNCOMPRESSED_SIZE and raw[0] == 4):
+                return Point.from_bytes(raw, curve)
+            string = raw.decode()
         if string.startswith("0x"):
             string = string[2:]
+        if (len(string) == 2 * POINT_COMPRESSED_SIZE and string[:2] in ("02", "03")
+                or len(string) == 2 * POINT_UNCOMPRESSED_SIZE and string[:2] == "04"):
+            return Point.from_bytes(bytes.fromhex(string), curve)
         length = len(string) // 2
         x = int(string[:length], 16)
         y = int(string[length:], 16)
         return Point(x, y, curve)
 
+    @staticmethod
+    def from_bytes(data: bytes, curve: Curve):
+        """Makes a point from its SEC encoding (compressed or uncompressed). The y of a
+        compressed point is found by the curve equation.
+
+        Raises
+        ------
+        ValueError
+            If data is not a valid encoding or x is not on the curve.
+        """
+        size = POINT_COMPRESSED_SIZE - 1
+        if len(data) == POINT_UNCOMPRESSED_SIZE and data[0] == 4:
+            x = int.from_bytes(data[1:1 + size], "big")
+            y = int.from_bytes(data[1 + size:], "big")
+            return Point(x, y, curve)
+        if len(data) != POINT_COMPRESSED_SIZE or data[0] not in (2, 3):
+            raise ValueError("bad encoded point")
+        x = int.from_bytes(data[1:], "big")
+        P = curve.P
+        if x >= P:
+            raise ValueError("x of point is not in the field")
+        rhs = (x * x * x + curve.a * x + curve.b) % P
+        # the square root for P = 3 (mod 4) like SECP256K1
+        y = pow(rhs, (P + 1) // 4, P)
+        if y * y % P != rhs:
+            raise ValueError("x of point is not on the curve")
+        if y & 1 != data[0] & 1:
+            y = P - y
+        return Point(x, y, curve)
+
+    def to_bytes(self, compressed=True) -> bytes:
+        """The SEC encoding of this point (33 bytes compressed or 65 bytes)"""
+        size = POINT_COMPRESSED_SIZE - 1
+        x = self._x.to_bytes(size, "big")
+        if compressed:
+            return bytes([2 + (self._y & 1)]) + x
+        return b"\x04" + x + self._y.to_bytes(size, "big")
+
     @property
     def tuple(self):
         return (self._x, self._y)
 
 
+class PublicKeyCache:
+    """A bounded LRU cache of the parsed public keys and their precomputed odd
+    multiples (in affine) for verifying, so verifying again for the same sender skips
+    both parsing and building the table.
+
+    Attributes
+    ----------
+    hits: int
+        The number of lookups that have been found in the cache.
+    misses: int
+        The number of lookups that have not been found in the cache.
+    """
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        Parameters
+        ----------
+        max_size: Optional[int] = None
+            The maximum number of kept public keys. If it's None, it is read from
+            `public_key_cache_size` of configs.
+        """
+        self._max_size = max_size
+        self._entries: OrderedDict[Tuple[str, bool], Optional[List[JacobianPoint]]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is None:
+            return conf.settings.glob.public_key_cache_size
+        return self._max_size
+
+    def get(self, key: Tuple[str, bool]) -> Tuple[bool, Optional[List[JacobianPoint]]]:
+        """Returns if the key is found and its odd multiples (None for a bad key)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple[str, bool], multiples: Optional[List[JacobianPoint]]) -> None:
+        with self._lock:
+            self._entries[key] = multiples
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# The cache of public keys that is used by `Address.verify` and `Address.verify_batch`
+public_key_cache = PublicKeyCache()
+
+
 class Address:
     """Generator address of wallet in SECP256K1 curve"""
     _MAX_SECRET_VALUE = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364140
@@ -146,7 +612,7 @@ class Address:
         public_key_path = opt.join(base_path, "key.pub")
         # write in files
         with open(public_key_path, "w") as f:
-            f.write(tuple_to_string(self.public.tuple, self.SECP256K1.N).decode())
+            f.write(base64.b64encode(self.public_key_bytes).decode())
         # TODO: write as PEM format
         private_key_path = opt.join(base_path, "key.sk")
         with open(private_key_path, "w") as f:
@@ -154,10 +620,13 @@ class Address:
 
     @property
     def public_key(self) -> str:
-        """in hex"""
-        return tuple_to_string(self.public.tuple,
-                               max_val=self.SECP256K1.N,
-                               to_b64=False)
+        """compressed public key in hex (66 characters)"""
+        return self.public.to_bytes().hex()
+
+    @property
+    def public_key_bytes(self) -> bytes:
+        """compressed public key (33 bytes)"""
+        return self.public.to_bytes()
 
     @staticmethod
     def load(base_path):
@@ -198,16 +667,166 @@ class Address:
     def verify(cls, message: str, sig: Tuple[int, int], public_key: str, from_b64=True) -> bool:
         """verify a message by r and s in sig parameter by its key"""
         r, s = sig
-        message = int(message, 16)
         N = cls.SECP256K1.N
-        if 1 > r and r >= N:
+        if not 1 <= r < N:
             raise ValueError("r is not in range (1, N-1)")
-        if 1 > s and s >= N:
+        if not 1 <= s < N:
             raise ValueError("s is not in range (1, N-1)")
-        inv = pow(s, -1, N)
-        u1 = ((message * inv) % N) * cls.G
-        u2 = ((r * inv) % N) * Point.from_str(public_key,
-                                              curve=cls.SECP256K1,
-                                              from_b64=from_b64)
-        v = u1 + u2
-        return (v[0] % N == r)
+        multiples = cls._public_tables([public_key], from_b64, raise_error=True)[public_key]
+        if multiples is None:
+            return False
+        return cls._verify_with_inverse(int(message, 16), r, pow(s, -1, N), multiples)
+
+    @classmethod
+    def _public_multiples(cls, public_key: str, from_b64=True) -> Optional[List[JacobianPoint]]:
+        """Returns the odd multiples of the public key for wNAF or None if the public
+        key is not a point of the curve"""
+        public = Point.from_str(public_key, curve=cls.SECP256K1, from_b64=from_b64)
+        x, y = public.tuple
+        curve = cls.SECP256K1
+        if (y * y - x * x * x - curve.a * x - curve.b) % curve.P != 0:
+            return None
+        return _odd_multiples(public.jacobian, PUBLIC_KEY_WINDOW, curve)
+
+    @classmethod
+    def _public_tables(cls,
+                       public_keys: Iterable[str],
+                       from_b64=True,
+                       raise_error=False
+    ) -> Dict[str, Optional[List[JacobianPoint]]]:
+        """Returns the odd multiples of the public keys in affine (or None for a key that
+        is not a point of the curve) from `public_key_cache`. The keys that are not in the
+        cache are parsed and their multiples are normalized together by one inversion.
+
+        Parameters
+        ----------
+        raise_error: bool = False
+            If it's True, the error of parsing a bad public key is raised, otherwise
+            the key is not valid (None).
+        """
+        tables: Dict[str, Optional[List[JacobianPoint]]] = dict()
+        new_tables: Dict[str, List[JacobianPoint]] = dict()
+        for public_key in public_keys:
+            if public_key in tables or public_key in new_tables:
+                continue
+            found, multiples = public_key_cache.get((public_key, from_b64))
+            if found:
+                tables[public_key] = multiples
+                continue
+            try:
+                multiples = cls._public_multiples(public_key, from_b64)
+            except ValueError:
+                if raise_error:
+                    raise
+                tables[public_key] = None
+                continue
+            if multiples is None:
+                tables[public_key] = None
+                public_key_cache.put((public_key, from_b64), None)
+            else:
+                new_tables[public_key] = multiples
+        normalized = _batch_to_affine(
+            [point for multiples in new_tables.values() for point in multiples], cls.SECP256K1)
+        n_multiples = 1 << (PUBLIC_KEY_WINDOW - 2)
+        for i, public_key in enumerate(new_tables):
+            multiples = normalized[i * n_multiples:(i + 1) * n_multiples]
+            tables[public_key] = multiples
+            public_key_cache.put((public_key, from_b64), multiples)
+        return tables
+
+    @classmethod
+    def _verify_with_inverse(cls,
+                             message: int,
+                             r: int,
+                             s_inv: int,
+                             public_multiples: List[JacobianPoint]
+    ) -> bool:
+        """Checks x of (message/s)*G + (r/s)*Q is r by the inverse of s and the odd
+        multiples of the public key Q"""
+        curve = cls.SECP256K1
+        u1 = message * s_inv % curve.N
+        u2 = r * s_inv % curve.N
+        v = _multi_wnaf_mul([(u1, _g_odd_multiples(), G_WNAF_WINDOW),
+                             (u2, public_multiples, PUBLIC_KEY_WINDOW)], curve)
+        return _x_matches(v, r, curve)
+
+    @classmethod
+    def _verify_many(cls,
+                     items: Iterable[Tuple[str, Tuple[int, int], str]],
+                     from_b64=True
+    ) -> Iterator[bool]:
+        """Yields the result of verifying of each item. The inverses of all s and the
+        odd multiples of the public keys that are not cached (each key once) are
+        calculated together by only two inversions. The items that have a bad
+        signature, message or public key are not valid (no raising)."""
+        items = list(items)
+        N = cls.SECP256K1.N
+        well_formed = [
+            1 <= sig[0] < N and 1 <= sig[1] < N
+            for _, sig, _ in items
+        ]
+        inverses = iter(_batch_inverse(
+            [sig[1] for (_, sig, _), ok in zip(items, well_formed) if ok], N
+        ))
+        public_multiples = cls._public_tables((key for _, _, key in items), from_b64)
+        for (message, (r, _), public_key), ok in zip(items, well_formed):
+            if not ok:
+                yield False
+                continue
+            s_inv = next(inverses)
+            multiples = public_multiples[public_key]
+            try:
+                message = int(message, 16)
+            except ValueError:
+                multiples = None
+            yield multiples is not None and cls._verify_with_inverse(message, r, s_inv, multiples)
+
+    @classmethod
+    def verify_batch(cls,
+                     items: Iterable[Tuple[str, Tuple[int, int], str]],
+                     from_b64=True
+    ) -> bool:
+        """Verifies many signatures together and returns True if all of them are valid.
+        It stops at the first invalid signature.
+
+        Parameters
+        ----------
+        items: Iterable[Tuple[str, Tuple[int, int], str]]
+            The message hashes (in hex), the signatures (r, s) and the public keys.
+        from_b64: bool = True
+            The public keys are in base64 or not.
+
+        See Also
+        --------
+        `Address.invalid_signatures()`: to find which items are not valid.
+        """
+        return all(cls._verify_many(items, from_b64))
+
+    @classmethod
+    def invalid_signatures(cls,
+                           items: Iterable[Tuple[str, Tuple[int, int], str]],
+                           from_b64=True
+    ) -> List[int]:
+        """Returns the indexes of items that their signatures are not valid
+
+        See Also
+        --------
+        `Address.verify_batch()`
+        """
+        return [i for i, valid in enumerate(cls._verify_many(items, from_b64)) if not valid]
+
+
+@lru_cache(maxsize=4096)
+def canonical_public_key(key: str) -> str:
+    """Returns base64 of the compressed encoding of a public key that is in one of the
+    formats of `Point.from_str()` (in base64), so the same key in the legacy and the
+    compact formats is the same owner. If key is not a public key, it's returned itself.
+    """
+    try:
+        raw = base64.b64decode(key)
+        if len(raw) == POINT_COMPRESSED_SIZE and raw[0] in (2, 3):
+            return key
+        point = Point.from_str(key, curve=Address.SECP256K1, from_b64=True)
+    except ValueError:
+        return key
+    return base64.b64encode(point.to_bytes()).decode()
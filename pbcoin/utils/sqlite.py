@@ -88,6 +88,13 @@ class Sqlite:
             return []
         return q
 
+    def columns(self, table_name: str) -> List[str]:
+        """Returns the column names of the table (empty if the table does not exist)"""
+        return [row[1] for row in self._query("PRAGMA table_info(", table_name, ")")]
+
+    def add_column(self, table_name: str, name: str, type_: str):
+        self.execute("ALTER TABLE", table_name, "ADD COLUMN", name, type_)
+
     def _query(self, *args):
         self.execute(*args)
         return self._cur.fetchall()
@@ -22,3 +22,24 @@ def tuple_from_string(string: str, from_b64=True):
     val1 = int(string[:length], 16)
     val2 = int(string[length:], 16)
     return (val1, val2)
+
+
+# The size of each value of a raw signature (r || s) in bytes
+SIGNATURE_VALUE_SIZE = 32
+
+
+def encode_signature(sig: Tuple[int, int]) -> str:
+    """Encodes a signature (r, s) as base64 of 64 bytes r || s (big endian)"""
+    r, s = sig
+    raw = r.to_bytes(SIGNATURE_VALUE_SIZE, "big") + s.to_bytes(SIGNATURE_VALUE_SIZE, "big")
+    return base64.b64encode(raw).decode()
+
+
+def decode_signature(string: str) -> Tuple[int, int]:
+    """Decodes a signature from `encode_signature()` or the legacy format of
+    `tuple_to_string()` (base64 of hex)"""
+    raw = base64.b64decode(string)
+    if len(raw) != 2 * SIGNATURE_VALUE_SIZE:
+        return tuple_from_string(raw.decode(), from_b64=False)
+    return (int.from_bytes(raw[:SIGNATURE_VALUE_SIZE], "big"),
+            int.from_bytes(raw[SIGNATURE_VALUE_SIZE:], "big"))
@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from threading import RLock
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from pbcoin.trx import Coin
+from pbcoin.utils.address import canonical_public_key
+
+
+# An output of a transaction is addressed by (created trx hash, out index)
+OutPoint = Tuple[str, int]
+
+
+class UTXOEntry(NamedTuple):
+    """The data of an unspent output coin that is needed to spend it"""
+    owner: str
+    value: int
+
+
+class BlockUndo:
+    """The changes that connecting a block makes in the unspent coins, which are used
+    for disconnecting the block exactly.
+
+    The coins that are created and spent in the same block are not kept.
+
+    Attributes
+    ----------
+    spent: List[Tuple[OutPoint, UTXOEntry]]
+        The coins that existed before the block and have been spent (or replaced)
+        by the block in order.
+    created: Set[OutPoint]
+        The coins that have been created by the block and are unspent.
+    """
+    def __init__(self):
+        self.spent: List[Tuple[OutPoint, UTXOEntry]] = []
+        self.created: Set[OutPoint] = set()
+
+    def __len__(self) -> int:
+        return len(self.spent) + len(self.created)
+
+
+class CoinsView(ABC):
+    """The interface of unspent coins that blocks are connected to or disconnected
+    from. The subclasses should implement `get`, `add`, `spend` and `has_outputs_of`.
+
+    Attributes
+    ----------
+    lock: RLock
+        The lock that should be held for changing the coins from other threads.
+    """
+    lock: RLock
+
+    @abstractmethod
+    def get(self, trx_hash: str, out_index: int) -> Optional[UTXOEntry]:
+        """Returns the unspent coin entry or None if it's not unspent"""
+
+    @abstractmethod
+    def add(self,
+            trx_hash: str,
+            out_index: int,
+            owner: str,
+            value: int,
+            undo: Optional[BlockUndo] = None
+    ) -> None:
+        """Adds an unspent coin. If undo is passed, the change is recorded in it."""
+
+    @abstractmethod
+    def spend(self,
+              trx_hash: str,
+              out_index: int,
+              undo: Optional[BlockUndo] = None
+    ) -> Optional[UTXOEntry]:
+        """Removes the coin and returns its entry or None if it's not unspent. If undo
+        is passed, the change is recorded in it."""
+
+    @abstractmethod
+    def has_outputs_of(self, trx_hash: str) -> bool:
+        """Checks any output of the transaction is unspent"""
+
+    def add_coin(self, coin: Coin, undo: Optional[BlockUndo] = None) -> None:
+        """Adds an output coin of a transaction as an unspent coin"""
+        self.add(coin.created_trx_hash, coin.out_index, coin.owner, coin.value, undo)
+
+    def disconnect(self, undo: BlockUndo) -> None:
+        """Reverts the changes that are recorded in undo"""
+        for trx_hash, out_index in undo.created:
+            self.spend(trx_hash, out_index)
+        for (trx_hash, out_index), entry in reversed(undo.spent):
+            self.add(trx_hash, out_index, entry.owner, entry.value)
+
+    def view(self) -> UTXOView:
+        """Returns a new overlay view on this coins"""
+        return UTXOView(self)
+
+    def __contains__(self, outpoint: OutPoint) -> bool:
+        return self.get(*outpoint) is not None
+
+
+class UTXOSet(CoinsView):
+    """The set of unspent transaction outputs (coins)
+
+    The coins are kept by their outpoint (created_trx_hash, out_index), so adding,
+    spending and looking up a coin are O(1). It also keeps an index from the owner
+    addresses to their coins for wallets. The index is by `canonical_public_key()`,
+    so the coins of a key in the legacy and the compact formats are found together.
+
+    Attributes
+    ----------
+    total_value: int
+        The summation of values of all unspent coins.
+    """
+    def __init__(self):
+        self._coins: Dict[OutPoint, UTXOEntry] = dict()
+        self._owners: Dict[str, Set[OutPoint]] = dict()
+        # the number of unspent outputs of each transaction
+        self._n_outputs: Dict[str, int] = dict()
+        self.total_value = 0
+        self.lock = RLock()
+
+    def add(self,
+            trx_hash: str,
+            out_index: int,
+            owner: str,
+            value: int,
+            undo: Optional[BlockUndo] = None
+    ) -> None:
+        """Adds an unspent coin. If the outpoint exists, it will be replaced.
+        If undo is passed, the change is recorded in it."""
+        outpoint = (trx_hash, out_index)
+        if outpoint in self._coins:
+            self.spend(trx_hash, out_index, undo)
+        self._coins[outpoint] = UTXOEntry(owner, value)
+        self._owners.setdefault(canonical_public_key(owner), set()).add(outpoint)
+        self._n_outputs[trx_hash] = self._n_outputs.get(trx_hash, 0) + 1
+        self.total_value += value
+        if undo is not None:
+            undo.created.add(outpoint)
+
+    def spend(self,
+              trx_hash: str,
+              out_index: int,
+              undo: Optional[BlockUndo] = None
+    ) -> Optional[UTXOEntry]:
+        """Removes the coin from the unspent coins.
+        If undo is passed, the change is recorded in it.
+
+        Return
+        ------
+        Optional[UTXOEntry]
+            The spent coin entry or None if the coin is not unspent.
+        """
+        outpoint = (trx_hash, out_index)
+        entry = self._coins.pop(outpoint, None)
+        if entry is None:
+            return None
+        owner = canonical_public_key(entry.owner)
+        owner_coins = self._owners[owner]
+        owner_coins.discard(outpoint)
+        if not owner_coins:
+            self._owners.pop(owner)
+        if self._n_outputs[trx_hash] == 1:
+            self._n_outputs.pop(trx_hash)
+        else:
+            self._n_outputs[trx_hash] -= 1
+        self.total_value -= entry.value
+        if undo is not None:
+            if outpoint in undo.created:
+                undo.created.discard(outpoint)
+            else:
+                undo.spent.append((outpoint, entry))
+        return entry
+
+    def get(self, trx_hash: str, out_index: int) -> Optional[UTXOEntry]:
+        """Returns the unspent coin entry or None if it's not unspent"""
+        return self._coins.get((trx_hash, out_index))
+
+    def has_outputs_of(self, trx_hash: str) -> bool:
+        """Checks any output of the transaction is unspent in O(1)"""
+        return trx_hash in self._n_outputs
+
+    def coins_of(self, owner: str) -> List[Coin]:
+        """Returns unspent coins of the owner as Coin objects (with the owner string
+        that they have been created with)"""
+        coins = []
+        for trx_hash, out_index in sorted(self._owners.get(canonical_public_key(owner), ())):
+            entry = self._coins[(trx_hash, out_index)]
+            coins.append(Coin(entry.owner, out_index, trx_hash, entry.value))
+        return coins
+
+    def balance(self, owner: str) -> int:
+        """The summation of unspent coins values of the owner"""
+        outpoints = self._owners.get(canonical_public_key(owner), ())
+        return sum(self._coins[outpoint].value for outpoint in outpoints)
+
+    def copy(self) -> UTXOSet:
+        """Returns a copy that its changes do not affect this set"""
+        new_set = UTXOSet()
+        new_set._coins = self._coins.copy()
+        new_set._owners = {owner: outpoints.copy() for owner, outpoints in self._owners.items()}
+        new_set._n_outputs = self._n_outputs.copy()
+        new_set.total_value = self.total_value
+        return new_set
+
+    def items(self):
+        return self._coins.items()
+
+    def __contains__(self, outpoint: OutPoint) -> bool:
+        return outpoint in self._coins
+
+    def __len__(self) -> int:
+        """the number of unspent coins"""
+        return len(self._coins)
+
+    def __iter__(self) -> Iterator[OutPoint]:
+        return iter(self._coins)
+
+    def __eq__(self, __o: object) -> bool:
+        if not isinstance(__o, UTXOSet):
+            return NotImplemented
+        return self._coins == __o._coins
+
+    def __repr__(self) -> str:
+        return f"UTXOSet({len(self)} coins, {self.total_value} value)"
+
+
+class UTXOView(CoinsView):
+    """A read-through overlay on other coins (a `UTXOSet` or another view)
+
+    The changes are kept in the view and the base does not change until `flush()`.
+    So a block or a fork can be checked and connected in a view and then the view is
+    flushed to the base in one batch or is just thrown away.
+
+    Attributes
+    ----------
+    base: CoinsView
+        The coins that this view is on them.
+    """
+    def __init__(self, base: CoinsView):
+        self.base = base
+        self.lock = RLock()
+        self._added: Dict[OutPoint, UTXOEntry] = dict()
+        # the outpoints of the base that are spent in this view
+        self._spent: Set[OutPoint] = set()
+        self._value_change = 0
+
+    def get(self, trx_hash: str, out_index: int) -> Optional[UTXOEntry]:
+        """Returns the unspent coin entry in this view or None if it's not unspent"""
+        outpoint = (trx_hash, out_index)
+        entry = self._added.get(outpoint)
+        if entry is not None:
+            return entry
+        if outpoint in self._spent:
+            return None
+        return self.base.get(trx_hash, out_index)
+
+    def has_outputs_of(self, trx_hash: str) -> bool:
+        """Checks any output of the transaction is unspent in this view. The outputs in
+        the base are not counted one by one, so if all of them have been spent in this
+        view, it's still True."""
+        return (any(outpoint[0] == trx_hash for outpoint in self._added)
+                or self.base.has_outputs_of(trx_hash))
+
+    def add(self,
+            trx_hash: str,
+            out_index: int,
+            owner: str,
+            value: int,
+            undo: Optional[BlockUndo] = None
+    ) -> None:
+        """Adds an unspent coin in this view. If the outpoint exists, it will be replaced.
+        If undo is passed, the change is recorded in it."""
+        outpoint = (trx_hash, out_index)
+        if self.get(trx_hash, out_index) is not None:
+            self.spend(trx_hash, out_index, undo)
+        self._added[outpoint] = UTXOEntry(owner, value)
+        self._value_change += value
+        if undo is not None:
+            undo.created.add(outpoint)
+
+    def spend(self,
+              trx_hash: str,
+              out_index: int,
+              undo: Optional[BlockUndo] = None
+    ) -> Optional[UTXOEntry]:
+        """Removes the coin from the unspent coins of this view.
+        If undo is passed, the change is recorded in it.
+
+        Return
+        ------
+        Optional[UTXOEntry]
+            The spent coin entry or None if the coin is not unspent.
+        """
+        outpoint = (trx_hash, out_index)
+        entry = self._added.pop(outpoint, None)
+        if entry is None:
+            entry = self.get(trx_hash, out_index)
+            if entry is None:
+                return None
+            self._spent.add(outpoint)
+        self._value_change -= entry.value
+        if undo is not None:
+            if outpoint in undo.created:
+                undo.created.discard(outpoint)
+            else:
+                undo.spent.append((outpoint, entry))
+        return entry
+
+    def flush(self) -> None:
+        """Writes the changes of this view to the base in one batch and clears them"""
+        with self.base.lock:
+            for trx_hash, out_index in self._spent:
+                self.base.spend(trx_hash, out_index)
+            for (trx_hash, out_index), entry in self._added.items():
+                self.base.add(trx_hash, out_index, entry.owner, entry.value)
+        self.discard()
+
+    def discard(self) -> None:
+        """Throws away the changes of this view"""
+        self._added = dict()
+        self._spent = set()
+        self._value_change = 0
+
+    @property
+    def total_value(self) -> int:
+        """The summation of values of all unspent coins in this view"""
+        return self.base.total_value + self._value_change
+
+    def __len__(self) -> int:
+        """the number of unspent coins in this view"""
+        return len(self.base) - len(self._spent) + len(self._added)
+
+    def __repr__(self) -> str:
+        return f"UTXOView(+{len(self._added)} -{len(self._spent)} coins on {self.base!r})"
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import pbcoin.config as conf
+from pbcoin.logger import getLogger
+from pbcoin.sigcache import SignatureKey, signature_cache
+from pbcoin.utils.address import Address
+
+logging = getLogger(__name__)
+
+
+def _invalid_signatures(items: List[SignatureKey]) -> List[int]:
+    """Returns the indexes of invalid signatures. It runs in the worker processes."""
+    return Address.invalid_signatures(items, from_b64=True)
+
+
+class SignatureVerifier:
+    """Verifies signatures out of the event loop, so a burst of new transactions
+    does not block the network handlers.
+
+    The signatures are verified in a pool of worker processes (or in a thread of the
+    loop executor if the pool is not started) and at most `max_in_flight` jobs are
+    waited for at the same time. The verified signatures are added to
+    `signature_cache` and the cached ones are not sent to the workers.
+
+    Attributes
+    ----------
+    n_workers: int
+        The number of worker processes. If it's 0, the verifications run in a thread
+        of the loop executor, which holds the GIL while verifying, so the event loop
+        is slowed down by them.
+    max_in_flight: int
+        The maximum number of verification jobs that run at the same time. The others
+        wait for them.
+    """
+    def __init__(self, n_workers: Optional[int] = None, max_in_flight: Optional[int] = None):
+        """
+        Parameters
+        ----------
+        n_workers: Optional[int] = None
+            If it's None, it is `verify_workers` from configs.
+        max_in_flight: Optional[int] = None
+            If it's None, it is `verify_queue_size` from configs.
+        """
+        self.n_workers = n_workers if n_workers is not None else conf.settings.glob.verify_workers
+        self.max_in_flight = (max_in_flight if max_in_flight is not None
+                              else conf.settings.glob.verify_queue_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """Starts the worker processes if n_workers is 1 or more"""
+        if self._pool is not None or self.n_workers < 1:
+            return
+        self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        logging.debug(f"signature verifier started with {self.n_workers} workers")
+
+    def stop(self) -> None:
+        """Stops the worker processes if they have been started"""
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, items: List[SignatureKey]) -> List[int]:
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, _invalid_signatures, items)
+
+    async def invalid_signatures(self, items: List[SignatureKey]) -> List[int]:
+        """(async) Verifies the signatures that are not in `signature_cache` (split
+        between the workers) and returns the indexes of invalid items.
+
+        See Also
+        --------
+        `SignatureCache.invalid_signatures()`
+        """
+        not_cached = [i for i, item in enumerate(items) if not signature_cache.is_verified(*item)]
+        if not not_cached:
+            return []
+        n_chunks = max(1, min(self.n_workers, len(not_cached)))
+        chunks = [not_cached[i::n_chunks] for i in range(n_chunks)]
+        results = await asyncio.gather(*[
+            self._run([items[i] for i in chunk]) for chunk in chunks
+        ])
+        invalid = set()
+        for chunk, chunk_invalid in zip(chunks, results):
+            invalid.update(chunk[i] for i in chunk_invalid)
+        for i in not_cached:
+            if i not in invalid:
+                signature_cache.add(*items[i])
+        return sorted(invalid)
+
+    async def verify(self, trx_hash: str, sig, public_key: str) -> bool:
+        """(async) Verifies a signature out of the event loop
+
+        See Also
+        --------
+        `SignatureCache.verify()`
+        """
+        return not await self.invalid_signatures([(trx_hash, sig, public_key)])
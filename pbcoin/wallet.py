@@ -8,12 +8,13 @@ import base64
 
 import pbcoin.config as conf
 from pbcoin.utils.address import Address
-from pbcoin.utils.tuple_util import tuple_to_string
+from pbcoin.utils.tuple_util import encode_signature
 if TYPE_CHECKING:
     from pbcoin.mempool import Mempool
     from pbcoin.network import Node
 
 from pbcoin.trx import Trx, Coin
+from pbcoin.utxo import UTXOSet
 
 #TODO: separate wallet from node
 #TODO: Write testcase for Wallet
@@ -31,7 +32,7 @@ class Wallet:
     _address: Address
 
     def __init__(self,
-                 unspent_coins: Dict[str, List[Coin]],
+                 unspent_coins: UTXOSet,
                  path_secret_key: str = r"./.key",  # TODO: use global variable
                  wallet_name: Optional[str] = None,
                  generate = True,
@@ -46,10 +47,9 @@ class Wallet:
             name for this wallet.
         generate = True
             Determines generates and saves key or uses an available key (if there exists)
-        unspent_coins: Optional[Dict[str, Coin]] = None
+        unspent_coins: UTXOSet
             The coins that have not been spent yet. It should be a global variable that
             will be updated. It's used to trace balance and own coins and update that.
-            If it's passed None, it gets that from `core.py` file.
 
         See Also
         --------
@@ -132,44 +132,29 @@ class Wallet:
         return self._address.sign(trx.__hash__)
 
     def base64Sign(self, trx) -> bytes:
-        """Signs data and return base 64 signature
+        """Signs data and return base 64 of the raw signature (r || s)
 
         See Also
         --------
         `Address.sign()`
+        `encode_signature()`
         """
-        return tuple_to_string(self.sign(trx),
-                               max_val=self._address.SECP256K1.N,
-                               to_b64=True).decode()
+        return encode_signature(self.sign(trx))
 
     @property
     def public_key(self) -> str:
-        """Base64 of public key"""
-        return base64.b64encode(self._address.public_key.encode()).decode()
+        """Base64 of compressed public key"""
+        return base64.b64encode(self._address.public_key_bytes).decode()
 
     @property
     def balance(self) -> int:
         """The summation of unspent output coins values that makes my balance"""
-        # TODO: THIS IS NOT EFFICIENT WAY
-        amount = 0
-        for created_trx_hash in self.unspent_coins:
-            coins = self.unspent_coins[created_trx_hash]
-            for coin in coins:
-                if coin.owner == self.public_key:
-                    amount += coin.value
-        return amount
+        return self.unspent_coins.balance(self.public_key)
 
     @property
-    def out_coins(self) -> Dict[str, Coin]:
+    def out_coins(self) -> Dict[str, List[Coin]]:
         """My unspent output coins that be available to spent"""
-        my_coins = dict()
-        for created_trx_hash in self.unspent_coins:
-            coins = self.unspent_coins[created_trx_hash]
-            for coin in coins:
-                if coin.owner == self.public_key:
-                    trx_coins = my_coins.get(coin.created_trx_hash, None)
-                    if trx_coins is None:
-                        my_coins[coin.created_trx_hash] = [coin]
-                    else:
-                        trx_coins.append(coin)
+        my_coins: Dict[str, List[Coin]] = dict()
+        for coin in self.unspent_coins.coins_of(self.public_key):
+            my_coins.setdefault(coin.created_trx_hash, []).append(coin)
         return my_coins
\ No newline at end of file
@@ -0,0 +1,161 @@
+import base64
+from hashlib import sha256
+from random import Random
+
+import pytest
+
+import pbcoin.config as conf
+from pbcoin.utils import address as addr
+from pbcoin.utils.address import Address, Point, PublicKeyCache, multi_mul
+from pbcoin.utils.tuple_util import decode_signature, encode_signature, tuple_to_string
+
+G = Address.G
+N = Address.SECP256K1.N
+
+
+def naive_mul(n: int, point: Point) -> Point:
+    """affine double-and-add as reference"""
+    result = Point(None, None, point._curve)
+    while n:
+        if n & 1:
+            result = result + point
+        point = point._double()
+        n >>= 1
+    return result
+
+
+class TestPoint:
+    @pytest.mark.parametrize("secret, x, y", [
+        (1, G[0], G[1]),
+        (2, 0xC6047F9441ED7D6D3045406E95C07CD85C778E4B8CEF3CA7ABAC09B95C709EE5,
+            0x1AE168FEA63DC339A3C58419466CEAEEF7F632653266D0E1236431A950CFE52A),
+        (3, 0xF9308A019258C31049344F85F89D5229B531C845836F99B08601F113BCE036F9,
+            0x388F7B0F632DE8140FE337E62A37F3566500A99934C2231B6CB9FD7584B8E672),
+    ])
+    def test_known_multiples(self, secret, x, y):
+        assert (secret * G).tuple == (x, y)
+
+    def test_scalar_mul(self):
+        rand = Random(0)
+        for n in [0, 1, 2, 15, 16, 17, N - 1, N, N + 1] + [rand.randrange(1, N) for _ in range(10)]:
+            assert n * G == naive_mul(n % N, G), f"Wrong multiplication for {n}"
+        point = 12345 * G
+        assert 678 * point == (12345 * 678) * G
+
+    def test_fixed_base_table(self):
+        """test the multiplications of G by its table are same as the other points"""
+        rand = Random(1)
+        for n in [1, 255, 256, 2 ** 255, N - 1] + [rand.randrange(1, N) for _ in range(10)]:
+            wnaf = addr._wnaf_mul(n, addr._odd_multiples(G.jacobian, addr.WNAF_WINDOW, G._curve),
+                                  addr.WNAF_WINDOW, G._curve)
+            assert (n * G).tuple == addr._to_affine(wnaf, G._curve)
+
+    def test_g_table_cache(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "g_table.json")
+        monkeypatch.setattr(conf.settings.glob, "g_table_path", path)
+        monkeypatch.setattr(addr, "_g_table", None)
+        table = addr._get_g_table()
+        assert addr._load_g_table(path, G.jacobian) == table
+        # a bad cache file is not used
+        with open(path, "w") as file:
+            file.write("{}")
+        monkeypatch.setattr(addr, "_g_table", None)
+        assert addr._get_g_table() == table
+        assert addr._load_g_table(path, G.jacobian) == table
+
+    def test_multi_mul(self):
+        rand = Random(2)
+        for _ in range(10):
+            u1, u2 = rand.randrange(N), rand.randrange(N)
+            point = rand.randrange(1, N) * G
+            assert multi_mul([(u1, G), (u2, point)]) == u1 * G + u2 * point
+        assert multi_mul([(5, G), (N - 5, G)]).is_identity()
+        assert multi_mul([(0, G)]).is_identity()
+
+    def test_encoding(self):
+        """test compressed and uncompressed points and the legacy format"""
+        rand = Random(3)
+        for _ in range(10):
+            point = rand.randrange(1, N) * G
+            compressed = point.to_bytes()
+            assert len(compressed) == 33
+            assert Point.from_bytes(compressed, G._curve) == point
+            assert Point.from_bytes(point.to_bytes(compressed=False), G._curve) == point
+            assert Point.from_str(base64.b64encode(compressed).decode(), G._curve, True) == point
+            assert Point.from_str(compressed.hex(), G._curve) == point
+            legacy = tuple_to_string(point.tuple, max_val=N)
+            assert Point.from_str(legacy.decode(), G._curve, True) == point
+        # x = 5 is not on the curve
+        with pytest.raises(ValueError):
+            Point.from_bytes(b"\x02" + (5).to_bytes(32, "big"), G._curve)
+
+    def test_identity(self):
+        identity = 0 * G
+        assert identity.is_identity()
+        assert (identity + G) == G
+        assert (G + identity) == G
+        assert ((N - 1) * G + G).is_identity()
+        assert G["x"] == G[0] and G["y"] == G[1]
+
+
+class TestAddress:
+    def test_sign_verify(self):
+        address = Address()
+        address.gen_secret()
+        address.gen_public()
+        message = sha256(b"message").hexdigest()
+        sig = address.sign(message)
+        assert Address.verify(message, sig, address.public_key, from_b64=False)
+        assert not Address.verify(sha256(b"other").hexdigest(), sig,
+                                  address.public_key, from_b64=False)
+        with pytest.raises(ValueError):
+            Address.verify(message, (0, sig[1]), address.public_key, from_b64=False)
+
+    def test_verify_batch(self):
+        addresses = []
+        for _ in range(3):
+            address = Address()
+            address.gen_secret()
+            address.gen_public()
+            addresses.append(address)
+        items = []
+        for i in range(10):
+            address = addresses[i % 3]
+            message = sha256(str(i).encode()).hexdigest()
+            public_key = base64.b64encode(address.public_key.encode()).decode()
+            items.append((message, address.sign(message), public_key))
+        assert Address.verify_batch(items)
+        assert Address.invalid_signatures(items) == []
+        assert Address.verify_batch([])
+        items[2] = (items[2][0], items[3][1], items[2][2])  # signature of other message
+        items[5] = (items[5][0], (0, N), items[5][2])  # out of range
+        items[7] = (items[7][0], items[7][1], items[8][2])  # other public key
+        assert not Address.verify_batch(items)
+        assert Address.invalid_signatures(items) == [2, 5, 7]
+
+    def test_public_key_cache(self, monkeypatch):
+        cache = PublicKeyCache(max_size=1)
+        monkeypatch.setattr(addr, "public_key_cache", cache)
+        address = Address()
+        address.gen_secret()
+        address.gen_public()
+        message = sha256(b"message").hexdigest()
+        sig = address.sign(message)
+        for _ in range(3):
+            assert Address.verify(message, sig, address.public_key, from_b64=False)
+        assert (cache.hits, cache.misses) == (2, 1)
+        # a point that is not on the curve is not valid and cached as a bad key
+        bad_key = f"{G[0]:064x}{G[1] + 1:064x}"
+        assert not Address.verify(message, sig, bad_key, from_b64=False)
+        assert cache.get((bad_key, False)) == (True, None)
+        assert len(cache) == 1
+
+    def test_signature_encoding(self):
+        address = Address()
+        address.gen_secret()
+        address.gen_public()
+        sig = address.sign(sha256(b"message").hexdigest())
+        encoded = encode_signature(sig)
+        assert len(base64.b64decode(encoded)) == 64
+        assert decode_signature(encoded) == sig
+        assert decode_signature(tuple_to_string(sig, max_val=N).decode()) == sig
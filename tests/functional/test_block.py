@@ -1,28 +1,49 @@
+import base64
 from datetime import datetime
 
 import pytest
 
-from pbcoin.block import Block, BlockValidationLevel
+from pbcoin.block import (
+    HEADER_SIZE,
+    Block,
+    BlockValidationLevel,
+    bits_to_difficulty,
+    difficulty_to_bits,
+    difficulty_to_target,
+    search_nonce
+)
 import pbcoin.config as conf
 from pbcoin.trx import Trx, Coin
+from pbcoin.utils.address import Address
+from pbcoin.utils.tuple_util import tuple_to_string
+from pbcoin.utxo import UTXOSet
 
 
 class TestBlock:
     @pytest.fixture
     def setUp_chain_trx(self, request):
-        """make n blocks with n transactions that from previous transaction's block"""
+        """make n blocks with n signed transactions that from previous transaction's block"""
         self.test_blocks: list[Block] = []
         self.all_trx: list[Trx] = []
-        self.unspent_coins: dict[str, Coin] = dict()
+        self.unspent_coins = UTXOSet()
+        self.addresses: list[Address] = []
+        for _ in range(request.param + 1):
+            address = Address()
+            address.gen_secret()
+            address.gen_public()
+            self.addresses.append(address)
+        owners = [base64.b64encode(address.public_key_bytes).decode()
+                  for address in self.addresses]
         for i in range(request.param):
             if i == 0:
                 new_block = Block("", i+1)
             else:
                 new_block = Block(self.test_blocks[-1].__hash__, i+1)
             if i == 0:
-                new_trx = Trx(1, f"owner{i}", [], [Coin(f"owner{i+1}", 0)])
+                new_trx = Trx(1, owners[i], [], [Coin(owners[i+1], 0)])
             else:
-                new_trx = Trx(1, f"owner{i}", self.all_trx[-1].outputs, [Coin(f"owner{i+1}", 0)])
+                new_trx = Trx(1, owners[i], self.all_trx[-1].outputs, [Coin(owners[i+1], 0)])
+            new_trx.signature = self.addresses[i].sign(new_trx.__hash__)
             self.all_trx.append(new_trx)
             new_block.add_trx(new_trx)
             self.test_blocks.append(new_block)
@@ -42,23 +63,38 @@ class TestBlock:
     @pytest.mark.parametrize("setUp_chain_trx", [1, 2, 3], indirect=True)
     def test_update_unspent_coins(self, setUp_chain_trx):
         """test update unspent coins for 1, 2, 3 transactions"""
-        unspent_coins = dict()
+        unspent_coins = UTXOSet()
         for block in self.test_blocks:
             block.update_outputs(unspent_coins)
-        assert unspent_coins == {self.all_trx[-1].__hash__: self.all_trx[-1].outputs}, \
+        last_outputs = self.all_trx[-1].outputs
+        assert set(unspent_coins) == {(coin.created_trx_hash, coin.out_index) for coin in last_outputs}, \
             "Problem in update the unspent coin from transactions"
+        assert unspent_coins.total_value == sum(coin.value for coin in last_outputs)
+
+    @pytest.mark.parametrize("setUp_chain_trx", [3], indirect=True)
+    def test_revert_unspent_coins(self, setUp_chain_trx):
+        """test reverting blocks gives the unspent coins before them"""
+        unspent_coins = UTXOSet()
+        snapshots = []
+        for block in self.test_blocks:
+            snapshots.append(unspent_coins.copy())
+            block.update_outputs(unspent_coins)
+        for block, snapshot in zip(reversed(self.test_blocks), reversed(snapshots)):
+            block.revert_outputs(unspent_coins)
+            assert unspent_coins == snapshot
+            assert unspent_coins.total_value == snapshot.total_value
 
     @pytest.mark.parametrize("setUp_chain_trx", [1, 2, 3], indirect=True)
     def test_validation_block_transactions(self, setUp_chain_trx):
         """test checking validation of transactions for 1, 2, 3 transactions"""
-        unspent_coins = dict()
+        unspent_coins = UTXOSet()
         for block in self.test_blocks:
             assert block.check_trx(unspent_coins), "Problem in validation of transaction"
             block.update_outputs(unspent_coins)
 
     @pytest.mark.parametrize("setUp_chain_trx", [2], indirect=True)
     def test_bad_input_coin_in_block_transaction(self, setUp_chain_trx):
-        unspent_coins = dict()
+        unspent_coins = UTXOSet()
         for i, block in enumerate(self.test_blocks):
             if i == (len(self.test_blocks) - 1):
                 block.transactions[0].inputs[0].trx_hash = ""  # destroy input coin
@@ -96,3 +132,82 @@ class TestBlock:
         assert block.is_valid_block(
             self.unspent_coins, pre_hash=self.test_blocks[-2].__hash__
         ) != BlockValidationLevel.ALL()
+
+    @pytest.mark.parametrize("setUp_chain_trx", [2], indirect=True)
+    def test_signed_block_transactions(self, setUp_chain_trx):
+        """test verifying signatures of block transactions also after sending them"""
+        unspent_coins = UTXOSet()
+        self.test_blocks[0].update_outputs(unspent_coins)
+        block = self.test_blocks[1]
+        trx = block.transactions[0]
+        public_key = trx.public_key
+        assert block.check_trx(unspent_coins)
+        received_block = Block.from_json_data_full(block.get_data())
+        assert received_block.transactions[0].signature == trx.signature
+        assert received_block.transactions[0].public_key == public_key
+        trx.signature = (trx.signature[0], trx.signature[1] + 1)
+        assert not block.check_trx(unspent_coins), "Accepted a bad signature"
+
+    @pytest.mark.parametrize("setUp_chain_trx", [2], indirect=True)
+    def test_unsigned_or_not_owned_block_transactions(self, setUp_chain_trx):
+        """test a spend in a block is rejected if it's not signed by the owner of its coins"""
+        unspent_coins = UTXOSet()
+        self.test_blocks[0].update_outputs(unspent_coins)
+        block = self.test_blocks[1]
+        trx = block.transactions[0]
+        signature = trx.signature
+        trx.signature = None
+        assert not block.check_trx(unspent_coins), "Accepted an unsigned spend"
+        # a valid signature of other key (not the owner of input coins)
+        other = self.addresses[0]
+        trx.public_key = base64.b64encode(other.public_key_bytes).decode()
+        trx.signature = other.sign(trx.__hash__)
+        assert not block.check_trx(unspent_coins), "Accepted a spend of other's coins"
+        # the owner key in the legacy format is the same owner
+        trx.public_key = base64.b64encode(
+            tuple_to_string(self.addresses[1].public.tuple, Address.SECP256K1.N,
+                            to_b64=False).encode()
+        ).decode()
+        trx.signature = signature
+        assert block.check_trx(unspent_coins)
+
+    def test_search_nonce_midstate(self):
+        """test the nonce found with the header midstate gives the same block hash"""
+        block = Block("", 1, Trx(1, "miner"))
+        difficulty = conf.settings.glob.difficulty
+        nonce = search_nonce(block.header_prefix(), difficulty_to_target(difficulty), 0, 1000)
+        assert nonce is not None, "Could not find any nonce"
+        block.set_nonce(nonce)
+        assert int(block.calculate_hash(), 16) <= difficulty
+        for bad_nonce in range(nonce):
+            block.set_nonce(bad_nonce)
+            assert int(block.calculate_hash(), 16) > difficulty, \
+                "Skipped a nonce that its hash is less than difficulty"
+
+    @pytest.mark.parametrize("setUp_chain_trx", [2], indirect=True)
+    def test_header_bytes(self, setUp_chain_trx):
+        """test serializing the binary header and making the block from it again"""
+        block = self.test_blocks[-1]
+        block.set_nonce(12345)
+        raw_header = block.serialize_header()
+        assert len(raw_header) == HEADER_SIZE
+        header_block = Block.from_header_bytes(raw_header, block.block_height)
+        assert header_block.__hash__ == block.calculate_hash()
+        assert header_block.previous_hash == block.previous_hash
+        assert header_block.merkle_tree.hash == block.merkle_tree.hash
+        assert header_block.time == block.time
+        assert header_block.nonce == block.nonce
+        assert header_block.serialize_header() == raw_header
+        # the first block has empty previous hash
+        first_block = Block.from_header_bytes(self.test_blocks[0].serialize_header(), 1)
+        assert first_block.previous_hash == ""
+
+    @pytest.mark.parametrize("difficulty", [
+        0, 1, 0x7fffff, 0x800000, conf.settings.glob.difficulty, (2 ** 256 - 1) >> 21
+    ])
+    def test_difficulty_bits(self, difficulty):
+        """test the compact difficulty is never more than the difficulty"""
+        decoded = bits_to_difficulty(difficulty_to_bits(difficulty))
+        assert decoded <= difficulty
+        assert decoded >> max(difficulty.bit_length() - 16, 0) == \
+            difficulty >> max(difficulty.bit_length() - 16, 0), "Lost too much precision"
@@ -8,6 +8,7 @@ import pbcoin.config as conf
 from pbcoin.block import Block, BlockValidationLevel
 from pbcoin.blockchain import BlockChain
 from pbcoin.trx import Coin, Trx
+from pbcoin.utxo import UTXOSet
 
 
 class TestBlockchain:
@@ -69,19 +70,22 @@ class TestBlockchain:
         indirect = True
     )
     def test_blockchain_checker(self, setup_blockchains):
-        res = BlockChain.check_blockchain(self.blockchains[0].blocks, {}, conf.settings.glob.difficulty)
+        res = BlockChain.check_blockchain(self.blockchains[0].blocks, UTXOSet(),
+                                          conf.settings.glob.difficulty)
         assert res == (True, None, BlockValidationLevel.ALL())
 
     @pytest.mark.parametrize("setup_blockchains", [(1, 3, (0,))], indirect = True)
     def test_bad_hash_blockchain_block_checker(self, setup_blockchains):
         self.blockchains[0].last_block.block_hash = hex(conf.settings.glob.difficulty + 2)
-        res = BlockChain.check_blockchain(self.blockchains[0].blocks, {}, conf.settings.glob.difficulty)
+        res = BlockChain.check_blockchain(self.blockchains[0].blocks, UTXOSet(),
+                                          conf.settings.glob.difficulty)
         assert res == (False, 2, BlockValidationLevel.ALL(BlockValidationLevel.DIFFICULTY))
 
     @pytest.mark.parametrize("setup_blockchains", [(1, 3, (0,))], indirect = True)
     def test_bad_previous_hash_blockchain_block_checker(self, setup_blockchains):
         self.blockchains[0].blocks[1].previous_hash = "0"
-        res = BlockChain.check_blockchain(self.blockchains[0].blocks, {}, conf.settings.glob.difficulty)
+        res = BlockChain.check_blockchain(self.blockchains[0].blocks, UTXOSet(),
+                                          conf.settings.glob.difficulty)
         assert res == (False, 1, BlockValidationLevel.ALL(BlockValidationLevel.PREVIOUS_HASH))
 
     @pytest.mark.parametrize("setup_blockchains", [(1, 3, (0,))], indirect = True)
@@ -89,7 +93,8 @@ class TestBlockchain:
         self.blockchains[0].blocks[1].add_trx(
             Trx(2, "owner1", [Coin("owner1", 0, value=20)], [Coin("owner2", 0, value=20)]))
         self.blockchains[0].blocks[1].transactions[0].hash_trx = "Bluh"
-        res = BlockChain.check_blockchain(self.blockchains[0].blocks, {}, conf.settings.glob.difficulty)
+        res = BlockChain.check_blockchain(self.blockchains[0].blocks, UTXOSet(),
+                                          conf.settings.glob.difficulty)
         assert (
             res[0] == False
             and res[1] == 1
@@ -123,7 +128,8 @@ class TestBlockchain:
         indirect=True
     )
     def test_resolve(self, setup_blockchains):
-        res = self.blockchains[0].resolve(self.blockchains[1].blocks, {}, conf.settings.glob.difficulty)
+        res = self.blockchains[0].resolve(self.blockchains[1].blocks, UTXOSet(),
+                                          conf.settings.glob.difficulty)
         assert res == (True, None, BlockValidationLevel.ALL()), \
             "Problem in resolve blockchain"
         assert self.blockchains[0].blocks == self.blockchains[1].blocks, \
@@ -137,17 +143,93 @@ class TestBlockchain:
     def test_do_not_resolve_bad_chain(self, setup_blockchains):
         last_block = self.blockchains[1].blocks[-1]
         last_block.previous_hash = "nonsense"  # bad previous hash
-        result = self.blockchains[0].resolve(self.blockchains[1].blocks, {}, conf.settings.glob.difficulty)
+        result = self.blockchains[0].resolve(self.blockchains[1].blocks, UTXOSet(),
+                                             conf.settings.glob.difficulty)
         actual = (False, 2, BlockValidationLevel.ALL(BlockValidationLevel.PREVIOUS_HASH))
         assert result == actual, "Problem in checking other blockchain for resolving"
         assert self.blockchains[0].blocks != self.blockchains[1].blocks, \
             "Problem in blocks added after resolve"
 
+    def test_resolve_unspent_coins(self):
+        """test the unspent coins after resolving are as same as connecting the new
+        blockchain from the first"""
+        def make_chain(blocks: List[Block], owners: List[str]) -> List[Block]:
+            blocks = list(blocks)
+            for owner in owners:
+                pre_hash = blocks[-1].__hash__ if blocks else ""
+                height = len(blocks) + 1
+                blocks.append(Block(pre_hash, height, Trx(height, owner)))
+                while True:
+                    blocks[-1].set_mined()
+                    if int(blocks[-1].calculate_hash(), 16) <= conf.settings.glob.difficulty:
+                        break
+                    blocks[-1].set_nonce(blocks[-1].nonce+1)
+            return blocks
+        same_blocks = make_chain([], ["miner"])
+        old_blocks = make_chain(same_blocks, ["old1", "old2"])
+        new_blocks = make_chain(same_blocks, ["new1", "new2", "new3"])
+        blockchain = BlockChain([])
+        unspent_coins = UTXOSet()
+        for block in old_blocks:
+            blockchain.add_new_block(block, unspent_coins, ignore_validation=True)
+        res = blockchain.resolve(new_blocks, unspent_coins, conf.settings.glob.difficulty)
+        assert res == (True, None, BlockValidationLevel.ALL())
+        expected = UTXOSet()
+        for block in new_blocks:
+            block.update_outputs(expected)
+        assert unspent_coins == expected, "Problem in reverting the old blocks"
+        assert unspent_coins.balance("old1") == 0
+        assert set(blockchain.undo_data) == {block.__hash__ for block in new_blocks}
+
+    @pytest.mark.parametrize("setup_blockchains", [(1, 4, (0,))], indirect=True)
+    def test_search(self, setup_blockchains):
+        blockchain = self.blockchains[0]
+        blocks = list(blockchain.blocks)
+        for index, block in enumerate(blocks):
+            assert blockchain.search(block.__hash__) == index
+            assert blockchain.has_block(block.__hash__)
+        assert blockchain.search("not exist") is None
+        # pruning the first block and popping the last block
+        blockchain._prune_first_block()
+        blockchain.disconnect_block(UTXOSet())
+        assert not blockchain.has_block(blocks[0].__hash__)
+        assert not blockchain.has_block(blocks[-1].__hash__)
+        assert blockchain.search(blocks[1].__hash__) == 0
+        assert blockchain.search(blocks[2].__hash__) == 1
+        blockchain.connect_block(blocks[-1])
+        assert blockchain.search(blocks[-1].__hash__) == 2
+
+    def test_trx_index_is_pruned(self):
+        """test the transactions of pruned and popped blocks are not kept"""
+        blocks = [Block("", 1, Trx(1, "miner1"))]
+        for i in range(2, 5):
+            blocks.append(Block(blocks[-1].__hash__, i, Trx(i, f"miner{i}")))
+        blockchain = BlockChain(blocks)
+        assert all(blockchain.has_trx(block.transactions[0].__hash__) for block in blocks)
+        blockchain._prune_first_block()
+        blockchain.disconnect_block(UTXOSet())
+        assert [blockchain.has_trx(block.transactions[0].__hash__) for block in blocks] == \
+            [False, True, True, False]
+
+    @pytest.mark.parametrize("setup_blockchains", [(2, 15, (3, 2))], indirect=True)
+    def test_locator(self, setup_blockchains):
+        blockchain, other = self.blockchains
+        locator = blockchain.get_locator()
+        hashes = blockchain.get_hashes()
+        assert locator[:10] == hashes[::-1][:10], "Last blocks should be in the locator"
+        assert locator[-1] == hashes[0], "The first block should be in the locator"
+        assert len(locator) < len(hashes)
+        # the last common block is the 15th one
+        assert other.find_fork(locator) == 14
+        assert blockchain.find_fork(other.get_locator()) == 14
+        assert blockchain.find_fork([]) == -1
+        assert BlockChain([]).get_locator() == []
+
     def test_last_block(self):
         chain = BlockChain([])
         assert chain.last_block is None, "Last block in empty blockchain is not None"
         assert chain.height == 0, "height of empty blockchain is not 0"
-        chain.add_new_block(Block("", 1), {}, ignore_validation=True)
+        chain.add_new_block(Block("", 1), UTXOSet(), ignore_validation=True)
         chain.blocks[0].set_mined()
         assert chain.last_block == chain.blocks[0], "Last block in blockchain is not correct"
         assert chain.height == 1, "height of block in blockchain is not correct"
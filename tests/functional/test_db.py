@@ -0,0 +1,28 @@
+from pbcoin.db import DB
+from pbcoin.utils.sqlite import Sqlite
+
+
+class TestDB:
+    def test_migrate_old_blocks_table(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        # the blocks table before adding version, bits and raw_header
+        with Sqlite(path) as db:
+            db.create_table("Blocks", {"hash": "VARCHAR(64) NOT NULL PRIMARY KEY",
+                                       "height": "BIGINT NOT NULL",
+                                       "nonce": "BIGINT",
+                                       "number_trx": "BIGINT",
+                                       "merkle_root": "VARCHAR(64)",
+                                       "previous_hash": "VARCHAR(64)",
+                                       "time": "DATETIME"})
+            db.insert({"hash": "00ab", "height": 1, "nonce": 7, "number_trx": 1,
+                       "merkle_root": "cd", "previous_hash": "", "time": 1}, "Blocks")
+        database = DB(path, "Blocks", "Trx", "Coins")
+        assert database.db.columns("Blocks")[-3:] == ["version", "bits", "raw_header"]
+        assert database.get_last_block()["raw_header"] is None
+        # it is not added again
+        database.migrate()
+        assert len(database.db.columns("Blocks")) == 10
+
+    def test_not_initialized(self, tmp_path):
+        database = DB(str(tmp_path / "new.db"), "Blocks", "Trx", "Coins")
+        assert database.db.columns("Blocks") == []
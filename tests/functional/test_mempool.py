@@ -0,0 +1,337 @@
+import base64
+from copy import deepcopy
+from threading import Thread
+
+import pytest
+
+from pbcoin.block import Block
+from pbcoin.blockchain import BlockChain
+from pbcoin.mempool import Mempool
+from pbcoin.sigcache import signature_cache
+from pbcoin.trx import Coin, Trx
+from pbcoin.utils.address import Address
+from pbcoin.utxo import UTXOSet
+
+
+class TestMempool:
+    @pytest.fixture
+    def setUp_coins(self):
+        """makes an address that has some unspent coins"""
+        self.address = Address()
+        self.address.gen_secret()
+        self.address.gen_public()
+        self.public_key = base64.b64encode(self.address.public_key.encode()).decode()
+        self.unspent_coins = UTXOSet()
+        self.coins = []
+        for i in range(5):
+            trx = Trx(1, self.public_key, [], [Coin(self.public_key, 0, value=10 + i)])
+            self.coins.append(trx.outputs[0])
+            self.unspent_coins.add_coin(trx.outputs[0])
+
+    def make_trx(self, coin: Coin, recipient: str = "recipient", fee: int = 0) -> Trx:
+        trx = Trx(2, self.public_key, [coin], [Coin(recipient, 0, value=coin.value - fee)])
+        trx.set_hash_coins()
+        return trx
+
+    def add(self, mempool: Mempool, trx: Trx) -> bool:
+        return mempool.add_new_transaction(trx, self.address.sign(trx.__hash__),
+                                           self.public_key, self.unspent_coins)
+
+    def test_add_new_transactions(self, setUp_coins):
+        mempool = Mempool()
+        transactions = [self.make_trx(coin) for coin in self.coins]
+        items = [(trx, self.address.sign(trx.__hash__), self.public_key) for trx in transactions]
+        items[1] = (items[1][0], items[2][1], self.public_key)  # bad signature
+        assert mempool.add_new_transactions(items, self.unspent_coins) == \
+            [True, False, True, True, True]
+        assert len(mempool) == 4
+        assert mempool.transactions[transactions[0].__hash__].signature == items[0][1]
+        # repeated transactions are not added again
+        assert mempool.add_new_transactions(items[:1], self.unspent_coins) == [False]
+
+    def test_threads(self, setUp_coins):
+        """test adding (like the network thread) while selecting (like the mining thread)"""
+        mempool = Mempool()
+        coins = []
+        for i in range(60):
+            trx = Trx(1, self.public_key, [], [Coin(self.public_key, 0, value=20 + i)])
+            coins.append(trx.outputs[0])
+            self.unspent_coins.add_coin(trx.outputs[0])
+        transactions = [self.make_trx(coin, fee=i % 7) for i, coin in enumerate(coins)]
+        items = [(trx, self.address.sign(trx.__hash__), self.public_key) for trx in transactions]
+        selections = []
+
+        def add():
+            for item in items:
+                assert mempool.add_new_transactions([item], self.unspent_coins) == [True]
+
+        adder = Thread(target=add)
+        adder.start()
+        while adder.is_alive():
+            selections.append([trx.__hash__ for trx in mempool.select_transactions()])
+        adder.join()
+        assert all(len(set(selection)) == len(selection) for selection in selections)
+        assert {trx.__hash__ for trx in mempool.select_transactions()} == \
+            {trx.__hash__ for trx in transactions}
+
+    def test_fee_priority(self, setUp_coins):
+        mempool = Mempool(max_limit_trx=2)
+        fees = [1, 5, 0, 3, 2]
+        transactions = [self.make_trx(coin, fee=fee) for coin, fee in zip(self.coins, fees)]
+        for trx in transactions:
+            assert trx.fee == fees[transactions.index(trx)]
+            assert self.add(mempool, trx)
+        # almost the same sizes so the order is by fee
+        by_fee = [transactions[i].__hash__ for i in (1, 3, 4, 0, 2)]
+
+        def selected(**kwargs):
+            return [trx.__hash__ for trx in mempool.select_transactions(**kwargs)]
+
+        assert selected() == by_fee
+        assert selected(max_count=3) == by_fee[:3]
+        two_size = sum(mempool.entries[trx_hash].size for trx_hash in by_fee[:2])
+        assert selected(max_bytes=two_size) == by_fee[:2]
+        assert mempool.in_mining_transactions == by_fee[:2]
+        # the selection does not change the mempool
+        assert selected() == by_fee
+        mempool.remove_transactions([by_fee[0]])
+        assert selected() == by_fee[1:]
+        assert mempool.in_mining_transactions == by_fee[1:3]
+
+    def test_output_more_than_input(self, setUp_coins):
+        trx = self.make_trx(self.coins[0], fee=-1)
+        assert not trx.check(self.unspent_coins)
+        assert not self.add(Mempool(), trx)
+
+    def test_double_spend(self, setUp_coins):
+        mempool = Mempool()
+        first = self.make_trx(self.coins[0], recipient="first")
+        second = self.make_trx(self.coins[0], recipient="second", fee=1)
+        other = self.make_trx(self.coins[1])
+        assert self.add(mempool, first)
+        assert mempool.spent_outpoints[(self.coins[0].created_trx_hash, 0)] == first.__hash__
+        assert mempool.conflicts(second) == {first.__hash__}
+        assert not self.add(mempool, second)
+        items = [(trx, self.address.sign(trx.__hash__), self.public_key)
+                 for trx in (second, other)]
+        assert mempool.add_new_transactions(items, self.unspent_coins) == [False, True]
+        assert len(mempool) == 2
+
+        # a block confirms the competing spend
+        assert mempool.remove_conflicts([second]) == {first.__hash__}
+        assert list(mempool.transactions) == [other.__hash__]
+        assert (self.coins[0].created_trx_hash, 0) not in mempool.spent_outpoints
+        assert self.add(mempool, second)
+
+    def test_eviction(self, setUp_coins):
+        mempool = Mempool(max_transactions=3)
+        fees = [1, 5, 0, 3, 2]
+        transactions = [self.make_trx(coin, fee=fee) for coin, fee in zip(self.coins, fees)]
+        results = [self.add(mempool, trx) for trx in transactions]
+        # the lowest fee rate is evicted and the new one could be it
+        assert results == [True, True, True, True, True]
+        assert set(mempool.transactions) == {transactions[i].__hash__ for i in (1, 3, 4)}
+        assert mempool.evicted == 2
+        assert mempool.usage == sum(entry.memory for entry in mempool.entries.values())
+        assert mempool.max_usage >= mempool.usage
+
+        mempool = Mempool(max_size=1)
+        assert not self.add(mempool, transactions[0])
+        assert len(mempool) == 0 and mempool.usage == 0
+        assert mempool.stats["evicted"] == 1
+
+    def test_expiry(self, setUp_coins):
+        mempool = Mempool(expiry=60)
+        transactions = [self.make_trx(coin) for coin in self.coins[:3]]
+        for trx in transactions:
+            assert self.add(mempool, trx)
+        # the time of a transaction is changed (like a loaded one) out of the adding order
+        old_time = mempool.entries[transactions[0].__hash__].time - 120
+        assert mempool.set_time(transactions[1].__hash__, old_time)
+        assert mempool.expire() == [transactions[1].__hash__]
+        assert mempool.expired == 1
+        assert mempool.expire(now=mempool.entries[transactions[2].__hash__].time + 61) == \
+            [transactions[0].__hash__, transactions[2].__hash__]
+        assert len(mempool) == 0 and mempool.spent_outpoints == {}
+
+    def test_block_connected_and_disconnected(self, setUp_coins):
+        mempool = Mempool(max_limit_trx=3)
+        transactions = [self.make_trx(coin, fee=i) for i, coin in enumerate(self.coins)]
+        for trx in transactions[:4]:
+            assert self.add(mempool, trx)
+        # the block has two of them and a double spend of another one
+        block = Block("", 1, Trx(1, self.public_key))
+        double_spend = self.make_trx(self.coins[2], recipient="other")
+        double_spend.public_key = self.public_key
+        double_spend.signature = self.address.sign(double_spend.__hash__)
+        for trx in (mempool.transactions[transactions[0].__hash__],
+                    mempool.transactions[transactions[3].__hash__], double_spend):
+            block.add_trx(trx)
+        assert mempool.block_connected(block) == \
+            ({transactions[i].__hash__ for i in (0, 2, 3)}, [])
+        assert list(mempool.transactions) == [transactions[1].__hash__]
+        assert mempool.in_mining_transactions == [transactions[1].__hash__]
+
+        # a reorganization disconnects the block
+        assert mempool.block_disconnected(block, self.unspent_coins) == [True, True, True]
+        assert len(mempool) == 4
+        assert mempool.in_mining_transactions == \
+            [transactions[i].__hash__ for i in (3, 1, 0)]
+        # the new block spends a coin of the disconnected transactions
+        assert mempool.conflicts(transactions[2]) == {double_spend.__hash__}
+
+    def test_dump_and_load(self, setUp_coins, tmp_path):
+        path = str(tmp_path / "mempool.json")
+        mempool = Mempool()
+        transactions = [self.make_trx(coin, fee=i) for i, coin in enumerate(self.coins)]
+        for trx in transactions:
+            assert self.add(mempool, trx)
+        mempool.entries[transactions[0].__hash__].time -= 10
+        assert mempool.dump(path) == 5
+
+        # a coin has been spent since then and signatures are not cached
+        self.unspent_coins.spend(self.coins[1].created_trx_hash, 0)
+        signature_cache.clear()
+        loaded = Mempool()
+        assert loaded.load(path, self.unspent_coins) == 4
+        assert list(loaded.transactions) == \
+            [trx.__hash__ for i, trx in enumerate(transactions) if i != 1]
+        for trx_hash, entry in loaded.entries.items():
+            assert entry.time == mempool.entries[trx_hash].time
+            assert entry.fee == mempool.entries[trx_hash].fee
+            assert loaded.transactions[trx_hash].signature == \
+                mempool.transactions[trx_hash].signature
+        assert loaded.select_transactions()[0].__hash__ == transactions[4].__hash__
+
+        # the expired ones are dropped
+        assert Mempool(expiry=5).load(path, self.unspent_coins) == 3
+        assert Mempool().load(str(tmp_path / "not_exist.json"), self.unspent_coins) == 0
+        with open(path, "w") as file:
+            file.write("{broken")
+        assert Mempool().load(path, self.unspent_coins) == 0
+
+    def test_chained_transactions(self, setUp_coins):
+        mempool = Mempool()
+        parent = self.make_trx(self.coins[0], recipient=self.public_key, fee=1)
+        child = self.make_trx(parent.outputs[0], recipient=self.public_key, fee=4)
+        grandchild = self.make_trx(child.outputs[0], fee=0)
+        other = self.make_trx(self.coins[1], fee=2)
+        # the grandchild and child arrive before their parents
+        assert not self.add(mempool, grandchild)
+        assert not self.add(mempool, child)
+        assert mempool.is_orphan(child.__hash__) and mempool.is_orphan(grandchild.__hash__)
+        assert len(mempool) == 0
+        assert self.add(mempool, other)
+        item = (parent, self.address.sign(parent.__hash__), self.public_key)
+        # the promoted orphans are returned to be sent to other nodes
+        assert mempool.accept_transactions([item], self.unspent_coins) == \
+            ([True], [child.__hash__, grandchild.__hash__])
+        assert mempool.orphans == {}
+        assert len(mempool) == 4
+        assert mempool.parents(child) == {parent.__hash__}
+        assert mempool.descendants(parent.__hash__) == [child.__hash__, grandchild.__hash__]
+
+        # the child has the best fee rate but it comes after its parent
+        order = [trx.__hash__ for trx in mempool.select_transactions()]
+        assert order == [other.__hash__, parent.__hash__, child.__hash__, grandchild.__hash__]
+        small = mempool.entries[other.__hash__].size + mempool.entries[child.__hash__].size
+        assert [trx.__hash__ for trx in mempool.select_transactions(max_bytes=small)] == \
+            [other.__hash__]
+
+        # the block of them is valid in order and not in reverse
+        block = Block("", 1, Trx(1, self.public_key))
+        for trx in mempool.select_transactions():
+            block.add_trx(trx)
+        assert block.check_trx(self.unspent_coins)
+        block.transactions[1:] = reversed(block.transactions[1:])
+        assert not block.check_trx(self.unspent_coins)
+
+        # the double spend of a mempool output
+        assert not self.add(mempool, self.make_trx(parent.outputs[0], recipient="other"))
+        assert not mempool.orphans
+        # removing the parent removes its descendants
+        assert mempool.remove_with_descendants(parent.__hash__) == \
+            [parent.__hash__, child.__hash__, grandchild.__hash__]
+
+    def test_orphan_pool(self, setUp_coins):
+        mempool = Mempool(max_orphans=2)
+        parents = [self.make_trx(coin, recipient=self.public_key) for coin in self.coins[:3]]
+        children = [self.make_trx(parent.outputs[0]) for parent in parents]
+        for child in children:
+            assert not self.add(mempool, child)
+        # the oldest one is dropped
+        assert list(mempool.orphans) == [children[1].__hash__, children[2].__hash__]
+        assert mempool.stats["orphans"] == 2
+
+        # the parent is confirmed in a block
+        self.unspent_coins.add_coin(parents[2].outputs[0])
+        block = Block("", 1, Trx(1, self.public_key))
+        block.add_trx(parents[2])
+        assert mempool.block_connected(block, self.unspent_coins)[1] == [children[2].__hash__]
+        assert list(mempool.transactions) == [children[2].__hash__]
+        assert list(mempool.orphans) == [children[1].__hash__]
+
+    def test_frozen_transactions(self, setUp_coins):
+        mempool = Mempool()
+        trx = self.make_trx(self.coins[0], fee=1)
+        copied = deepcopy(trx)
+        assert copied is not trx and copied.__hash__ == trx.__hash__
+        sig = self.address.sign(trx.__hash__)
+        assert mempool.add_new_transaction(trx, sig, self.public_key, self.unspent_coins)
+        # the transaction of the caller is not changed
+        assert not trx.is_frozen and trx.signature is None
+        assert not self.coins[0].is_frozen and not trx.outputs[0].is_frozen
+        # mempool keeps a frozen copy of it and it can not be changed
+        mempool_trx = mempool.transactions[trx.__hash__]
+        assert mempool_trx is not trx and mempool_trx.__hash__ == trx.__hash__
+        assert mempool_trx.signature == sig and mempool_trx.public_key == self.public_key
+        assert mempool_trx.is_frozen
+        assert all(coin.is_frozen for coin in mempool_trx.inputs + mempool_trx.outputs)
+        with pytest.raises(AttributeError):
+            mempool_trx.time = 0
+        with pytest.raises(AttributeError):
+            mempool_trx.outputs[0].value = 100
+        assert deepcopy(mempool_trx) is mempool_trx
+        assert mempool_trx.inputs[0].trx_hash == trx.__hash__
+        # it is not added again
+        assert not mempool.add_new_transaction(mempool_trx, sig, self.public_key,
+                                               self.unspent_coins)
+        trx = mempool_trx
+
+        # a block template shares it
+        block = Block("", 1, Trx(1, self.public_key))
+        for mempool_trx in mempool.select_transactions():
+            block.add_trx(mempool_trx)
+        assert block.transactions[1] is trx
+        assert deepcopy(block).transactions[1] is trx
+        assert block.check_trx(self.unspent_coins)
+
+    def test_spent_parent_is_not_orphan(self, setUp_coins):
+        # the parent has been confirmed and its output has been spent
+        parent = self.make_trx(self.coins[0], recipient=self.public_key)
+        block = Block("", 1, Trx(1, self.public_key))
+        block.add_trx(parent)
+        mempool = Mempool(blockchain=BlockChain([block]))
+        assert mempool.blockchain.has_trx(parent.__hash__)
+        double_spend = self.make_trx(parent.outputs[0])
+        assert not self.add(mempool, double_spend)
+        assert not mempool.is_orphan(double_spend.__hash__)
+        # the parent of this one is not known
+        unknown_parent = self.make_trx(self.coins[1], recipient=self.public_key)
+        orphan = self.make_trx(unknown_parent.outputs[0])
+        assert not self.add(mempool, orphan)
+        assert mempool.is_orphan(orphan.__hash__)
+
+    def test_pruned_parent_is_not_orphan(self, setUp_coins):
+        # the parent is confirmed in a pruned block (not known by the blockchain), but one
+        # of its outputs is unspent
+        parent = Trx(1, self.public_key, [self.coins[0]],
+                     [Coin(self.public_key, 0, value=4), Coin(self.public_key, 1, value=6)])
+        parent.set_hash_coins()
+        self.unspent_coins.add_coin(parent.outputs[1])
+        assert self.unspent_coins.has_outputs_of(parent.__hash__)
+        mempool = Mempool(blockchain=BlockChain([]))
+        spent_output = self.make_trx(parent.outputs[0])
+        assert not self.add(mempool, spent_output)
+        assert not mempool.is_orphan(spent_output.__hash__)
+        assert self.add(mempool, self.make_trx(parent.outputs[1]))
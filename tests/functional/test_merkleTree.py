@@ -1,6 +1,8 @@
 from hashlib import sha256
 
-from pbcoin.merkle_tree import MerkleTreeNode
+import pytest
+
+from pbcoin.merkle_tree import ArrayMerkleTree, IncrementalMerkleTree, MerkleTreeNode
 
 some_hashes = [
     "dffd6021bb2bd5b0af676290809ec3a53191dd81c7f70a4b28688a362182986f",
@@ -60,3 +62,32 @@ class TestMerkleTree:
         need_hashes[0] = 'some thing else'
         is_exist, proof_root = MerkleTreeNode.proof_of_exist(need_hashes, bits, root.hash)
         assert not is_exist
+
+    @pytest.mark.parametrize("n_leaves", [0, 1, 2, 3, 5, 8, 13, 32, 33])
+    def test_incremental_tree_root(self, n_leaves):
+        """test appending leaves one by one gives the same root as building the tree"""
+        values = [sha256(str(i).encode()).hexdigest() for i in range(n_leaves)]
+        tree = IncrementalMerkleTree()
+        for i, value in enumerate(values):
+            tree.append(value)
+            root = MerkleTreeNode.build_merkle_tree(values[:i+1])
+            assert tree.hash == root.hash, f"Bad root after appending {i+1} leaves"
+        assert tree.size == n_leaves
+        assert IncrementalMerkleTree(values).hash == MerkleTreeNode.build_merkle_tree(values).hash
+
+    @pytest.mark.parametrize("n_leaves", [0, 1, 2, 5, 8, 13, 33])
+    def test_array_tree(self, n_leaves):
+        """test the array tree has the same root and proofs as the node tree"""
+        values = [sha256(str(i).encode()).hexdigest() for i in range(n_leaves)]
+        tree = ArrayMerkleTree(values)
+        root = MerkleTreeNode.build_merkle_tree(values)
+        assert tree.hash == root.hash
+        assert tree.size == n_leaves
+        for i, value in enumerate(values):
+            assert tree.get_proof(value) == root.get_proof(value)
+            assert tree.get_proof(index=i) == root.get_proof(index=i)
+        if n_leaves > 2:
+            need_hashes, bits = tree.get_proof(values[-1])
+            is_exist, _ = MerkleTreeNode.proof_of_exist(need_hashes, bits, tree.hash)
+            assert is_exist
+        assert tree.get_proof("00" * 32) is None
@@ -1,12 +1,17 @@
+import asyncio
 import os
+import time
+
 import pytest
 
 import pbcoin.config as conf
+import pbcoin.mine
 from pbcoin.block import Block, BlockValidationLevel
 from pbcoin.blockchain import BlockChain
 from pbcoin.mempool import Mempool
 from pbcoin.mine import Mine
 from pbcoin.trx import Coin, Trx
+from pbcoin.utxo import UTXOSet
 from pbcoin.wallet import Wallet
 
 
@@ -15,7 +20,7 @@ class TestTrx:
     async def mine_some_blocks(self, request):
         n = request.param
         blockchain = []
-        self.unspent_coins = {}
+        self.unspent_coins = UTXOSet()
         miner = Mine(blockchain, None, Mempool(), None)
         for i in range(n):
             pre_hash = ""
@@ -33,7 +38,7 @@ class TestTrx:
     @pytest.mark.parametrize("mine_some_blocks", [1, 2], indirect=True)
     async def test_mine_some_block(self, mine_some_blocks):
         """just test mine a valid block or not (with no extra transactions)"""
-        result = BlockChain.check_blockchain(self.blockchain.blocks, {}, conf.settings.glob.difficulty)
+        result = BlockChain.check_blockchain(self.blockchain.blocks, UTXOSet(), conf.settings.glob.difficulty)
         assert result == (True, None, BlockValidationLevel.ALL())
 
     async def test_mine_with_transaction(self):
@@ -45,7 +50,7 @@ class TestTrx:
         wallet = Wallet(path_secret_key=os.environ["KEY_PATH"])
         mempool = Mempool()
         miner = Mine(blockchain, None, mempool, None)
-        unspent_coins = dict()
+        unspent_coins = UTXOSet()
 
         # mine one block with no transaction
         new_block = blockchain.setup_new_block(Trx(1, wallet.public_key), mempool)
@@ -131,3 +136,48 @@ class TestTrx:
         assert last_block.transactions[1].inputs == actual_inputs, "Bad input transaction"
         assert len(miner.mempool) == 1, \
             "Didn't delete mempool transaction that was mined or add all trx"
+
+
+class TestMiningWorkers:
+    async def test_mine_with_workers(self):
+        """mine a block by searching nonces ranges in worker processes"""
+        blockchain = []
+        miner = Mine(blockchain, None, Mempool())
+        miner.start_workers(2)
+        try:
+            new_block = Block("", 1, Trx(1, "miner"))
+            await miner.mine("miner", {},
+                             setup_block=new_block,
+                             difficulty=conf.settings.glob.difficulty)
+        finally:
+            miner.stop_workers()
+        assert len(blockchain) == 1, "Didn't save the mined block"
+        mined_block = blockchain[0]
+        assert int(mined_block.__hash__, 16) <= conf.settings.glob.difficulty
+        assert mined_block.__hash__ == mined_block.calculate_hash(), \
+            "The found nonce is not set to the mined block"
+
+    async def test_new_block_stops_workers(self, monkeypatch):
+        """test the workers stop searching a stale block soon after a new block arrives"""
+        # a range that takes many seconds to search
+        monkeypatch.setattr(pbcoin.mine, "NONCE_RANGE_SIZE", 2 ** 28)
+        blockchain = []
+        miner = Mine(blockchain, None, Mempool())
+        miner.start_workers(2)
+        try:
+            miner.setup_block = Block("", 1, Trx(1, "miner"))
+            miner.setup_block.set_difficulty(0)  # no nonce is found
+            # warm up the workers
+            miner.start_over = True
+            assert not await miner.search_nonce_workers()
+            miner.reset()
+            search = asyncio.create_task(miner.search_nonce_workers(last_n=0))
+            await asyncio.sleep(0.2)
+            assert not search.done()
+            blockchain.append(Block("", 1))  # a new block from other nodes
+            start = time.perf_counter()
+            assert not await search
+            assert time.perf_counter() - start < 1, "The workers did not stop soon"
+            assert miner.setup_block.nonce == 0
+        finally:
+            miner.stop_workers()
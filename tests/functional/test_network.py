@@ -14,6 +14,7 @@ from pbcoin.network import Node
 from pbcoin.process_handler import ProcessingHandler
 from pbcoin.trx import Trx
 from pbcoin.utils.netbase import Addr
+from pbcoin.utxo import UTXOSet
 from pbcoin.wallet import Wallet
 
 
@@ -38,7 +39,7 @@ class TestNetworkBase:
                         port=self.PORT,
                         pub_key=f"0x2{i+1}")  # TODO: make a valid public key with Key class
             blockchain = BlockChain([])
-            unspent_coins = dict()
+            unspent_coins = UTXOSet()
             wallet = Wallet(path_secret_key=os.environ["KEY_PATH"], unspent_coins=unspent_coins)
             mempool = Mempool()
             proc_handler = ProcessingHandler(blockchain, unspent_coins, wallet, mempool)
@@ -0,0 +1,56 @@
+import base64
+from hashlib import sha256
+
+from pbcoin.block import Block
+from pbcoin.mempool import Mempool
+from pbcoin.sigcache import SignatureCache, signature_cache
+from pbcoin.trx import Coin, Trx
+from pbcoin.utils.address import Address
+from pbcoin.utxo import UTXOSet
+
+
+def make_address():
+    address = Address()
+    address.gen_secret()
+    address.gen_public()
+    return address, base64.b64encode(address.public_key.encode()).decode()
+
+
+class TestSignatureCache:
+    def test_lru(self):
+        address, public_key = make_address()
+        items = []
+        for i in range(4):
+            message = sha256(str(i).encode()).hexdigest()
+            items.append((message, address.sign(message), public_key))
+        cache = SignatureCache(max_size=2)
+        assert cache.invalid_signatures(items[:2]) == []
+        assert cache.stats == {"size": 2, "hits": 0, "misses": 2}
+        assert cache.verify(*items[0])  # items[1] is the least recently used
+        assert cache.hits == 1
+        assert cache.verify(*items[2])
+        assert items[0] in cache and items[2] in cache
+        assert items[1] not in cache
+        # the invalid signatures are not cached
+        bad = (items[3][0], items[0][1], public_key)
+        assert not cache.verify(*bad)
+        assert bad not in cache
+        assert len(cache) == 2
+
+    def test_mempool_and_block(self):
+        """test a transaction that is verified in mempool is not verified in its block"""
+        address, public_key = make_address()
+        unspent_coins = UTXOSet()
+        first_trx = Trx(1, public_key, [], [Coin(public_key, 0, value=10)])
+        unspent_coins.add_coin(first_trx.outputs[0])
+        trx = Trx(2, public_key, [first_trx.outputs[0]], [Coin("recipient", 0, value=10)])
+        trx.set_hash_coins()
+        signature_cache.clear()
+        mempool = Mempool()
+        assert mempool.add_new_transaction(trx, address.sign(trx.__hash__), public_key,
+                                           unspent_coins)
+        assert signature_cache.misses == 1
+        block = Block("", 2)
+        block.add_trx(mempool.transactions[trx.__hash__])
+        assert block.check_trx(unspent_coins)
+        assert signature_cache.hits == 1 and signature_cache.misses == 1
@@ -0,0 +1,112 @@
+import base64
+
+from pbcoin.trx import Coin, Trx
+from pbcoin.utils.address import Address, canonical_public_key
+from pbcoin.utils.tuple_util import tuple_to_string
+from pbcoin.utxo import BlockUndo, UTXOEntry, UTXOSet
+
+
+class TestUTXOSet:
+    def test_add_and_spend(self):
+        unspent_coins = UTXOSet()
+        unspent_coins.add("trx1", 0, "owner1", 20)
+        unspent_coins.add_coin(Coin("owner2", 1, "trx1", 30))
+        assert len(unspent_coins) == 2
+        assert unspent_coins.total_value == 50
+        assert ("trx1", 1) in unspent_coins
+        assert unspent_coins.get("trx1", 0) == UTXOEntry("owner1", 20)
+        assert unspent_coins.spend("trx1", 0) == UTXOEntry("owner1", 20)
+        assert unspent_coins.spend("trx1", 0) is None, "Spent a coin twice"
+        assert ("trx1", 0) not in unspent_coins
+        assert len(unspent_coins) == 1
+        assert unspent_coins.total_value == 30
+
+    def test_owner_coins(self):
+        unspent_coins = UTXOSet()
+        unspent_coins.add("trx1", 0, "owner1", 20)
+        unspent_coins.add("trx1", 1, "owner2", 30)
+        unspent_coins.add("trx2", 0, "owner1", 5)
+        assert unspent_coins.balance("owner1") == 25
+        assert unspent_coins.coins_of("owner1") == [Coin("owner1", 0, "trx1", 20),
+                                                   Coin("owner1", 0, "trx2", 5)]
+        unspent_coins.spend("trx1", 0)
+        assert unspent_coins.balance("owner1") == 5
+        assert unspent_coins.balance("nobody") == 0
+
+    def test_legacy_and_compact_owners(self):
+        """test the coins of a key in the legacy and the compact formats are one owner's"""
+        address = Address()
+        address.gen_secret()
+        address.gen_public()
+        compact = base64.b64encode(address.public_key_bytes).decode()
+        legacy = base64.b64encode(
+            tuple_to_string(address.public.tuple, Address.SECP256K1.N, to_b64=False).encode()
+        ).decode()
+        assert canonical_public_key(legacy) == compact == canonical_public_key(compact)
+        assert canonical_public_key("owner1") == "owner1"
+        unspent_coins = UTXOSet()
+        unspent_coins.add("trx1", 0, legacy, 20)
+        unspent_coins.add("trx2", 0, compact, 5)
+        assert unspent_coins.balance(compact) == unspent_coins.balance(legacy) == 25
+        coins = unspent_coins.coins_of(compact)
+        assert coins == [Coin(legacy, 0, "trx1", 20), Coin(compact, 0, "trx2", 5)]
+        assert all(coin.check_input_coin(unspent_coins) for coin in coins)
+        # the wallet spends both of them with its compact key
+        trx = Trx.make_trx(coins, compact, "recipient", 25)
+        assert trx.inputs == coins
+        unspent_coins.spend("trx1", 0)
+        assert unspent_coins.coins_of(legacy) == [Coin(compact, 0, "trx2", 5)]
+
+    def test_copy(self):
+        unspent_coins = UTXOSet()
+        unspent_coins.add("trx1", 0, "owner1", 20)
+        copied = unspent_coins.copy()
+        copied.spend("trx1", 0)
+        copied.add("trx2", 0, "owner1", 10)
+        assert unspent_coins.get("trx1", 0) is not None
+        assert unspent_coins.balance("owner1") == 20
+        assert copied.balance("owner1") == 10
+
+    def test_disconnect_undo(self):
+        """test disconnecting by the undo data gives the coins before connecting"""
+        unspent_coins = UTXOSet()
+        unspent_coins.add("trx1", 0, "owner1", 20)
+        unspent_coins.add("trx1", 1, "owner2", 30)
+        before = unspent_coins.copy()
+        undo = BlockUndo()
+        unspent_coins.spend("trx1", 0, undo)
+        unspent_coins.add("trx2", 0, "owner3", 20, undo)
+        # created and spent in the same block
+        unspent_coins.spend("trx2", 0, undo)
+        unspent_coins.add("trx3", 0, "owner3", 20, undo)
+        # replaced coin
+        unspent_coins.add("trx1", 1, "owner4", 30, undo)
+        assert undo.created == {("trx3", 0), ("trx1", 1)}
+        unspent_coins.disconnect(undo)
+        assert unspent_coins == before
+        assert unspent_coins.total_value == before.total_value
+        assert unspent_coins.balance("owner2") == 30
+        assert unspent_coins.balance("owner3") == 0
+
+    def test_view(self):
+        """test the changes of a view are not in the base until flushing"""
+        unspent_coins = UTXOSet()
+        unspent_coins.add("trx1", 0, "owner1", 20)
+        unspent_coins.add("trx1", 1, "owner2", 30)
+        view = unspent_coins.view()
+        view.spend("trx1", 0)
+        view.add("trx2", 0, "owner3", 15)
+        assert ("trx1", 0) not in view and ("trx2", 0) in view
+        assert ("trx1", 0) in unspent_coins and ("trx2", 0) not in unspent_coins
+        assert len(view) == 2 and view.total_value == 45
+        # stacked view
+        inner_view = view.view()
+        inner_view.spend("trx2", 0)
+        assert ("trx2", 0) not in inner_view and ("trx2", 0) in view
+        inner_view.discard()
+        assert ("trx2", 0) in inner_view
+        view.flush()
+        assert unspent_coins.get("trx1", 0) is None
+        assert unspent_coins.get("trx2", 0) == UTXOEntry("owner3", 15)
+        assert unspent_coins.total_value == 45
+        assert len(view) == len(unspent_coins)
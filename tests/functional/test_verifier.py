@@ -0,0 +1,62 @@
+import asyncio
+import base64
+from hashlib import sha256
+
+import pytest
+
+from pbcoin.sigcache import signature_cache
+from pbcoin.utils.address import Address
+from pbcoin.verifier import SignatureVerifier
+
+
+def make_items(n):
+    address = Address()
+    address.gen_secret()
+    address.gen_public()
+    public_key = base64.b64encode(address.public_key.encode()).decode()
+    items = []
+    for i in range(n):
+        message = sha256(f"verifier{i}".encode()).hexdigest()
+        items.append((message, address.sign(message), public_key))
+    return items
+
+
+class TestSignatureVerifier:
+    @pytest.mark.parametrize("n_workers", [0, 1, 2])
+    async def test_invalid_signatures(self, n_workers):
+        items = make_items(6)
+        items[3] = (items[3][0], items[4][1], items[3][2])
+        verifier = SignatureVerifier(n_workers=n_workers, max_in_flight=2)
+        verifier.start()
+        try:
+            signature_cache.clear()
+            assert await verifier.invalid_signatures(items) == [3]
+            assert items[0] in signature_cache and items[3] not in signature_cache
+            assert await verifier.verify(*items[0])
+            assert signature_cache.hits == 1
+            assert not await verifier.verify(*items[3])
+        finally:
+            verifier.stop()
+
+    @pytest.mark.parametrize("n_workers", [0, 1])
+    async def test_loop_is_responsive(self, n_workers):
+        """test the event loop runs other tasks while verifying"""
+        items = make_items(30)
+        verifier = SignatureVerifier(n_workers=n_workers)
+        verifier.start()
+        signature_cache.clear()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticker_task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        ticks = 0
+        assert await verifier.invalid_signatures(items) == []
+        ticker_task.cancel()
+        verifier.stop()
+        assert ticks > 1, "The event loop was blocked while verifying"